@@ -4,3 +4,9 @@ ADMIN = 'admin'
 FORBIDDEN_NAME = 'me'
 MODERATOR = 'moderator'
 USER = 'user'
+TITLE_FIELDS = ('id', 'name', 'year', 'description', 'category', 'genre',
+                'rating')
+TITLE_RELATIONS = ('category', 'genre')
+TITLE_BATCH_MAX_IDS = 100
+TITLE_PAGE_COMMENTS = 3
+TITLE_PAGE_MAX_COMMENTS = 20
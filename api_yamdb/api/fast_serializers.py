@@ -0,0 +1,261 @@
+"""
+Облегчённые сериализаторы только для чтения.
+
+Строят ответы списков из строк ``.values()`` без создания экземпляров
+моделей и без привязки полей DRF к каждому объекту. Результат совпадает
+с выводом ``TitleSerializer``, ``ReviewSerializer`` и ``CommentSerializer``
+байт в байт: тот же порядок полей и тот же формат ``pub_date``.
+"""
+from collections import defaultdict
+
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from rest_framework import serializers
+
+from api.constants import TITLE_FIELDS
+from reviews.models import ArchivedComment, Comment, Title
+
+# Поле DRF используется только ради to_representation: так формат даты
+# (ISO 8601, часовой пояс, суффикс `Z`) гарантированно совпадает.
+_datetime_to_representation = serializers.DateTimeField().to_representation
+
+
+def _int_or_none(value):
+    return None if value is None else int(value)
+
+
+class FastSerializer:
+    """
+    Базовый класс облегчённого сериализатора.
+
+    ``values(queryset)`` превращает queryset в выборку словарей,
+    ``to_representation(rows)`` строит из неё данные ответа, вызывая
+    ``row_to_dict(row)`` подкласса для каждой строки. Именованные
+    параметры обоих методов (например, набор полей) передаются из
+    ``FastListMixin.get_fast_serializer_options``.
+    """
+
+    value_fields = ()
+
+    @classmethod
+    def values(cls, queryset, **options):
+        return queryset.values(*cls.value_fields)
+
+    @classmethod
+    def to_representation(cls, rows, **options):
+        return [cls.row_to_dict(row) for row in rows]
+
+
+class FastTitleSerializer(FastSerializer):
+    """
+    Аналог ``TitleSerializer`` для списков произведений.
+
+    ``fields`` — выводимые поля (по умолчанию все), ``expand`` — связи,
+    которые выводятся вложенными объектами; остальные выбранные связи
+    выводятся слагами. Без ``expand`` вложены все связи, как в
+    ``TitleSerializer``. Запрос строится под выбранные поля: без
+    ``category`` нет соединения с категориями, без ``genre`` — запроса
+    жанров.
+    """
+
+    value_fields = ('id', 'name', 'year', 'description',
+                    'category__name', 'category__slug', 'rating')
+
+    @classmethod
+    def values(cls, queryset, fields=None, expand=None):
+        if fields is None and expand is None:
+            return queryset.values(*cls.value_fields)
+        # id нужен для жанров, даже если не выводится.
+        value_fields = ['id']
+        for name in fields or TITLE_FIELDS:
+            if name == 'category':
+                if expand is None or name in expand:
+                    value_fields.append('category__name')
+                value_fields.append('category__slug')
+            elif name not in ('id', 'genre'):
+                value_fields.append(name)
+        return queryset.values(*value_fields)
+
+    @classmethod
+    def to_representation(cls, rows, fields=None, expand=None):
+        rows = list(rows)
+        if fields is None and expand is None:
+            genres = cls.genres_by_title([row['id'] for row in rows])
+            return [
+                cls.row_to_dict(row, genres.get(row['id'], []))
+                for row in rows
+            ]
+        fields = fields or TITLE_FIELDS
+        genres = {}
+        if 'genre' in fields:
+            genres = cls.genres_by_title(
+                [row['id'] for row in rows],
+                nested=expand is None or 'genre' in expand
+            )
+        return [
+            cls.row_to_sparse_dict(row, genres.get(row['id'], []), fields)
+            for row in rows
+        ]
+
+    @staticmethod
+    def genres_by_title(title_ids, nested=True):
+        """
+        Жанры страницы одним запросом, в порядке ``Genre.Meta``: объекты
+        или, при ``nested=False``, только слаги.
+        """
+        result = defaultdict(list)
+        if not title_ids:
+            return result
+        through = Title.genre.through.objects.filter(
+            title_id__in=title_ids
+        ).order_by('title_id', 'genre__name')
+        if not nested:
+            for title_id, slug in through.values_list(
+                'title_id', 'genre__slug'
+            ):
+                result[title_id].append(slug)
+            return result
+        for title_id, name, slug in through.values_list(
+            'title_id', 'genre__name', 'genre__slug'
+        ):
+            result[title_id].append({'name': name, 'slug': slug})
+        return result
+
+    @staticmethod
+    def row_to_sparse_dict(row, genre, fields):
+        data = {}
+        for name in fields:
+            if name == 'category':
+                category = row['category__slug']
+                if category is not None and 'category__name' in row:
+                    category = {
+                        'name': row['category__name'],
+                        'slug': category,
+                    }
+                data[name] = category
+            elif name == 'genre':
+                data[name] = list(genre)
+            elif name == 'rating':
+                data[name] = _int_or_none(row['rating'])
+            else:
+                data[name] = row[name]
+        return data
+
+    @staticmethod
+    def row_to_dict(row, genre=()):
+        category = None
+        if row['category__slug'] is not None:
+            category = {
+                'name': row['category__name'],
+                'slug': row['category__slug'],
+            }
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'year': row['year'],
+            'description': row['description'],
+            'category': category,
+            'genre': list(genre),
+            'rating': _int_or_none(row['rating']),
+        }
+
+
+class FastReviewSerializer(FastSerializer):
+    """Аналог ``ReviewSerializer`` для списков отзывов."""
+
+    value_fields = ('id', 'text', 'author__username', 'score', 'pub_date',
+                    'comments_count')
+
+    @staticmethod
+    def row_to_dict(row):
+        return {
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'score': row['score'],
+            'pub_date': _datetime_to_representation(row['pub_date']),
+            'comments_count': row['comments_count'],
+        }
+
+
+class FastCommentSerializer(FastSerializer):
+    """Аналог ``CommentSerializer`` для списков комментариев."""
+
+    value_fields = ('id', 'text', 'author__username', 'pub_date')
+
+    @staticmethod
+    def row_to_dict(row):
+        return {
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'pub_date': _datetime_to_representation(row['pub_date']),
+        }
+
+    @classmethod
+    def first_by_review(cls, review_ids, limit, totals=None):
+        """
+        Первые ``limit`` комментариев каждого отзыва и их общее число
+        одним запросом: ``{review_id: {'count': ..., 'results': [...]}}``.
+
+        ``totals`` — ``comments_count`` отзывов. Если он больше числа
+        комментариев в ``Comment``, самые старые комментарии лежат в архиве
+        и дочитываются вторым запросом только для таких отзывов.
+        """
+        result = cls._first_rows(Comment.objects, review_ids, limit)
+        if not totals:
+            return result
+        archived = [
+            review_id for review_id in review_ids
+            if limit and totals[review_id] > result[review_id]['count']
+        ]
+        old = cls._first_rows(ArchivedComment.objects, archived, limit)
+        for review_id in archived:
+            page = result[review_id]
+            page['results'] = (
+                old[review_id]['results'] + page['results']
+            )[:limit]
+        for review_id in review_ids:
+            result[review_id]['count'] = totals[review_id]
+        return result
+
+    @staticmethod
+    def _first_rows(queryset, review_ids, limit):
+        """
+        Номер комментария в отзыве считает оконная функция; Django не
+        фильтрует по ней, поэтому запрос оборачивается во внешний SELECT.
+        При ``limit=0`` выбирается по одной строке на отзыв — ради общего
+        числа комментариев, без самих комментариев.
+        """
+        result = {
+            review_id: {'count': 0, 'results': []}
+            for review_id in review_ids
+        }
+        if not review_ids:
+            return result
+        ranked = queryset.filter(review_id__in=review_ids).annotate(
+            author_username=F('author__username'),
+            comment_number=Window(
+                RowNumber(), partition_by=[F('review_id')],
+                order_by=[F('pub_date').asc(), F('id').asc()]
+            ),
+            total=Window(Count('id'), partition_by=[F('review_id')]),
+        ).order_by()
+        sql, params = ranked.query.sql_with_params()
+        comments = queryset.model.objects.raw(
+            f'SELECT * FROM ({sql}) ranked WHERE comment_number <= %s '
+            f'ORDER BY review_id, comment_number',
+            (*params, max(limit, 1))
+        )
+        for comment in comments:
+            page = result[comment.review_id]
+            page['count'] = comment.total
+            if comment.comment_number > limit:
+                continue
+            page['results'].append({
+                'id': comment.id,
+                'text': comment.text,
+                'author': comment.author_username,
+                'pub_date': _datetime_to_representation(comment.pub_date),
+            })
+        return result
@@ -1,24 +1,88 @@
+import math
+
 import django_filters
+from django.db.models import Exists, F, OuterRef
+from rest_framework.filters import OrderingFilter
 
 from reviews.models import Title
 
 
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    """Список значений через запятую: ``?category__in=films,books``."""
+
+
 class TitleFilter(django_filters.FilterSet):
-    genre = django_filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='iexact'
-    )
+    """
+    Фильтры списка произведений. Жанры проверяются подзапросом ``EXISTS``
+    по промежуточной таблице, а не соединением: произведение с несколькими
+    подходящими жанрами не дублируется, и ``DISTINCT`` не нужен.
+    """
+
+    genre = django_filters.CharFilter(method='filter_genre')
+    genre__in = CharInFilter(method='filter_genre')
 
     category = django_filters.CharFilter(
         field_name='category__slug',
         lookup_expr='iexact'
     )
+    category__in = CharInFilter(
+        field_name='category__slug',
+        lookup_expr='in'
+    )
 
     name = django_filters.CharFilter(
         field_name='name',
         lookup_expr='icontains'
     )
 
+    year_min = django_filters.NumberFilter(
+        field_name='year',
+        lookup_expr='gte'
+    )
+    year_max = django_filters.NumberFilter(
+        field_name='year',
+        lookup_expr='lte'
+    )
+    # По тому же значению, что выводится в поле rating: средней оценке,
+    # усечённой до целого. Средняя 6.9 выводится как 6 и проходит
+    # rating_max=6, но не rating_min=7.
+    rating_min = django_filters.NumberFilter(method='filter_rating')
+    rating_max = django_filters.NumberFilter(method='filter_rating')
+
     class Meta:
         model = Title
         fields = ['genre', 'category', 'year', 'name']
+
+    def filter_genre(self, queryset, name, value):
+        genres = Title.genre.through.objects.filter(title_id=OuterRef('pk'))
+        if name == 'genre':
+            genres = genres.filter(genre__slug__iexact=value)
+        else:
+            genres = genres.filter(genre__slug__in=value)
+        return queryset.filter(Exists(genres))
+
+    def filter_rating(self, queryset, name, value):
+        # Средняя оценка неотрицательна, поэтому усечение — это floor:
+        # floor(rating) >= value <=> rating >= ceil(value),
+        # floor(rating) <= value <=> rating < floor(value) + 1.
+        if name == 'rating_min':
+            return queryset.filter(rating__gte=math.ceil(value))
+        return queryset.filter(rating__lt=math.floor(value) + 1)
+
+
+class NullsLastOrderingFilter(OrderingFilter):
+    """
+    ``ordering=`` с пустыми значениями в конце при любом направлении
+    сортировки и на любой СУБД (Postgres по умолчанию ставит NULL первыми
+    при сортировке по убыванию).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+        return queryset.order_by(*(
+            F(field[1:]).desc(nulls_last=True) if field.startswith('-')
+            else F(field).asc(nulls_last=True)
+            for field in ordering
+        ))
@@ -0,0 +1,312 @@
+"""
+Метрики в формате Prometheus.
+
+Счётчики и гистограммы хранятся в памяти процесса. Если задан
+``METRICS['MULTIPROCESS_DIR']``, каждый процесс периодически сохраняет своё
+состояние в файл этого каталога, а ``/metrics`` суммирует файлы всех
+процессов. Внешние сервисы не нужны.
+
+По умолчанию метрики выключены: ``/metrics`` раскрывает трафик, ошибки и
+время SQL по маршрутам. Включаются ``METRICS['ENABLED']``; если задан
+``METRICS['TOKEN']``, ``/metrics`` отвечает только на запросы с заголовком
+``Authorization: Bearer <токен>``.
+"""
+import atexit
+import hmac
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from api.profiling import QueryCounter, record_queries, route_name
+
+DEFAULTS = {
+    'ENABLED': False,
+    'TOKEN': None,
+    'MULTIPROCESS_DIR': None,
+    'FLUSH_INTERVAL': 5,
+}
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+FILE_PREFIX = 'metrics_'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'METRICS', {})}
+
+
+def authorized(request, token):
+    """Есть ли у запроса токен ``/metrics``; без токена доступ открыт."""
+    if not token:
+        return True
+    return hmac.compare_digest(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    )
+
+
+def _escape(value):
+    return (str(value).replace('\\', r'\\')
+            .replace('\n', r'\n').replace('"', r'\"'))
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{_escape(value)}"' for name, value in pairs
+    ) + '}'
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _add(current, value):
+    """Складывает значения счётчика или состояния гистограммы."""
+    if current is None:
+        return list(value) if isinstance(value, list) else value
+    if isinstance(value, list):
+        return [a + b for a, b in zip(current, value)]
+    return current + value
+
+
+class Metric:
+    """Семейство метрик с набором меток."""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def labels_key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type}',
+        ]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.labels_key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def expose(self, values):
+        lines = self.header()
+        for key, value in sorted(values.items()):
+            lines.append(
+                f'{self.name}{_format_labels(self.labelnames, key)} '
+                f'{_format_number(value)}'
+            )
+        return lines
+
+
+class Histogram(Metric):
+    """Значение по меткам: счётчики корзин, затем сумма и количество."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.labels_key(labels)
+        state = self.values.get(key)
+        if state is None:
+            state = self.values[key] = [0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[index] += 1
+                break
+        state[-2] += value
+        state[-1] += 1
+
+    def expose(self, values):
+        lines = self.header()
+        for key, state in sorted(values.items()):
+            cumulative = 0
+            counts = state[:len(self.buckets)]
+            # Наблюдения больше последней границы попадают только в +Inf.
+            counts = [*counts, state[-1] - sum(counts)]
+            bounds = [*self.buckets, float('inf')]
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = (('le', _format_number(bound)),)
+                lines.append(
+                    f'{self.name}_bucket'
+                    f'{_format_labels(self.labelnames, key, le)} {cumulative}'
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} '
+                         f'{_format_number(state[-2])}')
+            lines.append(f'{self.name}_count{labels} {state[-1]}')
+        return lines
+
+
+class Registry:
+    """Набор метрик процесса с сохранением и слиянием между процессами."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self._last_flush = time.monotonic()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def state(self):
+        with self.lock:
+            return {
+                name: [[list(key), value]
+                       for key, value in metric.values.items()]
+                for name, metric in self.metrics.items()
+            }
+
+    def process_file(self, directory):
+        return os.path.join(directory, f'{FILE_PREFIX}{os.getpid()}.json')
+
+    def flush(self, directory):
+        path = self.process_file(directory)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.state(), file)
+        os.replace(tmp_path, path)
+
+    def maybe_flush(self, directory, interval):
+        now = time.monotonic()
+        if now - self._last_flush < interval:
+            return
+        self._last_flush = now
+        self.flush(directory)
+
+    def read_process_files(self, directory):
+        """Сохранённые состояния других процессов из ``directory``."""
+        states = []
+        own_file = os.path.basename(self.process_file(directory))
+        for filename in sorted(os.listdir(directory)):
+            if (not filename.startswith(FILE_PREFIX)
+                    or not filename.endswith('.json')
+                    or filename == own_file):
+                continue
+            try:
+                with open(os.path.join(directory, filename),
+                          encoding='utf-8') as file:
+                    states.append(json.load(file))
+            except (OSError, ValueError):
+                continue
+        return states
+
+    def collect(self, directory=None):
+        """Своё состояние, суммированное с состояниями других процессов."""
+        states = [self.state()]
+        if directory and os.path.isdir(directory):
+            states.extend(self.read_process_files(directory))
+        merged = {}
+        for state in states:
+            for name, items in state.items():
+                if name not in self.metrics:
+                    continue
+                values = merged.setdefault(name, {})
+                for key, value in items:
+                    values[tuple(key)] = _add(values.get(tuple(key)), value)
+        return merged
+
+    def expose(self, directory=None):
+        merged = self.collect(directory)
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.extend(metric.expose(merged.get(name, {})))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    'yamdb_http_requests_total', 'Количество HTTP-запросов.',
+    ('route', 'method', 'status')
+))
+ERRORS = registry.register(Counter(
+    'yamdb_http_errors_total', 'Количество ответов с кодом 5xx.',
+    ('route', 'method')
+))
+LATENCY = registry.register(Histogram(
+    'yamdb_http_request_duration_seconds', 'Время обработки запроса.',
+    ('route',)
+))
+DB_QUERIES = registry.register(Histogram(
+    'yamdb_db_queries_per_request', 'Количество SQL-запросов на запрос.',
+    ('route',), buckets=QUERY_COUNT_BUCKETS
+))
+DB_TIME = registry.register(Counter(
+    'yamdb_db_query_duration_seconds_total', 'Суммарное время SQL-запросов.',
+    ('route',)
+))
+CACHE = registry.register(Counter(
+    'yamdb_cache_requests_total', 'Обращения к кэшу: попадания и промахи.',
+    ('cache', 'result')
+))
+
+
+def record_cache_access(cache, hit):
+    """Учитывает обращение к кэшу ``cache`` для доли попаданий."""
+    with registry.lock:
+        CACHE.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def _flush_at_exit():
+    directory = get_config()['MULTIPROCESS_DIR']
+    if directory:
+        registry.flush(directory)
+
+
+atexit.register(_flush_at_exit)
+
+
+class MetricsMiddleware:
+    """Считает запросы, задержки, ошибки и SQL-запросы по маршрутам DRF."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with record_queries(QueryCounter) as queries:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        route = route_name(request)
+        with registry.lock:
+            REQUESTS.inc(route=route, method=request.method,
+                         status=response.status_code)
+            if response.status_code >= 500:
+                ERRORS.inc(route=route, method=request.method)
+            LATENCY.observe(duration, route=route)
+            DB_QUERIES.observe(queries.count, route=route)
+            DB_TIME.inc(queries.duration, route=route)
+        if config['MULTIPROCESS_DIR']:
+            registry.maybe_flush(
+                config['MULTIPROCESS_DIR'], config['FLUSH_INTERVAL']
+            )
+        return response
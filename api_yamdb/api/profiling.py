@@ -0,0 +1,319 @@
+"""
+Профилирование запросов.
+
+``ProfilingMiddleware`` для выбранных запросов замеряет общее время,
+количество и время SQL-запросов, время сериализации и рендеринга и размер
+ответа. Время сериализации собирают ``TimedSerializerMixin`` представлений
+(все сериализаторы из ``get_serializer``) и ``timed('serializer')`` вокруг
+остальных. Результаты отдаются в заголовке ``Server-Timing`` и складываются
+в гистограммы по именам маршрутов (``title-list``, ``comment-detail`` и т.д.).
+
+Включается настройкой ``PROFILING`` (см. settings.py), по умолчанию
+выключено.
+"""
+import atexit
+import functools
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 1.0,
+    'DUPLICATE_QUERY_THRESHOLD': 5,
+    'DUMP_PATH': None,
+    'DUMP_INTERVAL': 60,
+}
+# Верхние границы корзин гистограммы общего времени запроса, мс.
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+
+_current_profile = ContextVar('current_profile', default=None)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PROFILING', {})}
+
+
+def normalize_sql(sql):
+    """Приводит SQL к форме, не зависящей от длины списков в ``IN``."""
+    return _IN_LIST_RE.sub('IN (...)', sql)
+
+
+class QueryCounter:
+    """
+    Обёртка ``connection.execute_wrapper``: только считает запросы и их
+    суммарное время. Её использует ``MetricsMiddleware`` на каждом запросе.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class QueryRecorder(QueryCounter):
+    """``QueryCounter``, который ещё и считает повторы одинаковых запросов."""
+
+    def __init__(self):
+        super().__init__()
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        try:
+            return super().__call__(execute, sql, params, many, context)
+        finally:
+            self.statements[normalize_sql(sql)] += 1
+
+    def duplicates(self, threshold):
+        """Запросы, повторившиеся не меньше ``threshold`` раз (N+1)."""
+        return {
+            sql: count for sql, count in self.statements.items()
+            if count >= threshold
+        }
+
+
+@contextmanager
+def record_queries(recorder_class=QueryRecorder):
+    """Подключает ``recorder_class`` ко всем соединениям на время блока."""
+    recorder = recorder_class()
+    wrappers = [
+        connections[alias].execute_wrapper(recorder)
+        for alias in connections
+    ]
+    for wrapper in wrappers:
+        wrapper.__enter__()
+    try:
+        yield recorder
+    finally:
+        for wrapper in reversed(wrappers):
+            wrapper.__exit__(None, None, None)
+
+
+@contextmanager
+def timed(name):
+    """
+    Добавляет длительность блока к метрике ``name`` текущего профиля.
+    Вне профилируемого запроса ничего не делает; вложенный блок той же
+    метрики не считается второй раз.
+    """
+    profile = _current_profile.get()
+    if profile is None or name in profile.running:
+        yield
+        return
+    profile.running.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.running.discard(name)
+        profile.timings[name] = (
+            profile.timings.get(name, 0.0) + time.perf_counter() - start
+        )
+
+
+def _timed_method(method, name):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with timed(name):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+class TimedSerializerMixin:
+    """
+    Миксин представления DRF: ``to_representation`` и ``run_validation``
+    сериализаторов из ``get_serializer`` попадают в метрику
+    ``serializer`` — для всех действий, а не только для быстрых списков.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if _current_profile.get() is not None:
+            for method in ('to_representation', 'run_validation'):
+                setattr(serializer, method, _timed_method(
+                    getattr(serializer, method), 'serializer'
+                ))
+        return serializer
+
+
+class RequestProfile:
+    """Замеры одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.running = set()
+        self.render_started = None
+
+
+class ProfileStore:
+    """Потокобезопасное хранилище агрегатов по маршрутам."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._last_dump = time.monotonic()
+
+    def add(self, route, sample):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    'count': 0,
+                    'histogram_ms': [0] * (len(HISTOGRAM_BUCKETS_MS) + 1),
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'sql_count': 0,
+                    'sql_ms': 0.0,
+                    'serializer_ms': 0.0,
+                    'render_ms': 0.0,
+                    'response_bytes': 0,
+                    'duplicate_queries': {},
+                }
+            stats['count'] += 1
+            stats['histogram_ms'][
+                bucket_index(sample['total_ms'], HISTOGRAM_BUCKETS_MS)
+            ] += 1
+            stats['max_ms'] = max(stats['max_ms'], sample['total_ms'])
+            for key in ('total_ms', 'sql_count', 'sql_ms', 'serializer_ms',
+                        'render_ms', 'response_bytes'):
+                stats[key] += sample[key]
+            for sql, count in sample['duplicate_queries'].items():
+                stats['duplicate_queries'][sql] = max(
+                    count, stats['duplicate_queries'].get(sql, 0)
+                )
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'buckets_ms': list(HISTOGRAM_BUCKETS_MS),
+                'routes': json.loads(json.dumps(self._routes)),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file, ensure_ascii=False, indent=2)
+
+    def maybe_dump(self, path, interval):
+        now = time.monotonic()
+        if now - self._last_dump < interval:
+            return
+        self._last_dump = now
+        self.dump(path)
+
+
+def bucket_index(value, buckets):
+    for index, bound in enumerate(buckets):
+        if value <= bound:
+            return index
+    return len(buckets)
+
+
+store = ProfileStore()
+
+
+def _dump_at_exit():
+    path = get_config()['DUMP_PATH']
+    if path and get_config()['ENABLED']:
+        store.dump(path)
+
+
+atexit.register(_dump_at_exit)
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.url_name or 'unnamed'
+
+
+class ProfilingMiddleware:
+    """Middleware профилирования запросов (см. описание модуля)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if not config['ENABLED'] or random.random() >= config['SAMPLE_RATE']:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        try:
+            with record_queries() as queries:
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        finished = time.perf_counter()
+
+        render_ms = 0.0
+        if profile.render_started is not None:
+            render_ms = (finished - profile.render_started) * 1000
+        sample = {
+            'total_ms': (finished - profile.started) * 1000,
+            'sql_count': queries.count,
+            'sql_ms': queries.duration * 1000,
+            'serializer_ms': profile.timings.get('serializer', 0.0) * 1000,
+            'render_ms': render_ms,
+            'response_bytes': (
+                0 if response.streaming else len(response.content)
+            ),
+            'duplicate_queries': queries.duplicates(
+                config['DUPLICATE_QUERY_THRESHOLD']
+            ),
+        }
+        route = route_name(request)
+        for sql, count in sample['duplicate_queries'].items():
+            logger.warning(
+                'Возможный N+1 в %s: запрос выполнен %d раз: %s',
+                route, count, sql
+            )
+        store.add(route, sample)
+        if config['DUMP_PATH']:
+            store.maybe_dump(config['DUMP_PATH'], config['DUMP_INTERVAL'])
+
+        response['Server-Timing'] = server_timing(sample)
+        return response
+
+    def process_template_response(self, request, response):
+        # Вызывается прямо перед рендерингом ответа DRF.
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.render_started = time.perf_counter()
+        return response
+
+
+def server_timing(sample):
+    return ', '.join((
+        f'total;dur={sample["total_ms"]:.2f}',
+        f'db;dur={sample["sql_ms"]:.2f};desc="{sample["sql_count"]} queries"',
+        f'serializer;dur={sample["serializer_ms"]:.2f}',
+        f'render;dur={sample["render_ms"]:.2f}',
+        f'dup;desc="{len(sample["duplicate_queries"])} repeated queries"',
+    ))
@@ -4,9 +4,12 @@ from django.core.validators import RegexValidator
 from django.utils import timezone
 from rest_framework import serializers
 
-from api.constants import FORBIDDEN_NAME, MAX_SCORE, MIN_SCORE
+from api.constants import (FORBIDDEN_NAME, MAX_SCORE, MIN_SCORE,
+                           TITLE_FIELDS, TITLE_RELATIONS)
 from reviews.constants import EMAIL_MAX_LEN, USERNAME_MAX_LEN
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (Category, Comment, Genre, Leaderboard, Review,
+                            Title, User, UserStats)
+from reviews.ratings import median_score
 from reviews.validators import validate_username
 
 
@@ -64,6 +67,26 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         return user
 
 
+class UserStatsSerializer(serializers.ModelSerializer):
+    average_score = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = UserStats
+        fields = ('reviews_count', 'average_score', 'comments_count',
+                  'last_activity')
+
+
+class UserStatsMixin(serializers.Serializer):
+    """Поле ``stats`` из ``UserStats``; без активности — нули."""
+
+    stats = serializers.SerializerMethodField()
+
+    def get_stats(self, obj):
+        return UserStatsSerializer(
+            getattr(obj, 'stats', None) or UserStats()
+        ).data
+
+
 class AdminRegisterSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -72,6 +95,11 @@ class AdminRegisterSerializer(serializers.ModelSerializer):
                   'bio', 'first_name', 'last_name')
 
 
+class AdminUserDetailSerializer(UserStatsMixin, AdminRegisterSerializer):
+    class Meta(AdminRegisterSerializer.Meta):
+        fields = AdminRegisterSerializer.Meta.fields + ('stats',)
+
+
 class TokenObtainSerializer(serializers.Serializer):
     username = serializers.CharField()
     confirmation_code = serializers.CharField()
@@ -85,6 +113,11 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ('role',)
 
 
+class UserProfileSerializer(UserStatsMixin, UserSerializer):
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ('stats',)
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -100,6 +133,11 @@ class GenreSerializer(serializers.ModelSerializer):
 
 
 class TitleSerializer(serializers.ModelSerializer):
+    """
+    ``fields`` и ``expand`` — набор полей и вложенных связей, как у
+    ``FastTitleSerializer``: невложенные связи выводятся слагами.
+    """
+
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
     rating = serializers.IntegerField(
@@ -108,8 +146,52 @@ class TitleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = ('id', 'name', 'year', 'description',
-                  'category', 'genre', 'rating')
+        fields = TITLE_FIELDS
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if expand is not None:
+            for name in set(TITLE_RELATIONS) & set(self.fields) - set(expand):
+                self.fields[name] = serializers.SlugRelatedField(
+                    slug_field='slug', read_only=True,
+                    many=name == 'genre'
+                )
+
+
+class LeaderboardSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='title_id')
+    name = serializers.CharField(source='title.name')
+    year = serializers.IntegerField(source='title.year')
+
+    class Meta:
+        model = Leaderboard
+        fields = ('rank', 'id', 'name', 'year', 'score', 'reviews_count')
+
+
+class RatingStatsSerializer(serializers.ModelSerializer):
+    total = serializers.IntegerField(source='score_count')
+    mean = serializers.SerializerMethodField()
+    median = serializers.SerializerMethodField()
+    scores = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Title
+        fields = ('id', 'total', 'mean', 'median', 'weighted_rating',
+                  'scores')
+
+    def get_mean(self, obj):
+        if not obj.score_count:
+            return None
+        return obj.score_sum / obj.score_count
+
+    def get_median(self, obj):
+        return median_score(obj.score_counts)
+
+    def get_scores(self, obj):
+        return {str(score): count for score, count in obj.score_counts.items()}
 
 
 class TitleCreateUpdateSerializer(serializers.ModelSerializer):
@@ -152,7 +234,8 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comments_count')
 
     def validate_score(self, value):
         if not (MIN_SCORE <= value <= MAX_SCORE):
@@ -183,3 +266,19 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ('id', 'text', 'author', 'pub_date')
+
+
+class HiddenReviewSerializer(ReviewSerializer):
+    """Скрытый отзыв в очереди модерации."""
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('title', 'deleted_at')
+        read_only_fields = fields
+
+
+class HiddenCommentSerializer(CommentSerializer):
+    """Скрытый комментарий в очереди модерации."""
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ('review', 'deleted_at')
+        read_only_fields = fields
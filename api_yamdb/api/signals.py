@@ -0,0 +1,16 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api import facets
+from reviews.models import Category, Genre, Title
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(m2m_changed, sender=Title.genre.through)
+def catalog_changed(sender, **kwargs):
+    facets.invalidate()
@@ -1,9 +1,11 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
-from api.views import (AdminRegisterViewSet, CategoryViewSet, CommentViewSet,
-                       GenreViewSet, ReviewViewSet, TitleViewSet,
-                       TokenObtainView, UserProfileView, UserRegisterView)
+from api.views import (AdminRegisterViewSet, CategoryViewSet,
+                       CommentModerationViewSet, CommentViewSet, ExportView,
+                       GenreViewSet, ProfilingView, ReviewModerationViewSet,
+                       ReviewViewSet, TitleViewSet, TokenObtainView,
+                       UserProfileView, UserRegisterView)
 
 router_v1 = DefaultRouter()
 router_v1.register('users', AdminRegisterViewSet, basename='users')
@@ -20,6 +22,14 @@ router_v1.register(
     CommentViewSet,
     basename='comment'
 )
+router_v1.register(
+    'moderation/reviews', ReviewModerationViewSet,
+    basename='moderation-review'
+)
+router_v1.register(
+    'moderation/comments', CommentModerationViewSet,
+    basename='moderation-comment'
+)
 
 api_v1_auth_urls = [
     path('signup/', UserRegisterView.as_view(), name='signup'),
@@ -29,6 +39,11 @@ api_v1_auth_urls = [
 api_v1_urlpatterns = [
     path('users/me/', UserProfileView.as_view(), name='user-profile'),
     path('auth/', include(api_v1_auth_urls)),
+    path('profiling/', ProfilingView.as_view(), name='profiling'),
+    re_path(
+        r'^export/(?P<kind>reviews|comments)\.(?P<file_format>csv|ndjson)$',
+        ExportView.as_view(), name='export'
+    ),
     path('', include(router_v1.urls)),
 ]
 
@@ -1,24 +1,47 @@
-from django.db.models import Avg
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.views import View
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import (filters, generics, mixins,
                             permissions, status, viewsets)
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import LimitOffsetPagination
-from rest_framework.permissions import (IsAuthenticated,
+from rest_framework.permissions import (SAFE_METHODS, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from api.filters import TitleFilter
-from api.permissions import (IsAdminOrReadOnly, IsAdminUser, IsAuthor,
-                             IsAuthorOrReadOnly)
-from api.serializers import (AdminRegisterSerializer, CategorySerializer,
+from api import facets, metrics
+from api.constants import (TITLE_BATCH_MAX_IDS, TITLE_FIELDS,
+                           TITLE_PAGE_COMMENTS, TITLE_PAGE_MAX_COMMENTS,
+                           TITLE_RELATIONS)
+from api.fast_serializers import (FastCommentSerializer,
+                                  FastReviewSerializer, FastTitleSerializer)
+from api.filters import NullsLastOrderingFilter, TitleFilter
+from api.permissions import (IsAdminOrModeratorUser, IsAdminOrReadOnly,
+                             IsAdminUser, IsAuthor, IsAuthorOrReadOnly)
+from api.profiling import TimedSerializerMixin
+from api.profiling import store as profile_store
+from api.profiling import timed
+from api.serializers import (AdminRegisterSerializer,
+                             AdminUserDetailSerializer, CategorySerializer,
                              CommentSerializer, GenreSerializer,
+                             HiddenCommentSerializer, HiddenReviewSerializer,
+                             LeaderboardSerializer, RatingStatsSerializer,
                              ReviewSerializer, TitleCreateUpdateSerializer,
                              TitleSerializer, TokenObtainSerializer,
-                             UserRegisterSerializer, UserSerializer)
-from reviews.models import Category, Genre, Review, Title, User
+                             UserProfileSerializer, UserRegisterSerializer)
+from reviews import deletion, exports, leaderboards, moderation
+from reviews.archive import ChainedRows, unarchive_comment
+from reviews.constants import (LEADERBOARD_ALL, LEADERBOARD_CATEGORY,
+                               LEADERBOARD_GENRE, LEADERBOARD_TRENDING)
+from reviews.models import (Category, Comment, Genre, Leaderboard, Review,
+                            Title, User)
+from reviews.ratings import average_rating
 
 
 class UserRegisterView(APIView):
@@ -38,7 +61,22 @@ class UserRegisterView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class AdminRegisterViewSet(viewsets.ModelViewSet):
+class FastDestroyMixin:
+    """
+    Удаление через ``reviews.deletion``: зависимые отзывы и комментарии
+    удаляются пачками. Большой каскад ставится заданием на удаление с
+    ответом 202; повторный DELETE до его выполнения тоже отвечает 202 и
+    второго удаления не начинает.
+    """
+
+    def destroy(self, request, *args, **kwargs):
+        if deletion.delete(self.get_object()) is not None:
+            return Response(status=status.HTTP_202_ACCEPTED)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AdminRegisterViewSet(TimedSerializerMixin, FastDestroyMixin,
+                           viewsets.ModelViewSet):
     """
     Отвечает за возможность админа делать
     различные запросы на адрес /users.
@@ -53,6 +91,16 @@ class AdminRegisterViewSet(viewsets.ModelViewSet):
     search_fields = ('username',)
     lookup_field = 'username'
 
+    def get_queryset(self):
+        if self.action == 'retrieve':
+            return self.queryset.select_related('stats')
+        return self.queryset
+
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return AdminUserDetailSerializer
+        return AdminRegisterSerializer
+
 
 class TokenObtainView(APIView):
     """Отвечает за работу с токеном(его получение при запросе)."""
@@ -82,17 +130,93 @@ class TokenObtainView(APIView):
         )
 
 
-class UserProfileView(generics.RetrieveUpdateAPIView):
+class UserProfileView(TimedSerializerMixin,
+                      generics.RetrieveUpdateAPIView):
     """Отвечает за получение и обновление профиля пользователя."""
 
-    serializer_class = UserSerializer
+    serializer_class = UserProfileSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
         return self.request.user
 
 
-class CategoryGenreMixin(mixins.ListModelMixin,
+class FastListMixin:
+    """
+    Миксин быстрого списка: страница строится из строк ``.values()``
+    облегчённым сериализатором, без создания экземпляров моделей.
+    """
+
+    fast_serializer_class = None
+
+    def get_fast_serializer_options(self):
+        """Именованные параметры методов облегчённого сериализатора."""
+        return {}
+
+    def list(self, request, *args, **kwargs):
+        options = self.get_fast_serializer_options()
+        queryset = self.fast_serializer_class.values(
+            self.filter_queryset(self.get_queryset()), **options
+        )
+        page = self.paginate_queryset(queryset)
+        with timed('serializer'):
+            data = self.fast_serializer_class.to_representation(
+                queryset if page is None else page, **options
+            )
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class ProfilingView(APIView):
+    """Агрегаты профилирования запросов по маршрутам."""
+
+    permission_classes = (IsAuthenticated, IsAdminUser)
+
+    def get(self, request):
+        return Response(profile_store.snapshot())
+
+    def delete(self, request):
+        profile_store.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ExportView(APIView):
+    """
+    Потоковая выгрузка всех отзывов или комментариев в CSV или NDJSON
+    (``reviews.exports``) для сотрудников.
+    """
+
+    permission_classes = (IsAuthenticated, IsAdminUser)
+
+    def get(self, request, kind, file_format):
+        stream, _, content_type = exports.FORMATS[file_format]
+        response = StreamingHttpResponse(
+            stream(kind), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{exports.filename(kind, file_format)}"'
+        )
+        return response
+
+
+class MetricsView(View):
+    """Выдача метрик в текстовом формате Prometheus."""
+
+    def get(self, request):
+        config = metrics.get_config()
+        if not config['ENABLED']:
+            return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+        if not metrics.authorized(request, config['TOKEN']):
+            return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+        return HttpResponse(
+            metrics.registry.expose(config['MULTIPROCESS_DIR']),
+            content_type=metrics.CONTENT_TYPE
+        )
+
+
+class CategoryGenreMixin(TimedSerializerMixin,
+                         mixins.ListModelMixin,
                          mixins.CreateModelMixin,
                          mixins.DestroyModelMixin,
                          viewsets.GenericViewSet):
@@ -119,17 +243,27 @@ class GenreViewSet(CategoryGenreMixin):
     serializer_class = GenreSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(TimedSerializerMixin, FastListMixin, FastDestroyMixin,
+                   viewsets.ModelViewSet):
     """Представление для управления произведениями."""
 
     serializer_class = TitleSerializer
-    filter_backends = (DjangoFilterBackend,)
+    fast_serializer_class = FastTitleSerializer
+    filter_backends = (DjangoFilterBackend, NullsLastOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ('weighted_rating', 'rating', 'name', 'year')
     http_method_names = ('get', 'post', 'delete', 'patch')
     permission_classes = (IsAuthenticatedOrReadOnly, IsAdminOrReadOnly)
 
     def get_queryset(self):
-        queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
+        queryset = Title.objects.all().annotate(rating=average_rating())
+        if self.action in ('retrieve', 'page'):
+            fields, expand = self.get_fieldset()
+            fields = fields or TITLE_FIELDS
+            if 'category' in fields:
+                queryset = queryset.select_related('category')
+            if 'genre' in fields:
+                queryset = queryset.prefetch_related('genre')
         return queryset.order_by('-rating')
 
     def get_serializer_class(self):
@@ -137,11 +271,213 @@ class TitleViewSet(viewsets.ModelViewSet):
             return TitleCreateUpdateSerializer
         return TitleSerializer
 
-
-class ReviewViewSet(viewsets.ModelViewSet):
+    def get_fieldset(self):
+        """
+        Поля из ``?fields=`` и вложенные связи из ``?expand=`` (через
+        запятую). ``None`` — параметр не задан: все поля, все связи
+        вложены.
+        """
+        fieldset = []
+        for param, allowed in (('fields', TITLE_FIELDS),
+                               ('expand', TITLE_RELATIONS)):
+            value = self.request.query_params.get(param)
+            if value is None:
+                fieldset.append(None)
+                continue
+            names = {name.strip() for name in value.split(',')} - {''}
+            unknown = names - set(allowed)
+            if unknown or (param == 'fields' and not names):
+                raise ValidationError({
+                    param: f'Допустимые значения: {", ".join(allowed)}.'
+                })
+            # Порядок полей в ответе не зависит от порядка в запросе.
+            fieldset.append(tuple(name for name in allowed if name in names))
+        return tuple(fieldset)
+
+    def get_fast_serializer_options(self):
+        fields, expand = self.get_fieldset()
+        return {'fields': fields, 'expand': expand}
+
+    def get_serializer(self, *args, **kwargs):
+        if self.get_serializer_class() is TitleSerializer:
+            fields, expand = self.get_fieldset()
+            kwargs.setdefault('fields', fields)
+            kwargs.setdefault('expand', expand)
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        names = request.query_params.get('facets')
+        if names is None:
+            return super().list(request, *args, **kwargs)
+        names = facets.parse_facets(names)
+        response = super().list(request, *args, **kwargs)
+        params = {
+            name: value for name, value in request.query_params.items()
+            if name in self.filterset_class.base_filters
+        }
+        response.data['facets'] = facets.get_facets(
+            self.filter_queryset(self.get_queryset()), names, params
+        )
+        return response
+
+    def leaderboard_response(self, kind, scope):
+        size = leaderboards.get_config()['SIZE']
+        limit = self.request.query_params.get('limit', size)
+        try:
+            limit = min(int(limit), size)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            raise ValidationError({
+                'limit': 'Ожидается целое число не меньше 1.'
+            })
+        entries = Leaderboard.objects.filter(
+            kind=kind, scope=scope
+        ).select_related('title')[:limit]
+        with timed('serializer'):
+            data = LeaderboardSerializer(entries, many=True).data
+        return Response(data)
+
+    @action(detail=False)
+    def top(self, request):
+        """Лучшие произведения: всего, в категории или в жанре."""
+        category = request.query_params.get('category')
+        genre = request.query_params.get('genre')
+        if category and genre:
+            raise ValidationError(
+                'Укажите либо category, либо genre, но не оба.'
+            )
+        if category:
+            return self.leaderboard_response(
+                LEADERBOARD_CATEGORY,
+                get_object_or_404(Category, slug=category).id
+            )
+        if genre:
+            return self.leaderboard_response(
+                LEADERBOARD_GENRE, get_object_or_404(Genre, slug=genre).id
+            )
+        return self.leaderboard_response(LEADERBOARD_ALL, 0)
+
+    @action(detail=False)
+    def trending(self, request):
+        """Произведения с наибольшим числом отзывов в день за N дней."""
+        windows = leaderboards.get_config()['TRENDING_DAYS']
+        days = request.query_params.get('days', windows[0])
+        if str(days) not in map(str, windows):
+            raise ValidationError({
+                'days': f'Допустимые значения: '
+                        f'{", ".join(map(str, windows))}.'
+            })
+        return self.leaderboard_response(LEADERBOARD_TRENDING, int(days))
+
+    @action(detail=False)
+    def batch(self, request):
+        """
+        Произведения по списку ``?ids=`` в порядке запроса за постоянное
+        число запросов к базе; отсутствующие id — в ``missing``.
+        """
+        try:
+            ids = [int(value) for value in
+                   request.query_params.get('ids', '').split(',') if value]
+        except ValueError:
+            raise ValidationError({'ids': 'Ожидаются целые числа.'})
+        ids = list(dict.fromkeys(ids))
+        if not ids or len(ids) > TITLE_BATCH_MAX_IDS:
+            raise ValidationError({
+                'ids': f'Укажите от 1 до {TITLE_BATCH_MAX_IDS} id '
+                       f'через запятую.'
+            })
+        options = self.get_fast_serializer_options()
+        drop_id = bool(options['fields']) and 'id' not in options['fields']
+        if drop_id:
+            # id нужен, чтобы восстановить порядок; в ответ он не попадёт.
+            options['fields'] = ('id', *options['fields'])
+        rows = self.fast_serializer_class.values(
+            Title.objects.filter(id__in=ids).annotate(
+                rating=average_rating()
+            ).order_by(), **options
+        )
+        with timed('serializer'):
+            found = {
+                item['id']: item for item in
+                self.fast_serializer_class.to_representation(rows, **options)
+            }
+        results = [found[pk] for pk in ids if pk in found]
+        if drop_id:
+            for item in results:
+                del item['id']
+        return Response({
+            'results': results,
+            'missing': [pk for pk in ids if pk not in found],
+        })
+
+    @action(detail=True)
+    def page(self, request, pk=None):
+        """
+        Всё для страницы произведения за один ответ и постоянное число
+        запросов: произведение, распределение оценок, первая страница
+        отзывов и первые ``?comments=`` комментариев каждого отзыва.
+        """
+        try:
+            comments_limit = int(
+                request.query_params.get('comments', TITLE_PAGE_COMMENTS)
+            )
+        except ValueError:
+            comments_limit = -1
+        if not 0 <= comments_limit <= TITLE_PAGE_MAX_COMMENTS:
+            raise ValidationError({
+                'comments': f'Ожидается число от 0 до '
+                            f'{TITLE_PAGE_MAX_COMMENTS}.'
+            })
+        title = self.get_object()
+        page_size = self.paginator.get_page_size(request)
+        rows = list(FastReviewSerializer.values(
+            title.reviews.order_by('pub_date', 'id')
+        )[:page_size])
+        with timed('serializer'):
+            reviews = FastReviewSerializer.to_representation(rows)
+        comments = FastCommentSerializer.first_by_review(
+            [review['id'] for review in reviews], comments_limit,
+            totals={
+                review['id']: review['comments_count'] for review in reviews
+            }
+        )
+        for review in reviews:
+            review['comments'] = comments[review['id']]
+        next_page = None
+        # Число отзывов денормализовано: отдельный COUNT не нужен.
+        if title.score_count > page_size:
+            next_page = replace_query_param(reverse(
+                'review-list', kwargs={'title_id': title.id}, request=request
+            ), self.paginator.page_query_param, 2)
+        with timed('serializer'):
+            title_data = self.get_serializer(title).data
+            rating_stats = RatingStatsSerializer(title).data
+        return Response({
+            'title': title_data,
+            'rating_stats': rating_stats,
+            'reviews': {
+                'count': title.score_count,
+                'next': next_page,
+                'results': reviews,
+            },
+        })
+
+    @action(detail=True, url_path='rating-stats')
+    def rating_stats(self, request, pk=None):
+        """Распределение оценок из счётчиков произведения, без отзывов."""
+        title = get_object_or_404(Title, pk=pk)
+        with timed('serializer'):
+            data = RatingStatsSerializer(title).data
+        return Response(data)
+
+
+class ReviewViewSet(TimedSerializerMixin, FastListMixin,
+                    viewsets.ModelViewSet):
     """Представление для управления отзывами."""
 
     serializer_class = ReviewSerializer
+    fast_serializer_class = FastReviewSerializer
     http_method_names = ('get', 'post', 'delete', 'patch')
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
 
@@ -158,26 +494,137 @@ class ReviewViewSet(viewsets.ModelViewSet):
             title=self.get_title()
         )
 
+    def perform_destroy(self, instance):
+        moderation.hide(instance)
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(TimedSerializerMixin, FastListMixin,
+                     viewsets.ModelViewSet):
     """Представление для управления комментариями к отзывам."""
 
     serializer_class = CommentSerializer
+    fast_serializer_class = FastCommentSerializer
     http_method_names = ('get', 'post', 'delete', 'patch')
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthor)
 
     def get_review(self):
-        return get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'),
-            title_id=self.kwargs.get('title_id')
-        )
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                id=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id')
+            )
+        return self._review
 
     def get_queryset(self):
         return self.get_review().comments.all()
 
+    def list(self, request, *args, **kwargs):
+        """
+        Старые комментарии могут быть в архиве (``reviews.archive``): тогда
+        страницы идут сначала по архиву, затем по горячей таблице.
+        """
+        review = self.get_review()
+        if not review.archived_comments_count:
+            return super().list(request, *args, **kwargs)
+        values = self.fast_serializer_class.values
+        rows = ChainedRows(
+            values(review.archived_comments.order_by('pub_date', 'id')),
+            review.archived_comments_count,
+            values(self.get_queryset().order_by('pub_date', 'id')),
+            review.comments_count - review.archived_comments_count
+        )
+        page = self.paginate_queryset(rows)
+        data = self.fast_serializer_class.to_representation(
+            rows[:] if page is None else page
+        )
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def get_object(self):
+        """
+        Архивный комментарий перед изменением или скрытием возвращается в
+        горячую таблицу: после этого он обычный, в том числе в очереди
+        модерации. Права проверяются до переноса.
+        """
+        try:
+            return super().get_object()
+        except Http404:
+            review = self.get_review()
+            if (self.request.method in SAFE_METHODS
+                    or not review.archived_comments_count):
+                raise
+        archived = get_object_or_404(
+            review.archived_comments, pk=self.kwargs['pk']
+        )
+        self.check_object_permissions(self.request, archived)
+        unarchive_comment(archived.pk)
+        return super().get_object()
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            review = self.get_review()
+            if not review.archived_comments_count:
+                raise
+        row = get_object_or_404(
+            self.fast_serializer_class.values(review.archived_comments),
+            pk=kwargs['pk']
+        )
+        return Response(self.fast_serializer_class.row_to_dict(row))
+
     def perform_create(self, serializer):
         serializer.save(
             author=self.request.user,
             review=self.get_review()
         )
+
+    def perform_destroy(self, instance):
+        moderation.hide(instance)
+
+
+class ModerationMixin(TimedSerializerMixin, mixins.ListModelMixin,
+                      viewsets.GenericViewSet):
+    """
+    Очередь модерации: скрытые строки, последние скрытые первыми,
+    и их восстановление ``POST .../{id}/restore/``.
+    """
+
+    permission_classes = (IsAuthenticated, IsAdminOrModeratorUser)
+
+    def get_queryset(self):
+        return self.queryset.filter(
+            deleted_at__isnull=False
+        ).select_related('author').order_by('-deleted_at', '-id')
+
+    def check_restore(self, obj):
+        pass
+
+    @action(detail=True, methods=('post',))
+    def restore(self, request, pk=None):
+        obj = self.get_object()
+        self.check_restore(obj)
+        moderation.restore(obj)
+        return Response(self.get_serializer(obj).data)
+
+
+class ReviewModerationViewSet(ModerationMixin):
+    """Скрытые отзывы."""
+
+    queryset = Review.all_objects.all()
+    serializer_class = HiddenReviewSerializer
+
+    def check_restore(self, obj):
+        if moderation.restore_conflicts(obj):
+            raise ValidationError(
+                'У автора уже есть отзыв на это произведение.'
+            )
+
+
+class CommentModerationViewSet(ModerationMixin):
+    """Скрытые комментарии."""
+
+    queryset = Comment.all_objects.all()
+    serializer_class = HiddenCommentSerializer
@@ -30,6 +30,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -125,3 +127,76 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+
+# Профилирование запросов (api.profiling), по умолчанию выключено.
+PROFILING = {
+    'ENABLED': False,
+    # Доля профилируемых запросов, от 0 до 1.
+    'SAMPLE_RATE': 0.1,
+    # Сколько одинаковых запросов за один ответ считать признаком N+1.
+    'DUPLICATE_QUERY_THRESHOLD': 5,
+    # Файл, в который периодически сохраняются агрегаты по маршрутам.
+    'DUMP_PATH': None,
+    'DUMP_INTERVAL': 60,
+}
+
+# Метрики Prometheus (api.metrics), выдаются по адресу /metrics.
+METRICS = {
+    # Выключено по умолчанию: /metrics раскрывает трафик по маршрутам.
+    'ENABLED': os.environ.get('METRICS_ENABLED', '') == '1',
+    # Если задан, /metrics требует заголовок Authorization: Bearer <токен>.
+    'TOKEN': os.environ.get('METRICS_TOKEN'),
+    # Общий каталог для нескольких процессов (gunicorn и т.п.): каждый
+    # процесс сохраняет туда свои счётчики, /metrics их суммирует.
+    'MULTIPROCESS_DIR': os.environ.get('METRICS_MULTIPROCESS_DIR'),
+    'FLUSH_INTERVAL': 5,
+}
+
+# Предрасчитанные рейтинги (reviews.leaderboards), обновляются командой
+# `python manage.py refresh_leaderboards`.
+LEADERBOARDS = {
+    'SIZE': 100,
+    'TRENDING_DAYS': (1, 7, 30),
+}
+
+# Взвешенный рейтинг произведений (reviews.ratings): пока отзывов мало,
+# рейтинг тянется к PRIOR_MEAN с весом PRIOR_WEIGHT оценок.
+WEIGHTED_RATING = {
+    'PRIOR_MEAN': 5.5,
+    'PRIOR_WEIGHT': 10,
+}
+
+# Фасетные счётчики списка произведений (api.facets), ?facets=genre,...
+FACETS = {
+    'CACHE_TIMEOUT': 300,
+    # Ширина интервала годов, лет.
+    'YEAR_BUCKET': 10,
+}
+
+# Быстрое удаление произведений и пользователей (reviews.deletion).
+DELETION = {
+    # Размер пачки DELETE ... WHERE id IN (...).
+    'BATCH_SIZE': 5000,
+    # С какого числа зависимых отзывов и комментариев не удалять в запросе,
+    # а ставить задание для `python manage.py process_deletions`.
+    'BACKGROUND_THRESHOLD': 50000,
+    # Через сколько секунд начатое задание считается брошенным упавшим
+    # процессом и выполняется снова. Должно быть больше времени удаления.
+    'JOB_TIMEOUT': 3600,
+    # Через сколько дней скрытые отзывы и комментарии удаляет
+    # `python manage.py purge_deleted`.
+    'PURGE_AFTER_DAYS': 30,
+}
+
+# Архив старых комментариев (reviews.archive), переносит
+# `python manage.py archive_comments`.
+ARCHIVE = {
+    'AFTER_DAYS': 365,
+    'BATCH_SIZE': 5000,
+}
+
+# Загрузка CSV `python manage.py import_csv --upsert` (reviews.imports).
+IMPORT = {
+    # Строк в пачке: одно чтение сохранённых строк и один executemany.
+    'BATCH_SIZE': 2000,
+}
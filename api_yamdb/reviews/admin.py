@@ -1,8 +1,52 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.forms import UserChangeForm, UserCreationForm
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews import deletion
+from reviews.models import (Category, Comment, DeletionJob, Genre, Review,
+                            Title, User)
+from reviews.paginators import EstimatedCountPaginator
+
+
+class FastDeleteMixin:
+    """
+    Удаление через ``reviews.deletion`` вместо сборщика каскада. Страница
+    подтверждения показывает число зависимых отзывов и комментариев, а не
+    их список.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        opts = self.model._meta
+        model_count = {opts.verbose_name_plural: len(objs)}
+        perms_needed = set()
+        related = deletion.dependents(self.model, [obj.pk for obj in objs])
+        for model, queryset in related.items():
+            count = queryset.count()
+            if not count:
+                continue
+            model_count[model._meta.verbose_name_plural] = count
+            if not request.user.has_perm(
+                f'{model._meta.app_label}.delete_{model._meta.model_name}'
+            ):
+                perms_needed.add(model._meta.verbose_name)
+        deleted_objects = [
+            f'{opts.verbose_name.capitalize()}: {obj}' for obj in objs
+        ]
+        return deleted_objects, model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        if deletion.delete(obj) is not None:
+            self.message_user(
+                request,
+                f'«{obj}»: зависимых записей много, удаление поставлено в '
+                f'очередь и выполнится командой process_deletions.',
+                messages.WARNING
+            )
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
 
 
 class GenreInline(admin.TabularInline):
@@ -10,14 +54,40 @@ class GenreInline(admin.TabularInline):
 
     model = Title.genre.through
     extra = 1
+    autocomplete_fields = ('genre',)
 
 
 @admin.register(Title)
-class TitleAdmin(admin.ModelAdmin):
+class TitleAdmin(FastDeleteMixin, admin.ModelAdmin):
+    """
+    Список произведений строится за постоянное число запросов: категории
+    присоединяются, жанры загружаются одним prefetch, а варианты
+    редактируемого поля ``category`` выбираются один раз на страницу.
+    """
+
     list_display = ('name', 'category', 'display_genre')
     list_editable = ('category',)
+    list_select_related = ('category',)
+    list_per_page = 50
+    search_fields = ('name',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
     inlines = [GenreInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('genre')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs
+        )
+        if db_field.name == 'category' and formfield is not None:
+            # Без кэша каждая строка list_editable заново читает категории.
+            if not hasattr(request, '_category_choices'):
+                request._category_choices = list(formfield.choices)
+            formfield.choices = request._category_choices
+        return formfield
+
     def display_genre(self, obj):
         return ", ".join([genre.name for genre in obj.genre.all()])
     display_genre.short_description = 'Genres'
@@ -32,7 +102,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(FastDeleteMixin, BaseUserAdmin):
     """Формы для изменения и добавления пользователя."""
 
     form = UserChangeForm
@@ -41,6 +111,8 @@ class UserAdmin(BaseUserAdmin):
     list_display = ('email', 'username', 'first_name',
                     'last_name', 'is_active', 'is_staff', 'role')
     list_editable = ('role', 'is_active', 'is_staff')
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
 
     # Настройка доп. полей в форме изменения пользователя
     fieldsets = BaseUserAdmin.fieldsets + (
@@ -53,6 +125,69 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
-admin.site.register(Genre)
-admin.site.register(Review)
-admin.site.register(Comment)
+@admin.register(Genre)
+class GenreAdmin(admin.ModelAdmin):
+    """Настройка админки для модели Genre."""
+
+    list_display = ('name', 'slug')
+    search_fields = ('name', 'slug')
+
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    """
+    Отзывы: произведение и автор выбираются через автодополнение, а не
+    списком всех записей; число строк списка берётся из статистики БД.
+    """
+
+    list_display = ('id', 'title', 'author', 'score', 'pub_date',
+                    'comments_count', 'deleted_at')
+    list_filter = (('deleted_at', admin.EmptyFieldListFilter),)
+    list_select_related = ('title', 'author')
+    list_per_page = 50
+    autocomplete_fields = ('title', 'author')
+    readonly_fields = ('comments_count', 'deleted_at')
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_queryset(self, request):
+        # Скрытые модераторами отзывы тоже видны в админке.
+        return Review.all_objects.all()
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    """
+    Комментарии: отзыв указывается по id (поиска по тексту отзывов нет),
+    автор — через автодополнение.
+    """
+
+    list_display = ('id', 'review', 'author', 'pub_date', 'deleted_at')
+    list_filter = (('deleted_at', admin.EmptyFieldListFilter),)
+    list_select_related = ('review', 'author')
+    list_per_page = 50
+    autocomplete_fields = ('author',)
+    raw_id_fields = ('review',)
+    readonly_fields = ('deleted_at',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_queryset(self, request):
+        return Comment.all_objects.all()
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    """
+    Очередь удалений с большим каскадом: видно, какие задания ждут,
+    выполняются или завершились ошибкой.
+    """
+
+    list_display = ('kind', 'object_id', 'requested_at', 'started_at',
+                    'attempts', 'error')
+    list_filter = ('kind',)
+    readonly_fields = ('kind', 'object_id', 'requested_at', 'started_at',
+                       'attempts', 'error', 'affected')
+
+    def has_add_permission(self, request):
+        return False
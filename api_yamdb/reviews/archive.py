@@ -0,0 +1,123 @@
+"""
+Архив старых комментариев.
+
+Команда ``archive_comments`` пачками переносит видимые комментарии старше
+``ARCHIVE['AFTER_DAYS']`` дней из ``Comment`` в ``ArchivedComment`` (те же
+id, без индексов горячей таблицы). ``Review.comments_count`` по-прежнему
+считает все комментарии, а ``Review.archived_comments_count`` — сколько из
+них в архиве: по нему чтение решает, обращаться ли к архиву вообще.
+Списки комментариев отзыва с архивом склеиваются ``ChainedRows``: сначала
+архивные (они старше), затем горячие. Архив только для чтения: перед
+изменением или скрытием комментарий возвращается в ``Comment``
+(``unarchive_comment``), дальше с ним работают как с обычным.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from reviews.counters import actual_archived_count
+from reviews.models import ArchivedComment, Comment, Review
+
+DEFAULTS = {
+    'AFTER_DAYS': 365,
+    'BATCH_SIZE': 5000,
+}
+ARCHIVE_FIELDS = ('id', 'review_id', 'text', 'author_id', 'pub_date')
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'ARCHIVE', {})}
+
+
+def archive_comments(before, batch_size=None):
+    """
+    Переносит в архив видимые комментарии, опубликованные раньше
+    ``before``. Каждая пачка — одна транзакция: вставка в архив, пересчёт
+    ``archived_comments_count`` затронутых отзывов и удаление из ``Comment``
+    без сигналов (``comments_count`` не меняется). Возвращает число
+    перенесённых комментариев.
+    """
+    batch_size = batch_size or get_config()['BATCH_SIZE']
+    candidates = Comment.objects.filter(
+        pub_date__lt=before
+    ).order_by('id').values_list('id', flat=True)
+    moved = 0
+    while True:
+        batch = list(candidates[:batch_size])
+        if not batch:
+            return moved
+        with transaction.atomic():
+            # Повторное чтение с фильтром видимости: строку могли скрыть.
+            rows = list(
+                Comment.objects.filter(pk__in=batch).values(*ARCHIVE_FIELDS)
+            )
+            ArchivedComment.objects.bulk_create(
+                [ArchivedComment(**row) for row in rows]
+            )
+            Review.all_objects.filter(
+                pk__in={row['review_id'] for row in rows}
+            ).update(archived_comments_count=actual_archived_count())
+            moved_comments = Comment.all_objects.filter(
+                pk__in=[row['id'] for row in rows]
+            )
+            moved_comments._raw_delete(moved_comments.db)
+        moved += len(rows)
+
+
+def unarchive_comment(pk):
+    """
+    Возвращает комментарий из архива в ``Comment`` с тем же id, без
+    сигналов (``comments_count`` не меняется). Если строку уже вернул
+    параллельный запрос, ничего не делает. Возвращает, была ли перенесена
+    строка.
+    """
+    with transaction.atomic():
+        row = ArchivedComment.objects.filter(pk=pk).values(
+            *ARCHIVE_FIELDS
+        ).first()
+        # Удаление первым: параллельный запрос дождётся блокировки строки
+        # и ничего не удалит.
+        if row is None or not ArchivedComment.objects.filter(
+            pk=pk
+        )._raw_delete(ArchivedComment.objects.db):
+            return False
+        Comment.all_objects.bulk_create([Comment(**row)])
+        # pub_date с auto_now_add при создании получает текущее время.
+        Comment.all_objects.filter(pk=pk).update(pub_date=row['pub_date'])
+        Review.all_objects.filter(pk=row['review_id']).update(
+            archived_comments_count=actual_archived_count()
+        )
+    return True
+
+
+class ChainedRows:
+    """
+    Две упорядоченные выборки как одна последовательность для пагинатора.
+    Длины передаются заранее (из денормализованных счётчиков), поэтому
+    COUNT не выполняется, а срез читает только затронутые выборки.
+    """
+
+    def __init__(self, first, first_count, second, second_count):
+        self.first = first
+        self.first_count = max(first_count, 0)
+        self.second = second
+        self.second_count = max(second_count, 0)
+
+    def count(self):
+        return self.first_count + self.second_count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = self.count() if index.stop is None else index.stop
+        rows = []
+        if start < self.first_count:
+            rows.extend(self.first[start:min(stop, self.first_count)])
+        if stop > self.first_count:
+            rows.extend(self.second[
+                max(start - self.first_count, 0):stop - self.first_count
+            ])
+        return rows
@@ -3,8 +3,13 @@ CONFIRMATION_CODE_MAX_LEN = 100
 EMAIL_MAX_LEN = 254
 FIRST_LETTERS_AMOUNT = 20
 GENRE_NAME_MAX_LEN = 256
+LEADERBOARD_KIND_MAX_LEN = 10
 MAX_SCORE = 10
 MIN_SCORE = 1
+# Колонки произведения со счётчиками отзывов по каждой оценке.
+SCORE_COUNT_FIELDS = {
+    score: f'score_{score}_count' for score in range(MIN_SCORE, MAX_SCORE + 1)
+}
 ROLE_MAX_LEN = 10
 TEXT_PREVIEW_LEN = 20
 TITLE_NAME_MAX_LEN = 256
@@ -17,3 +22,20 @@ ROLE_CHOICES = (
     (MODERATOR, 'Moderator'),
     (ADMIN, 'Admin'),
 )
+LEADERBOARD_ALL = 'all'
+LEADERBOARD_CATEGORY = 'category'
+LEADERBOARD_GENRE = 'genre'
+LEADERBOARD_TRENDING = 'trending'
+LEADERBOARD_KIND_CHOICES = (
+    (LEADERBOARD_ALL, 'Лучшие'),
+    (LEADERBOARD_CATEGORY, 'Лучшие в категории'),
+    (LEADERBOARD_GENRE, 'Лучшие в жанре'),
+    (LEADERBOARD_TRENDING, 'Набирающие популярность'),
+)
+DELETION_TITLE = 'title'
+DELETION_USER = 'user'
+DELETION_KIND_MAX_LEN = 10
+DELETION_KIND_CHOICES = (
+    (DELETION_TITLE, 'Произведение'),
+    (DELETION_USER, 'Пользователь'),
+)
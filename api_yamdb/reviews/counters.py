@@ -0,0 +1,154 @@
+"""
+Денормализованные счётчики комментариев и активности пользователей.
+
+``Review.comments_count`` и ``UserStats`` поддерживают сигналы отзывов и
+комментариев: создание и удаление, в том числе каскадное при удалении
+автора, меняют их одним UPDATE с F-выражениями. Комментарии в архиве
+(``reviews.archive``) учитываются наравне с остальными. В ``UserStats``
+не учитываются комментарии к скрытым отзывам: их не видно, как и сам
+отзыв; скрытие и восстановление отзыва пересчитывают активность
+комментаторов (``reviews.moderation``). Функции
+``repair_*`` сверяют счётчики с таблицами отзывов и комментариев — после
+загрузки данных в обход ORM или сбоя.
+"""
+from django.db.models import (Case, Count, DateTimeField, Exists, F,
+                              IntegerField, OuterRef, Q, Subquery, Sum,
+                              Value, When)
+from django.db.models.functions import Coalesce
+
+from reviews.models import ArchivedComment, Comment, Review, User, UserStats
+
+BATCH_SIZE = 10000
+
+
+def change_comments_count(review_id, delta):
+    Review.all_objects.filter(pk=review_id).update(
+        comments_count=F('comments_count') + delta
+    )
+
+
+def _count_by_review(queryset):
+    return Coalesce(
+        Subquery(
+            queryset.filter(review_id=OuterRef('pk')).order_by()
+            .values('review_id').annotate(total=Count('id')).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def actual_archived_count():
+    """Число комментариев отзыва в архиве."""
+    return _count_by_review(ArchivedComment.objects)
+
+
+def actual_comments_count():
+    """Число комментариев отзыва по таблице комментариев и архиву."""
+    return _count_by_review(Comment.objects) + actual_archived_count()
+
+
+def repair_comments_count(review_ids=None):
+    """Исправляет разошедшиеся счётчики. Возвращает число исправленных."""
+    reviews = Review.objects.all()
+    if review_ids is not None:
+        reviews = reviews.filter(pk__in=review_ids)
+    return reviews.filter(
+        ~Q(comments_count=actual_comments_count())
+        | ~Q(archived_comments_count=actual_archived_count())
+    ).update(
+        comments_count=actual_comments_count(),
+        archived_comments_count=actual_archived_count()
+    )
+
+
+def change_user_stats(user_id, activity=None, **deltas):
+    """
+    Прибавляет ``deltas`` к счётчикам ``UserStats`` и сдвигает
+    ``last_activity`` на ``activity``, если оно позже. Строка создаётся при
+    первой активности пользователя; при удалениях — никогда, чтобы не
+    воскресить строку удаляемого пользователя.
+    """
+    changes = {
+        name: F(name) + delta for name, delta in deltas.items() if delta
+    }
+    if activity is not None:
+        changes['last_activity'] = Case(
+            When(last_activity__gte=activity, then=F('last_activity')),
+            default=Value(activity),
+            output_field=DateTimeField()
+        )
+    if not changes:
+        return
+    stats = UserStats.objects.filter(pk=user_id)
+    if stats.update(**changes) or activity is None:
+        return
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user_id)], ignore_conflicts=True
+    )
+    stats.update(**changes)
+
+
+def _aggregate(queryset, expression):
+    return Coalesce(
+        Subquery(
+            queryset.filter(author_id=OuterRef('pk')).order_by()
+            .values('author_id').annotate(total=expression).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def _latest(queryset):
+    return Subquery(
+        queryset.filter(author_id=OuterRef('pk')).order_by('-pub_date')
+        .values('pub_date')[:1]
+    )
+
+
+def visible_comments():
+    """
+    Комментарии (обычные и архивные), которые учитываются в ``UserStats``:
+    только к видимым отзывам.
+    """
+    return (
+        Comment.objects.filter(review__deleted_at__isnull=True),
+        ArchivedComment.objects.filter(review__deleted_at__isnull=True),
+    )
+
+
+def repair_user_stats(user_ids=None):
+    """
+    Пересчитывает ``UserStats`` по отзывам и комментариям, создавая
+    недостающие строки. Возвращает число пересчитанных строк.
+    """
+    comments, archived = visible_comments()
+    users = User.objects.filter(stats__isnull=True).filter(
+        Exists(Review.objects.filter(author_id=OuterRef('pk')))
+        | Exists(Comment.objects.filter(author_id=OuterRef('pk')))
+        | Exists(ArchivedComment.objects.filter(author_id=OuterRef('pk')))
+    )
+    stats = UserStats.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+        stats = stats.filter(pk__in=user_ids)
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk) for pk in users.values_list('pk', flat=True)),
+        batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+    updated = stats.update(
+        reviews_count=_aggregate(Review.objects, Count('id')),
+        score_sum=_aggregate(Review.objects, Sum('score')),
+        comments_count=(
+            _aggregate(comments, Count('id'))
+            + _aggregate(archived, Count('id'))
+        ),
+        last_activity=_latest(Review.objects),
+    )
+    for queryset in (comments, archived):
+        last_comment = _latest(queryset)
+        stats.filter(
+            Q(last_activity__isnull=True) | Q(last_activity__lt=last_comment)
+        ).update(last_activity=last_comment)
+    return updated
@@ -0,0 +1,309 @@
+"""
+Быстрое удаление произведений и пользователей с большим числом отзывов.
+
+Обычный ``delete()`` собирает все зависимые отзывы и комментарии в память
+и рассылает сигналы по каждой строке. Здесь зависимые строки удаляются
+пачками по ``DELETION['BATCH_SIZE']`` запросами ``DELETE ... WHERE id IN``
+без сигналов, а денормализованные данные (рейтинги произведений, счётчики
+комментариев, ``UserStats``, места в рейтингах) пересчитываются один раз
+в конце. Если зависимых строк не меньше
+``DELETION['BACKGROUND_THRESHOLD']``, запрос только записывает задание
+``DeletionJob``, а удаляет команда ``process_deletions``: задание
+переживает перезапуск процесса и не выполняется двумя процессами сразу.
+
+Скрытые модераторами отзывы и комментарии (``reviews.moderation``) так же
+пачками удаляет ``purge_hidden`` — из команды ``purge_deleted``, а не из
+запросов к API.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from reviews.constants import DELETION_TITLE, DELETION_USER
+from reviews.counters import (BATCH_SIZE, repair_comments_count,
+                              repair_user_stats)
+from reviews.leaderboards import drop_titles, mark_pending
+from reviews.models import (ArchivedComment, Comment, DeletionJob, Review,
+                            Title, User)
+from reviews.ratings import recalculate_ratings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 5000,
+    'BACKGROUND_THRESHOLD': 50000,
+    'JOB_TIMEOUT': 3600,
+    'PURGE_AFTER_DAYS': 30,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'DELETION', {})}
+
+
+def delete_in_batches(queryset, batch_size=None):
+    """
+    Удаляет строки ``queryset`` пачками без сборщика каскада и сигналов.
+    Каждая пачка — отдельная транзакция. Возвращает число удалённых строк.
+    """
+    batch_size = batch_size or get_config()['BATCH_SIZE']
+    model = queryset.model
+    ids = queryset.order_by().values_list('pk', flat=True)
+    deleted = 0
+    while True:
+        batch = list(ids[:batch_size])
+        if not batch:
+            return deleted
+        with transaction.atomic(using=queryset.db):
+            deleted += model._base_manager.filter(pk__in=batch)._raw_delete(
+                queryset.db
+            )
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), BATCH_SIZE):
+        yield values[start:start + BATCH_SIZE]
+
+
+def _ids(queryset, field):
+    return set(queryset.order_by().values_list(field, flat=True).distinct())
+
+
+def _title_cascade(pk):
+    """
+    Зависимые строки произведения в порядке удаления и затронутые id:
+    активность авторов отзывов и комментариев.
+    """
+    archived = ArchivedComment.objects.filter(review__title_id=pk)
+    comments = Comment.all_objects.filter(review__title_id=pk)
+    reviews = Review.all_objects.filter(title_id=pk)
+    affected = {
+        'users': (
+            _ids(reviews, 'author_id') | _ids(comments, 'author_id')
+            | _ids(archived, 'author_id')
+        ),
+    }
+    return (archived, comments, reviews), affected
+
+
+def _user_cascade(pk):
+    """
+    Отзывы и комментарии пользователя и комментарии других пользователей
+    к его отзывам; затронутые id: рейтинги произведений, счётчики
+    комментариев отзывов и активность комментаторов.
+    """
+    reviews = Review.all_objects.filter(author_id=pk)
+    affected = {
+        'titles': _ids(reviews, 'title_id'), 'reviews': set(), 'users': set()
+    }
+    querysets = []
+    for model in (ArchivedComment, Comment):
+        own_comments = model._base_manager.filter(author_id=pk)
+        replies = model._base_manager.filter(review__author_id=pk)
+        affected['reviews'] |= _ids(own_comments, 'review_id')
+        affected['users'] |= _ids(replies, 'author_id') - {pk}
+        querysets += [replies, own_comments]
+    return (*querysets, reviews), affected
+
+
+CASCADES = {
+    DELETION_TITLE: (Title, _title_cascade),
+    DELETION_USER: (User, _user_cascade),
+}
+
+
+def _merge(affected, found):
+    return {
+        key: sorted(set(affected.get(key, ())) | set(found.get(key, ())))
+        for key in {*affected, *found}
+    }
+
+
+def repair_affected(affected):
+    """Пересчитывает денормализованные данные затронутых id."""
+    for chunk in _chunks(affected.get('titles', ())):
+        recalculate_ratings(chunk)
+        mark_pending(chunk)
+    for chunk in _chunks(affected.get('reviews', ())):
+        repair_comments_count(chunk)
+    for chunk in _chunks(affected.get('users', ())):
+        repair_user_stats(chunk)
+
+
+def _delete(kind, pk, querysets):
+    model = CASCADES[kind][0]
+    for queryset in querysets:
+        delete_in_batches(queryset)
+    if model is Title:
+        drop_titles([pk])
+    # Осталось немного строк (жанры, рейтинги, UserStats): обычное
+    # удаление. Объекта может уже не быть, если прерванное задание
+    # успело его удалить.
+    obj = model._base_manager.filter(pk=pk).first()
+    if obj is not None:
+        obj.delete()
+
+
+def delete_now(kind, pk):
+    """Удаляет объект с зависимыми строками в текущем процессе."""
+    querysets, affected = CASCADES[kind][1](pk)
+    _delete(kind, pk, querysets)
+    repair_affected(affected)
+
+
+def run_job(job):
+    """
+    Выполняет задание. Затронутые id сохраняются в задании до удаления
+    первой пачки: повторная попытка после падения пересчитает и то, что
+    затронула прерванная.
+    """
+    querysets, found = CASCADES[job.kind][1](job.object_id)
+    job.affected = _merge(job.affected, found)
+    job.save(update_fields=['affected'])
+    _delete(job.kind, job.object_id, querysets)
+    repair_affected(job.affected)
+    job.delete()
+
+
+def claim_job(exclude=()):
+    """
+    Забирает следующее задание: не начатое или начатое раньше
+    ``JOB_TIMEOUT`` секунд назад (процесс, видимо, упал). Условный UPDATE
+    не даёт двум процессам взять одно задание. ``None`` — заданий нет.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=get_config()['JOB_TIMEOUT'])
+    candidates = DeletionJob.objects.filter(
+        Q(started_at__isnull=True) | Q(started_at__lt=stale)
+    ).exclude(pk__in=exclude)
+    for pk, started_at in candidates.values_list('pk', 'started_at'):
+        if DeletionJob.objects.filter(
+            pk=pk, started_at=started_at
+        ).update(started_at=now, attempts=F('attempts') + 1):
+            return DeletionJob.objects.get(pk=pk)
+    return None
+
+
+def process_jobs(limit=None):
+    """
+    Выполняет задания на удаление по очереди, каждое не больше одного
+    раза за вызов. Ошибка записывается в задание, и оно остаётся для
+    следующего запуска. Возвращает (выполнено, с ошибкой).
+    """
+    done, failed = [], []
+    while limit is None or len(done) + len(failed) < limit:
+        job = claim_job(exclude=[*done, *failed])
+        if job is None:
+            break
+        try:
+            run_job(job)
+        except Exception as error:
+            logger.exception('Задание на удаление %s не выполнено', job)
+            DeletionJob.objects.filter(pk=job.pk).update(
+                started_at=None, error=f'{type(error).__name__}: {error}'
+            )
+            failed.append(job.pk)
+        else:
+            done.append(job.pk)
+    return len(done), len(failed)
+
+
+def purge_hidden(before):
+    """
+    Удаляет отзывы и комментарии, скрытые раньше ``before``, вместе с
+    комментариями к скрытым отзывам. Агрегаты не меняются: ни скрытые
+    строки, ни комментарии к скрытым отзывам в них уже не учитываются.
+    Возвращает (отзывов, комментариев).
+    """
+    comments = delete_in_batches(
+        Comment.all_objects.filter(deleted_at__lt=before)
+    )
+    reviews = Review.all_objects.filter(deleted_at__lt=before)
+    comments += delete_in_batches(
+        ArchivedComment.objects.filter(review__in=reviews)
+    )
+    comments += delete_in_batches(
+        Comment.all_objects.filter(review__in=reviews)
+    )
+    return delete_in_batches(reviews), comments
+
+
+def dependents(model, pks):
+    """Отзывы и комментарии, которые удаляются вместе с объектами."""
+    if model is Title:
+        return {
+            Review: Review.all_objects.filter(title_id__in=pks),
+            Comment: Comment.all_objects.filter(review__title_id__in=pks),
+            ArchivedComment: ArchivedComment.objects.filter(
+                review__title_id__in=pks
+            ),
+        }
+    return {
+        Review: Review.all_objects.filter(author_id__in=pks),
+        Comment: Comment.all_objects.filter(
+            Q(author_id__in=pks) | Q(review__author_id__in=pks)
+        ),
+        ArchivedComment: ArchivedComment.objects.filter(
+            Q(author_id__in=pks) | Q(review__author_id__in=pks)
+        ),
+    }
+
+
+def dependents_count(obj):
+    """
+    Оценка числа зависимых строк: все отзывы, включая скрытые, и
+    комментарии к ним по ``comments_count`` (он учитывает и архив) плюс
+    скрытые комментарии, которых в счётчике нет. У пользователя к этому
+    добавляются его комментарии к чужим отзывам.
+    """
+    if isinstance(obj, Title):
+        reviews = Review.all_objects.filter(title_id=obj.pk)
+        comments = Comment.all_objects.filter(review__title_id=obj.pk)
+    else:
+        reviews = Review.all_objects.filter(author_id=obj.pk)
+        comments = Comment.all_objects.filter(review__author_id=obj.pk)
+    totals = reviews.aggregate(
+        reviews=Count('id'), comments=Coalesce(Sum('comments_count'), 0)
+    )
+    count = (
+        totals['reviews'] + totals['comments']
+        + comments.filter(deleted_at__isnull=False).count()
+    )
+    if isinstance(obj, User):
+        count += (
+            Comment.all_objects.filter(author_id=obj.pk).count()
+            + ArchivedComment.objects.filter(author_id=obj.pk).count()
+        )
+    return count
+
+
+def delete(obj, background=None):
+    """
+    Удаляет произведение или пользователя. ``background=None`` выбирает
+    режим по ``BACKGROUND_THRESHOLD``: большой каскад ставится заданием
+    ``DeletionJob`` для ``process_deletions``, а пользователь сразу
+    деактивируется. Возвращает задание или ``None``, если удаление уже
+    выполнено. Если задание на объект уже есть, возвращается оно, и
+    второе удаление не начинается.
+    """
+    kind = obj._meta.model_name
+    job = DeletionJob.objects.filter(kind=kind, object_id=obj.pk).first()
+    if job is not None:
+        return job
+    if background is None:
+        background = (
+            dependents_count(obj) >= get_config()['BACKGROUND_THRESHOLD']
+        )
+    if not background:
+        delete_now(kind, obj.pk)
+        return None
+    job, _ = DeletionJob.objects.get_or_create(kind=kind, object_id=obj.pk)
+    if kind == DELETION_USER:
+        User.objects.filter(pk=obj.pk).update(is_active=False)
+    return job
@@ -0,0 +1,345 @@
+"""
+Генератор синтетических данных для нагрузочных тестов.
+
+Распределения повторяют реальные каталоги: популярность произведений,
+жанров и отзывов подчиняется степенному закону (Zipf), оценки смещены к
+высоким значениям. Данные пишутся прямо в базу пачками ``executemany``
+или в CSV-файлы формата ``import_csv``.
+"""
+import csv
+import math
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.db import connection, transaction
+
+from reviews.constants import (ADMIN, MAX_SCORE, MIN_SCORE, MODERATOR,
+                               SCORE_COUNT_FIELDS, USER)
+from reviews.imports import last_id
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+WORDS = (
+    'фильм', 'книга', 'сюжет', 'герой', 'финал', 'автор', 'режиссёр',
+    'отлично', 'скучно', 'рекомендую', 'шедевр', 'провал', 'музыка',
+    'атмосфера', 'смотреть', 'читать', 'снова', 'лучший', 'худший', 'вполне',
+)
+TEXT_POOL_SIZE = 1000
+HISTORY_DAYS = 5 * 365
+MAX_GENRES_PER_TITLE = 5
+ROLE_WEIGHTS = ((USER, 0.97), (MODERATOR, 0.02), (ADMIN, 0.01))
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
+
+# Колонки в порядке, в котором генератор выдаёт строки.
+COLUMNS = {
+    Category: ('id', 'name', 'slug'),
+    Genre: ('id', 'name', 'slug'),
+    User: ('id', 'username', 'email', 'role', 'bio', 'first_name',
+           'last_name', 'password', 'is_superuser', 'is_staff',
+           'is_active', 'date_joined', 'confirmation_code'),
+    Title: ('id', 'name', 'year', 'description', 'category', 'score_sum',
+            'score_count', *SCORE_COUNT_FIELDS.values()),
+    Title.genre.through: ('id', 'title', 'genre'),
+    Review: ('id', 'title', 'text', 'author', 'score', 'pub_date',
+             'comments_count', 'archived_comments_count'),
+    Comment: ('id', 'review', 'text', 'author', 'pub_date'),
+}
+# Файлы и колонки import_csv: (файл, индексы колонок из COLUMNS).
+CSV_LAYOUT = {
+    Category: ('category.csv', ('id', 'name', 'slug'), (0, 1, 2)),
+    Genre: ('genre.csv', ('id', 'name', 'slug'), (0, 1, 2)),
+    User: ('users.csv', ('id', 'username', 'email', 'role', 'bio',
+                         'first_name', 'last_name'), (0, 1, 2, 3, 4, 5, 6)),
+    Title: ('titles.csv', ('id', 'name', 'year', 'category'), (0, 1, 2, 4)),
+    Title.genre.through: ('genre_title.csv', ('id', 'title_id', 'genre_id'),
+                          (0, 1, 2)),
+    Review: ('review.csv', ('id', 'title_id', 'text', 'author', 'score',
+                            'pub_date'), (0, 1, 2, 3, 4, 5)),
+    Comment: ('comments.csv', ('id', 'review_id', 'text', 'author',
+                               'pub_date'), (0, 1, 2, 3, 4)),
+}
+
+
+def zipf_weights(count, exponent):
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def allocate(total, weights, cap):
+    """
+    Раскладывает ``total`` по корзинам пропорционально ``weights``, не
+    больше ``cap`` в корзине. Излишек перераспределяется между остальными.
+    """
+    counts = [0] * len(weights)
+    open_bins = set(range(len(weights)))
+    remaining = total
+    while remaining > 0 and open_bins:
+        weight_sum = sum(weights[i] for i in open_bins)
+        distributed = 0
+        for i in sorted(open_bins):
+            share = min(cap - counts[i],
+                        int(remaining * weights[i] / weight_sum))
+            counts[i] += share
+            distributed += share
+        # Остаток от округления — по одному в самые тяжёлые корзины.
+        for i in sorted(open_bins, key=lambda i: -weights[i]):
+            if distributed >= remaining:
+                break
+            if counts[i] < cap:
+                counts[i] += 1
+                distributed += 1
+        remaining -= distributed
+        open_bins = {i for i in open_bins if counts[i] < cap}
+        if distributed == 0:
+            break
+    return counts
+
+
+def coprime_step(modulus, rnd):
+    """Шаг, взаимно простой с ``modulus``: обход без повторов."""
+    if modulus == 1:
+        return 1
+    step = rnd.randrange(1, modulus)
+    while math.gcd(step, modulus) != 1:
+        step = step % (modulus - 1) + 1
+    return step
+
+
+def next_id(model):
+    return last_id(model) + 1
+
+
+class DataGenerator:
+    """
+    Выдаёт строки таблиц в порядке ``COLUMNS``. Идентификаторы начинаются
+    после существующих, так что генерацию можно запускать поверх данных.
+    """
+
+    def __init__(self, sizes, seed=0, skew=1.1, start_ids=None):
+        self.sizes = sizes
+        self.skew = skew
+        self.rnd = random.Random(seed)
+        self.start = start_ids or {}
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.texts = [
+            ' '.join(self.rnd.choices(WORDS, k=self.rnd.randint(3, 40)))
+            for _ in range(TEXT_POOL_SIZE)
+        ]
+
+    def first_id(self, model):
+        return self.start.get(model, 1)
+
+    def text(self):
+        return self.texts[self.rnd.randrange(TEXT_POOL_SIZE)]
+
+    def date(self):
+        return self.now - timedelta(
+            seconds=self.rnd.randrange(HISTORY_DAYS * 86400)
+        )
+
+    def categories(self):
+        first = self.first_id(Category)
+        for pk in range(first, first + self.sizes['categories']):
+            yield pk, f'Категория {pk}', f'category-{pk}'
+
+    def genres(self):
+        first = self.first_id(Genre)
+        for pk in range(first, first + self.sizes['genres']):
+            yield pk, f'Жанр {pk}', f'genre-{pk}'
+
+    def users(self):
+        first = self.first_id(User)
+        roles, weights = zip(*ROLE_WEIGHTS)
+        for pk in range(first, first + self.sizes['users']):
+            yield (pk, f'user_{pk}', f'user_{pk}@yamdb.fake',
+                   self.rnd.choices(roles, weights)[0], '', '', '',
+                   '!', False, False, True, self.now,
+                   f'{self.rnd.randrange(10 ** 6):06d}')
+
+    def titles(self):
+        first = self.first_id(Title)
+        category_ids = list(range(
+            self.first_id(Category),
+            self.first_id(Category) + self.sizes['categories']
+        ))
+        category_weights = zipf_weights(len(category_ids), self.skew)
+        # Свежие годы встречаются чаще старых.
+        years = list(range(self.now.year, 1900, -1))
+        year_weights = zipf_weights(len(years), 0.5)
+        for pk in range(first, first + self.sizes['titles']):
+            category_id = None
+            if category_ids:
+                category_id = self.rnd.choices(
+                    category_ids, category_weights
+                )[0]
+            yield (pk, f'Произведение {pk}',
+                   self.rnd.choices(years, year_weights)[0], self.text(),
+                   category_id, 0, 0, *[0] * len(SCORE_COUNT_FIELDS))
+
+    def genre_titles(self):
+        genre_ids = list(range(
+            self.first_id(Genre), self.first_id(Genre) + self.sizes['genres']
+        ))
+        if not genre_ids:
+            return
+        genre_weights = zipf_weights(len(genre_ids), self.skew)
+        fanout = range(1, min(MAX_GENRES_PER_TITLE, len(genre_ids)) + 1)
+        fanout_weights = zipf_weights(len(fanout), self.skew + 1)
+        pk = self.first_id(Title.genre.through)
+        first_title = self.first_id(Title)
+        for title_id in range(first_title,
+                              first_title + self.sizes['titles']):
+            chosen = set()
+            wanted = self.rnd.choices(fanout, fanout_weights)[0]
+            while len(chosen) < wanted:
+                chosen.add(self.rnd.choices(genre_ids, genre_weights)[0])
+            for genre_id in sorted(chosen):
+                yield pk, title_id, genre_id
+                pk += 1
+
+    def review_count(self):
+        """
+        Число отзывов, которое выдаст ``reviews()``: у произведения не больше
+        одного отзыва каждого пользователя.
+        """
+        return min(self.sizes['reviews'],
+                   self.sizes['users'] * self.sizes['titles'])
+
+    def reviews(self):
+        users = self.sizes['users']
+        titles = self.sizes['titles']
+        if not users or not titles:
+            return
+        first_user = self.first_id(User)
+        first_title = self.first_id(Title)
+        # Ранги популярности перемешаны, чтобы хиты не шли подряд по id.
+        weights = zipf_weights(titles, self.skew)
+        self.rnd.shuffle(weights)
+        counts = allocate(self.sizes['reviews'], weights, users)
+        pk = self.first_id(Review)
+        for offset, count in enumerate(counts):
+            if not count:
+                continue
+            title_id = first_title + offset
+            # Авторы отзывов на одно произведение различны
+            # (unique_title_author): обход пользователей с
+            # взаимно простым шагом.
+            start = self.rnd.randrange(users)
+            step = coprime_step(users, self.rnd)
+            # Оценки смещены к высоким; степень смещения своя у каждого
+            # произведения.
+            bias = self.rnd.gauss(1.5, 1.0)
+            scores = self.rnd.choices(
+                SCORES, [score ** bias for score in SCORES], k=count
+            )
+            for i in range(count):
+                yield (pk, title_id, self.text(),
+                       first_user + (start + i * step) % users,
+                       scores[i], self.date(), 0, 0)
+                pk += 1
+
+    def comments(self, reviews):
+        """Комментарии к ``reviews`` отзывам, выданным ``reviews()``."""
+        if not reviews or not self.sizes['users']:
+            return
+        first_review = self.first_id(Review)
+        first_user = self.first_id(User)
+        users = self.sizes['users']
+        # Обсуждаемость отзывов тоже степенная: u ** power смещает выбор к
+        # малым индексам, умножение на взаимно простой шаг их рассеивает.
+        power = 1 + self.skew * 2
+        scatter = coprime_step(reviews, self.rnd)
+        first = self.first_id(Comment)
+        for pk in range(first, first + self.sizes['comments']):
+            index = int(reviews * self.rnd.random() ** power)
+            yield (pk, first_review + index * scatter % reviews, self.text(),
+                   first_user + self.rnd.randrange(users), self.date())
+
+    def tables(self):
+        """Пары (модель, строки) в порядке, учитывающем внешние ключи."""
+        return (
+            (Category, self.categories()),
+            (Genre, self.genres()),
+            (User, self.users()),
+            (Title, self.titles()),
+            (Title.genre.through, self.genre_titles()),
+            (Review, self.reviews()),
+            (Comment, self.comments(self.review_count())),
+        )
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class DatabaseWriter:
+    """
+    Пишет строки пачками через ``executemany``, минуя ORM. ``table``
+    заменяет таблицу модели таблицей с теми же колонками (бенчмарки).
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+
+    def write(self, model, rows, table=None):
+        opts = model._meta
+        fields = [opts.get_field(name) for name in COLUMNS[model]]
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        placeholders = ', '.join(['%s'] * len(fields))
+        table = connection.ops.quote_name(table or opts.db_table)
+        sql = (f'INSERT INTO {table} '
+               f'({columns}) VALUES ({placeholders})')
+        datetime_indexes = [
+            index for index, field in enumerate(fields)
+            if field.get_internal_type() == 'DateTimeField'
+        ]
+        adapt = connection.ops.adapt_datetimefield_value
+        written = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            for batch in batched(rows, self.batch_size):
+                if datetime_indexes:
+                    batch = [list(row) for row in batch]
+                    for row in batch:
+                        for index in datetime_indexes:
+                            row[index] = adapt(row[index])
+                cursor.executemany(sql, batch)
+                written += len(batch)
+        return written
+
+
+class CsvWriter:
+    """Пишет строки в CSV-файлы в формате ``static/data`` для import_csv."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def format_value(value):
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%dT%H:%M:%S.') + (
+                f'{value.microsecond // 1000:03d}Z'
+            )
+        return value
+
+    def write(self, model, rows):
+        filename, header, indexes = CSV_LAYOUT[model]
+        written = 0
+        with open(os.path.join(self.directory, filename), 'w',
+                  encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow(
+                    [self.format_value(row[index]) for index in indexes]
+                )
+                written += 1
+        return written
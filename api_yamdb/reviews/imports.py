@@ -0,0 +1,549 @@
+"""
+Идемпотентная загрузка файлов (``import_csv --upsert``).
+
+Файлы и колонки — как в ``static/data`` и выгрузке ``export_csv``; файлы
+читаются потоково читателями ``reviews.readers``. Строки обрабатываются
+пачками: для каждой пачки одним запросом читаются уже сохранённые строки с
+теми же id, и записываются только новые строки и строки, у которых
+изменился хеш содержимого, — через ``INSERT ... ON CONFLICT (id) DO
+UPDATE``. Колонки, которых нет в файле
+(пароль, ``deleted_at``, денормализованные счётчики), задаются только при
+вставке и при обновлении не меняются. Каждый файл загружается в одной
+транзакции. Запись идёт в обход сигналов, поэтому после загрузки
+рейтинги, счётчики и активность пересчитываются для затронутых строк.
+
+Каждая строка перед записью проверяется ``Validation``: типы колонок и
+валидаторы полей модели, внешние ключи по множествам id в памяти (id из
+базы и чистых строк уже проверенных файлов), повторяющиеся id и условия
+уникальности модели (``unique_keys``) по словарям ключей в памяти. Строки
+с ошибками пишутся в файл отказов и не загружаются.
+
+После загрузки ``reset_sequences`` сдвигает счётчики id за загруженные
+строки. ``IdRemap`` позволяет слить несколько наборов данных с
+пересекающимися id: новые id выдаются после существующих, а внешние ключи
+переводятся по таблицам соответствия в памяти.
+"""
+import hashlib
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Max, UniqueConstraint
+from django.db.models.fields import AutoFieldMixin
+
+from reviews.counters import repair_comments_count, repair_user_stats
+from reviews.leaderboards import mark_pending
+from reviews.models import (ArchivedComment, Category, Comment, Genre,
+                            Review, Title, User)
+from reviews.ratings import recalculate_ratings
+from reviews.service import generate_confirmation_code
+
+DEFAULTS = {
+    'BATCH_SIZE': 2000,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'IMPORT', {})}
+
+
+class Source:
+    """
+    Файл загрузки: модель, имя файла, колонки файла и соответствующие им
+    поля модели. ``affects`` — поля, значения которых (до и после записи)
+    собираются для пересчёта денормализованных данных. Строки с id из
+    ``archive`` записываются в архивную модель. ``insert_defaults`` —
+    {поле: функция} для значений при вставке вместо ``get_default``.
+    """
+
+    def __init__(self, kind, model, filename, header, fields, affects=(),
+                 archive=None, insert_defaults=None):
+        self.kind = kind
+        self.model = model
+        self.filename = filename
+        self.header = header
+        self.fields = [model._meta.get_field(name) for name in fields]
+        self.affects = [model._meta.get_field(name) for name in affects]
+        self.archive = archive
+        self.insert_defaults = insert_defaults or {}
+
+
+SOURCES = (
+    Source('users', User, 'users.csv',
+           ('id', 'username', 'email', 'role', 'bio', 'first_name',
+            'last_name'),
+           ('id', 'username', 'email', 'role', 'bio', 'first_name',
+            'last_name'),
+           insert_defaults={
+               'confirmation_code': generate_confirmation_code
+           }),
+    Source('categories', Category, 'category.csv', ('id', 'name', 'slug'),
+           ('id', 'name', 'slug')),
+    Source('genres', Genre, 'genre.csv', ('id', 'name', 'slug'),
+           ('id', 'name', 'slug')),
+    Source('titles', Title, 'titles.csv', ('id', 'name', 'year', 'category'),
+           ('id', 'name', 'year', 'category'), affects=('id',)),
+    Source('genre_titles', Title.genre.through, 'genre_title.csv',
+           ('id', 'title_id', 'genre_id'), ('id', 'title', 'genre'),
+           affects=('title',)),
+    Source('reviews', Review, 'review.csv',
+           ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+           ('id', 'title', 'text', 'author', 'score', 'pub_date'),
+           affects=('title', 'author')),
+    Source('comments', Comment, 'comments.csv',
+           ('id', 'review_id', 'text', 'author', 'pub_date'),
+           ('id', 'review', 'text', 'author', 'pub_date'),
+           affects=('review', 'author'), archive=ArchivedComment),
+)
+
+
+def to_python(field, value):
+    if value == '' and field.null:
+        return None
+    return field.to_python(value)
+
+
+# Модели с общим пространством id: архив хранит id комментариев.
+ID_SPACES = {Comment: (Comment, ArchivedComment)}
+
+
+def last_id(model):
+    """Наибольший занятый id модели, включая скрытые и архивные строки."""
+    return max(
+        related._base_manager.aggregate(last=Max('pk'))['last'] or 0
+        for related in ID_SPACES.get(model, (model,))
+    )
+
+
+def reset_sequences(models):
+    """
+    Сдвигает счётчики автоинкремента за наибольший занятый id после
+    вставки строк с явными id: последовательности PostgreSQL и
+    ``sqlite_sequence`` в SQLite. Модели без автоинкремента пропускаются.
+    """
+    with connection.cursor() as cursor:
+        for model in models:
+            if not isinstance(model._meta.pk, AutoFieldMixin):
+                continue
+            table, last = model._meta.db_table, last_id(model)
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT setval(pg_get_serial_sequence(%s, %s), %s, %s)',
+                    [table, model._meta.pk.column, max(last, 1), last > 0]
+                )
+            elif connection.vendor == 'sqlite':
+                cursor.execute(
+                    'UPDATE sqlite_sequence SET seq = MAX(seq, %s) '
+                    'WHERE name = %s', [last, table]
+                )
+                cursor.execute(
+                    'INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s '
+                    'WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence '
+                    'WHERE name = %s)', [table, last, table]
+                )
+
+
+class IdRemap:
+    """
+    Таблицы соответствия {модель: {id в файле: новый id}} для слияния
+    наборов данных. Новые id выдаются подряд после ``last_id``. Внешние
+    ключи ссылаются только на строки того же набора.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.next_ids = {}
+
+    def table(self, model):
+        return self.tables.setdefault(model, {})
+
+    def allocate(self, model, old_id):
+        table = self.table(model)
+        if old_id not in table:
+            if model not in self.next_ids:
+                self.next_ids[model] = last_id(model) + 1
+            table[old_id] = self.next_ids[model]
+            self.next_ids[model] += 1
+        return table[old_id]
+
+    def translate(self, source, row):
+        """Строка файла с переведёнными id и внешними ключами."""
+        row = dict(row)
+        for field, column in zip(source.fields, source.header):
+            model = source.model if field.primary_key else (
+                field.related_model if field.is_relation else None
+            )
+            if model is not None and row[column]:
+                row[column] = str(
+                    self.table(model)[to_python(field, row[column])]
+                )
+        return row
+
+
+def unique_keys(source):
+    """
+    Условия уникальности модели ``source``, кроме id, все поля которых есть
+    в файле: список (имена полей, условие ``Q`` или ``None``).
+    """
+    opts = source.model._meta
+    names = {field.name for field in source.fields}
+    keys = [((field.name,), None) for field in source.fields
+            if field.unique and not field.primary_key]
+    keys += [(tuple(fields), None) for fields in opts.unique_together]
+    keys += [
+        (tuple(constraint.fields), constraint.condition)
+        for constraint in opts.constraints
+        if isinstance(constraint, UniqueConstraint)
+    ]
+    return [(fields, condition) for fields, condition in keys
+            if set(fields) <= names]
+
+
+def clean(field, value):
+    """
+    Значение колонки, проверенное как в ``field.clean``, но без запроса к
+    базе для внешних ключей: их проверяет ``Validation``.
+    """
+    value = to_python(field, value)
+    if not field.is_relation:
+        field.validate(value, None)
+    elif value is None and not field.null:
+        raise ValidationError(field.error_messages['null'])
+    field.run_validators(value)
+    return value
+
+
+class Validation:
+    """
+    Проверка строк ``Source`` без загрузки. ``known_ids`` — общий для
+    файлов одной загрузки словарь {модель: множество id}: недостающие
+    модели читаются из базы один раз, чистые строки проверенного файла
+    добавляются в него. С ``remap`` внешние ключи сверяются с таблицами
+    соответствия, а чистым строкам выдаются новые id. ``rejected`` — число
+    отклонённых строк, ``errors`` — число ошибок по колонкам.
+
+    Ключи ``unique_keys`` сверяются со словарями {ключ: id}: строки базы
+    плюс принятые строки файла. Ключ, занятый строкой с другим id, —
+    отказ; обновление строки освобождает её прежний ключ. Для условного
+    ограничения (``unique_title_author`` — только видимые отзывы) строки
+    базы вне условия не проверяются и ключей не занимают.
+    """
+
+    def __init__(self, source, known_ids, remap=None):
+        self.source = source
+        self.known_ids = known_ids
+        self.remap = remap
+        self.rows = 0
+        self.rejected = 0
+        self.errors = Counter()
+        self.keys = None
+
+    def ids(self, model):
+        if self.remap is not None:
+            return self.remap.table(model)
+        if model not in self.known_ids:
+            self.known_ids[model] = set(
+                model._base_manager.values_list('pk', flat=True)
+            )
+        return self.known_ids[model]
+
+    def load_keys(self):
+        """
+        Для каждого ключа: (имена полей, {ключ: id}, {id: ключ}, id строк
+        базы вне условия ограничения).
+        """
+        model = self.source.model
+        self.keys = []
+        for names, condition in unique_keys(self.source):
+            rows = model._base_manager.all()
+            exempt = set()
+            if condition is not None:
+                exempt = set(
+                    rows.exclude(condition).values_list('pk', flat=True)
+                )
+                rows = rows.filter(condition)
+            attnames = [model._meta.get_field(name).attname for name in names]
+            owners = {
+                tuple(values): pk
+                for pk, *values in rows.values_list('pk', *attnames)
+            }
+            self.keys.append((names, owners, {
+                pk: key for key, pk in owners.items()
+            }, exempt))
+
+    def key(self, names, values):
+        """Ключ строки в id базы или ``None``, если в нём есть NULL."""
+        key = []
+        for name in names:
+            field = self.source.model._meta.get_field(name)
+            value = values.get(name)
+            if value is not None and field.is_relation and self.remap:
+                value = self.remap.table(field.related_model).get(value)
+            if value is None:
+                return None
+            key.append(value)
+        return tuple(key)
+
+    def check_unique(self, values, target):
+        """
+        Ошибки уникальности строки, которая будет записана с id ``target``
+        (``None`` — новая строка с ещё не выданным id).
+        """
+        if self.keys is None:
+            self.load_keys()
+        columns = {
+            field.name: column
+            for field, column in zip(self.source.fields, self.source.header)
+        }
+        errors = []
+        for names, owners, _, exempt in self.keys:
+            if target in exempt:
+                continue
+            owner = owners.get(self.key(names, values))
+            if owner is not None and owner != target:
+                errors.append((
+                    ', '.join(columns[name] for name in names),
+                    'значение уже занято другой строкой'
+                ))
+        return errors
+
+    def claim(self, values, target):
+        """Записывает ключи принятой строки, освобождая её прежние."""
+        for names, owners, owned, exempt in self.keys:
+            key = self.key(names, values)
+            if target in exempt or key is None:
+                continue
+            owners.pop(owned.pop(target, None), None)
+            owners[key] = owned[target] = target
+
+    def check_row(self, row, references):
+        """Ошибки строки: список (колонка, сообщение), и её значения."""
+        source = self.source
+        errors, values = [], {}
+        for field, column in zip(source.fields, source.header):
+            raw = row.get(column)
+            try:
+                if raw is None:
+                    raise ValidationError('нет значения')
+                values[field.name] = clean(field, raw)
+            except ValidationError as error:
+                errors.append((column, '; '.join(error.messages)))
+        for column, (name, ids) in references.items():
+            value = values.get(name)
+            if value is not None and value not in ids:
+                errors.append((column, f'нет объекта с id {value}'))
+        return errors, values
+
+    def filter(self, rows, rejects=None):
+        """
+        Проверяет строки по одной и отдаёт чистые (при ``remap`` — с новыми
+        id), поэтому проверка и загрузка читают файл один раз. Отклонённые
+        строки с колонкой ``errors`` пишутся в ``rejects`` — объект с
+        методом ``writerow`` (``csv.writer``).
+        """
+        source = self.source
+        references = {
+            column: (field.name, self.ids(field.related_model))
+            for field, column in zip(source.fields, source.header)
+            if field.is_relation
+        }
+        seen = set()
+        for number, row in enumerate(rows, 1):
+            self.rows = number
+            errors, values = self.check_row(row, references)
+            pk = values.get(source.fields[0].name)
+            if pk is not None and pk in seen:
+                errors.append((source.header[0], 'повторяющийся id'))
+            seen.add(pk)
+            if not errors:
+                errors = self.check_unique(
+                    values, None if self.remap is not None else pk
+                )
+            if not errors:
+                if self.remap is not None:
+                    target = self.remap.allocate(source.model, pk)
+                    row = self.remap.translate(source, row)
+                else:
+                    target = pk
+                    self.ids(source.model).add(pk)
+                self.claim(values, target)
+                yield row
+                continue
+            self.rejected += 1
+            self.errors.update(column for column, _ in errors)
+            if rejects is not None:
+                rejects.writerow(
+                    [row.get(column) for column in source.header]
+                    + ['; '.join(f'{column}: {message}'
+                                 for column, message in errors)]
+                )
+
+    def run(self, rows, rejects=None):
+        """Только проверка: проходит ``filter`` до конца."""
+        for _ in self.filter(rows, rejects):
+            pass
+        return self
+
+
+def content_hash(values):
+    """Хеш значений строки, не зависящий от часового пояса дат."""
+    normalized = [
+        value.astimezone(timezone.utc).isoformat()
+        if isinstance(value, datetime) else value
+        for value in values
+    ]
+    return hashlib.blake2b(
+        repr(normalized).encode(), digest_size=16
+    ).digest()
+
+
+def upsert_sql(model, fields, insert_only):
+    quote = connection.ops.quote_name
+    columns = [field.column for field in (*fields, *insert_only)]
+    pk = model._meta.pk.column
+    updates = ', '.join(
+        f'{quote(field.column)} = excluded.{quote(field.column)}'
+        for field in fields if field.column != pk
+    )
+    return (
+        f'INSERT INTO {quote(model._meta.db_table)} '
+        f'({", ".join(quote(column) for column in columns)}) '
+        f'VALUES ({", ".join(["%s"] * len(columns))}) '
+        f'ON CONFLICT ({quote(pk)}) DO UPDATE SET {updates}'
+    )
+
+
+class Upsert:
+    """
+    Загрузка строк одного ``Source``. ``counts`` — числа вставленных,
+    обновлённых и неизменных строк, ``affected`` — {поле: множество
+    значений} затронутых строк для пересчёта.
+    """
+
+    def __init__(self, source, batch_size=None):
+        self.source = source
+        self.batch_size = batch_size or get_config()['BATCH_SIZE']
+        self.counts = Counter(inserted=0, updated=0, unchanged=0)
+        self.affected = {field.name: set() for field in source.affects}
+
+    def model_sql(self, model):
+        fields = [model._meta.get_field(field.name)
+                  for field in self.source.fields]
+        attnames = {field.attname for field in fields}
+        insert_only = [field for field in model._meta.concrete_fields
+                       if field.attname not in attnames]
+        return fields, insert_only, upsert_sql(model, fields, insert_only)
+
+    def run(self, rows):
+        models = [self.source.model]
+        if self.source.archive:
+            models.append(self.source.archive)
+        self.sql = {model: self.model_sql(model) for model in models}
+        with transaction.atomic():
+            batch = []
+            for row in rows:
+                batch.append(tuple(
+                    to_python(field, row[column]) for field, column in zip(
+                        self.source.fields, self.source.header
+                    )
+                ))
+                if len(batch) >= self.batch_size:
+                    self.write(batch)
+                    batch = []
+            if batch:
+                self.write(batch)
+        return self.counts
+
+    def write(self, batch):
+        ids = [row[0] for row in batch]
+        routed = {self.source.model: batch}
+        if self.source.archive:
+            archived = set(self.source.archive.objects.filter(
+                pk__in=ids
+            ).values_list('pk', flat=True))
+            routed = {
+                self.source.model: [
+                    row for row in batch if row[0] not in archived
+                ],
+                self.source.archive: [
+                    row for row in batch if row[0] in archived
+                ],
+            }
+        for model, rows in routed.items():
+            if rows:
+                self.write_model(model, rows)
+
+    def write_model(self, model, rows):
+        fields, insert_only, sql = self.sql[model]
+        attnames = [field.attname for field in fields]
+        saved = {
+            values[0]: values
+            for values in model._base_manager.filter(
+                pk__in=[row[0] for row in rows]
+            ).values_list(*attnames)
+        }
+        changed = []
+        for row in rows:
+            old = saved.get(row[0])
+            if old is None:
+                self.counts['inserted'] += 1
+            elif content_hash(old) == content_hash(row):
+                self.counts['unchanged'] += 1
+                continue
+            else:
+                self.counts['updated'] += 1
+            changed.append(row)
+            for field in self.source.affects:
+                index = attnames.index(field.attname)
+                self.affected[field.name].add(row[index])
+                if old is not None:
+                    self.affected[field.name].add(old[index])
+        if not changed:
+            return
+        defaults = [
+            (field, self.source.insert_defaults.get(
+                field.name, field.get_default
+            ))
+            for field in insert_only
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [
+                [
+                    field.get_db_prep_save(value, connection)
+                    for field, value in zip(fields, row)
+                ] + [
+                    field.get_db_prep_save(default(), connection)
+                    for field, default in defaults
+                ]
+                for row in changed
+            ])
+
+
+def refresh_denormalized(affected):
+    """
+    Пересчитывает рейтинги, счётчики комментариев и активность по
+    ``affected`` — {вид файла: {поле: значения}} загрузок ``Upsert``.
+    """
+    def collect(field_name, *kinds):
+        values = set()
+        for kind in kinds:
+            values |= affected.get(kind, {}).get(field_name, set())
+        values.discard(None)
+        return values
+
+    title_ids = collect('id', 'titles') | collect(
+        'title', 'genre_titles', 'reviews'
+    )
+    rated = collect('title', 'reviews')
+    if rated:
+        recalculate_ratings(rated)
+    review_ids = collect('review', 'comments')
+    if review_ids:
+        repair_comments_count(review_ids)
+    user_ids = collect('author', 'reviews', 'comments')
+    if user_ids:
+        repair_user_stats(user_ids)
+    if title_ids:
+        mark_pending(title_ids)
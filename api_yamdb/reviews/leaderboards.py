@@ -0,0 +1,229 @@
+"""
+Предрасчитанные рейтинги произведений.
+
+Лучшие произведения (всего, в категории, в жанре) упорядочены по
+взвешенному рейтингу (``reviews.ratings``), затем по количеству отзывов.
+Набирающие популярность — по числу отзывов в день за последние N дней.
+Рейтинги хранятся в ``Leaderboard`` и читаются одним диапазонным
+сканированием индекса (kind, scope, rank).
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from reviews.constants import (LEADERBOARD_ALL, LEADERBOARD_CATEGORY,
+                               LEADERBOARD_GENRE, LEADERBOARD_TRENDING)
+from reviews.models import (Leaderboard, LeaderboardPendingTitle, Review,
+                            Title)
+
+DEFAULTS = {
+    'SIZE': 100,
+    'TRENDING_DAYS': (1, 7, 30),
+}
+TOP_KINDS = (LEADERBOARD_ALL, LEADERBOARD_CATEGORY, LEADERBOARD_GENRE)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'LEADERBOARDS', {})}
+
+
+def mark_pending(title_ids):
+    """Отмечает произведения для ``refresh_top_incremental``."""
+    LeaderboardPendingTitle.objects.bulk_create(
+        [LeaderboardPendingTitle(title_id=pk) for pk in title_ids],
+        ignore_conflicts=True
+    )
+
+
+def rank_key(entry):
+    """Порядок в рейтинге: оценка, затем число отзывов, затем id."""
+    title_id, score, reviews_count = entry
+    return -score, -reviews_count, title_id
+
+
+def title_aggregates(title_ids=None):
+    """
+    {title_id: (взвешенный рейтинг, число отзывов)} для произведений с
+    отзывами — из денормализованных колонок, без агрегации отзывов.
+    """
+    titles = Title.objects.filter(score_count__gt=0)
+    if title_ids is not None:
+        titles = titles.filter(id__in=title_ids)
+    return {
+        title_id: (score, count)
+        for title_id, score, count in titles.values_list(
+            'id', 'weighted_rating', 'score_count'
+        )
+    }
+
+
+def title_scopes(title_ids=None):
+    """{title_id: [(kind, scope), ...]} для рейтингов лучших."""
+    titles = Title.objects.all()
+    through = Title.genre.through.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(id__in=title_ids)
+        through = through.filter(title_id__in=title_ids)
+    scopes = defaultdict(list)
+    for title_id, category_id in titles.values_list('id', 'category_id'):
+        scopes[title_id].append((LEADERBOARD_ALL, 0))
+        if category_id is not None:
+            scopes[title_id].append((LEADERBOARD_CATEGORY, category_id))
+    for title_id, genre_id in through.values_list('title_id', 'genre_id'):
+        scopes[title_id].append((LEADERBOARD_GENRE, genre_id))
+    return scopes
+
+
+def _replace_scope(kind, scope, entries):
+    Leaderboard.objects.filter(kind=kind, scope=scope).delete()
+    Leaderboard.objects.bulk_create(
+        Leaderboard(kind=kind, scope=scope, rank=rank, title_id=title_id,
+                    score=score, reviews_count=reviews_count)
+        for rank, (title_id, score, reviews_count) in enumerate(entries, 1)
+    )
+
+
+def refresh_top(size=None):
+    """Полный пересчёт рейтингов лучших. Возвращает число областей."""
+    size = size or get_config()['SIZE']
+    pending = list(
+        LeaderboardPendingTitle.objects.values_list('title_id', flat=True)
+    )
+    aggregates = title_aggregates()
+    boards = defaultdict(list)
+    for title_id, scopes in title_scopes().items():
+        if title_id not in aggregates:
+            continue
+        score, count = aggregates[title_id]
+        for kind_scope in scopes:
+            boards[kind_scope].append((title_id, score, count))
+    with transaction.atomic():
+        Leaderboard.objects.filter(kind__in=TOP_KINDS).delete()
+        for (kind, scope), entries in boards.items():
+            _replace_scope(kind, scope, sorted(entries, key=rank_key)[:size])
+        LeaderboardPendingTitle.objects.filter(title_id__in=pending).delete()
+    return len(boards)
+
+
+def _refresh_top_scope(kind, scope, size, exclude=()):
+    """
+    Полный пересчёт одной области рейтинга лучших без произведений
+    ``exclude``.
+    """
+    titles = Title.objects.exclude(id__in=exclude)
+    if kind == LEADERBOARD_CATEGORY:
+        titles = titles.filter(category_id=scope)
+    elif kind == LEADERBOARD_GENRE:
+        titles = titles.filter(genre__id=scope)
+    aggregates = title_aggregates(titles.values('id'))
+    entries = [
+        (title_id, score, count)
+        for title_id, (score, count) in aggregates.items()
+    ]
+    _replace_scope(kind, scope, sorted(entries, key=rank_key)[:size])
+
+
+def refresh_top_incremental(size=None):
+    """
+    Пересчитывает только произведения из ``LeaderboardPendingTitle``.
+
+    Новые значения вливаются в сохранённые рейтинги затронутых областей.
+    Если произведение из заполненного рейтинга опустилось, его место может
+    занять произведение вне рейтинга — такая область пересчитывается
+    полностью. Возвращает число обработанных произведений.
+    """
+    size = size or get_config()['SIZE']
+    pending = list(
+        LeaderboardPendingTitle.objects.values_list('title_id', flat=True)
+    )
+    if not pending:
+        return 0
+    aggregates = title_aggregates(pending)
+    new_scopes = title_scopes(pending)
+    # Области, где произведения были раньше, и где они теперь.
+    affected = set(Leaderboard.objects.filter(
+        kind__in=TOP_KINDS, title_id__in=pending
+    ).values_list('kind', 'scope'))
+    for scopes in new_scopes.values():
+        affected.update(scopes)
+
+    with transaction.atomic():
+        for kind, scope in affected:
+            board = {
+                title_id: (title_id, score, count)
+                for title_id, score, count in Leaderboard.objects.filter(
+                    kind=kind, scope=scope
+                ).values_list('title_id', 'score', 'reviews_count')
+            }
+            was_full = len(board) >= size
+            dropped = False
+            for title_id in pending:
+                old = board.pop(title_id, None)
+                new = None
+                if (title_id in aggregates
+                        and (kind, scope) in new_scopes.get(title_id, ())):
+                    new = (title_id, *aggregates[title_id])
+                    board[title_id] = new
+                if old and (new is None or rank_key(new) > rank_key(old)):
+                    dropped = True
+            if dropped and was_full:
+                _refresh_top_scope(kind, scope, size)
+            else:
+                _replace_scope(
+                    kind, scope, sorted(board.values(), key=rank_key)[:size]
+                )
+        LeaderboardPendingTitle.objects.filter(title_id__in=pending).delete()
+    return len(pending)
+
+
+def drop_titles(title_ids):
+    """
+    Убирает произведения из рейтингов перед их удалением. Области лучших,
+    где они были, пересчитываются без них (освободившиеся места занимают
+    следующие произведения), в набирающих популярность места сдвигаются.
+    Иначе каскадное удаление строк ``Leaderboard`` оставило бы пропуски
+    в местах до полного пересчёта.
+    """
+    size = get_config()['SIZE']
+    scopes = set(Leaderboard.objects.filter(
+        title_id__in=title_ids
+    ).values_list('kind', 'scope'))
+    with transaction.atomic():
+        for kind, scope in scopes:
+            if kind in TOP_KINDS:
+                _refresh_top_scope(kind, scope, size, exclude=title_ids)
+                continue
+            _replace_scope(kind, scope, list(
+                Leaderboard.objects.filter(kind=kind, scope=scope).exclude(
+                    title_id__in=title_ids
+                ).order_by('rank').values_list(
+                    'title_id', 'score', 'reviews_count'
+                )
+            ))
+
+
+def refresh_trending(size=None, now=None):
+    """
+    Рейтинги набирающих популярность для каждого окна из
+    ``LEADERBOARDS['TRENDING_DAYS']``. Окно сдвигается со временем, поэтому
+    они всегда пересчитываются целиком по индексу ``pub_date``.
+    """
+    config = get_config()
+    size = size or config['SIZE']
+    now = now or timezone.now()
+    with transaction.atomic():
+        for days in config['TRENDING_DAYS']:
+            rows = Review.objects.filter(
+                pub_date__gte=now - timedelta(days=days)
+            ).order_by().values('title_id').annotate(
+                count=Count('id')
+            ).order_by('-count', 'title_id')[:size]
+            _replace_scope(LEADERBOARD_TRENDING, days, [
+                (row['title_id'], row['count'] / days, row['count'])
+                for row in rows
+            ])
+    return len(config['TRENDING_DAYS'])
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from reviews.archive import archive_comments, get_config
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит комментарии старше ARCHIVE["AFTER_DAYS"] дней в архив. '
+        'Запускать периодически, например из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help='Возраст комментариев в днях (по умолчанию из настроек).'
+        )
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is None:
+            days = get_config()['AFTER_DAYS']
+        if days < 0:
+            raise CommandError('Число дней не может быть отрицательным.')
+        moved = archive_comments(
+            timezone.now() - timedelta(days=days), options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено в архив комментариев: {moved}.'
+        ))
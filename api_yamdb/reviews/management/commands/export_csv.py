@@ -0,0 +1,38 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from reviews.exports import EXPORTS, FORMATS, filename
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает отзывы и комментарии в CSV (колонки static/data, '
+        'загружается обратно через import_csv --path) или NDJSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='export',
+                            help='Каталог для файлов выгрузки.')
+        parser.add_argument('--format', choices=FORMATS, default='csv',
+                            dest='file_format')
+        parser.add_argument('--only', nargs='+', choices=EXPORTS,
+                            default=list(EXPORTS),
+                            help='Что выгружать (по умолчанию всё).')
+
+    def handle(self, *args, **options):
+        os.makedirs(options['path'], exist_ok=True)
+        stream = FORMATS[options['file_format']][0]
+        for kind in options['only']:
+            path = os.path.join(
+                options['path'], filename(kind, options['file_format'])
+            )
+            # Строка заголовка CSV в число выгруженных не входит.
+            written = -1 if options['file_format'] == 'csv' else 0
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                for line in stream(kind):
+                    file.write(line)
+                    written += 1
+            self.stdout.write(self.style.SUCCESS(
+                f'{path}: {written} строк.'
+            ))
@@ -1,10 +1,17 @@
 import csv
+import os
 
-from django.core.exceptions import ObjectDoesNotExist
-from django.core.management.base import BaseCommand
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
 from django.utils.dateparse import parse_datetime
 
+from api import facets
+from reviews.counters import repair_user_stats
+from reviews.imports import (SOURCES, IdRemap, Upsert, Validation,
+                             refresh_denormalized, reset_sequences)
 from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.readers import PARSERS, STDIN, find_input, read_rows
 
 STATIC_DATA_PATH = 'static/data/'
 
@@ -12,20 +19,189 @@ STATIC_DATA_PATH = 'static/data/'
 class Command(BaseCommand):
     help = 'Import data from CSV files'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=STATIC_DATA_PATH,
+            help='Каталог с CSV-файлами (например, выгрузка export_csv). '
+                 'Отсутствующие в нём файлы пропускаются. С --upsert '
+                 'читаются также .ndjson и сжатые .gz и .zst.'
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Вставлять новые и обновлять изменившиеся строки пачками '
+                 '(INSERT ... ON CONFLICT), неизменные пропускать.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Размер пачки для --upsert (по умолчанию из настроек).'
+        )
+        parser.add_argument(
+            '--validate-only', action='store_true',
+            help='Только проверить файлы и записать отказы, не загружая.'
+        )
+        parser.add_argument(
+            '--rejects',
+            help='Каталог для файлов отказов (по умолчанию <path>/rejects).'
+        )
+        parser.add_argument(
+            '--remap-ids', action='store_true',
+            help='Выдать строкам новые id после существующих и перевести '
+                 'внешние ключи (слияние наборов данных). Только с --upsert.'
+        )
+        parser.add_argument(
+            '--stdin', choices=[source.kind for source in SOURCES],
+            help='Загрузить один вид данных из стандартного ввода вместо '
+                 'каталога. Только с --upsert.'
+        )
+        parser.add_argument(
+            '--format', choices=PARSERS, default='csv', dest='file_format',
+            help='Формат стандартного ввода; сжатие определяется само.'
+        )
+
     def handle(self, *args, **kwargs):
-        self.import_categories()
-        self.import_genres()
-        self.import_titles()
-        self.import_genres_titles()
-        self.import_reviews()
-        self.import_comments()
+        self.path = kwargs['path']
+        self.rejects = kwargs['rejects'] or os.path.join(
+            self.path, 'rejects'
+        )
+        self.stdin = kwargs['stdin']
+        self.file_format = kwargs['file_format']
+        if (kwargs['remap_ids'] or self.stdin) and not (
+            kwargs['upsert'] or kwargs['validate_only']
+        ):
+            raise CommandError(
+                '--remap-ids и --stdin работают только с --upsert.'
+            )
+        remap = IdRemap() if kwargs['remap_ids'] else None
+        if kwargs['validate_only']:
+            self.upsert(kwargs['batch_size'], True, remap)
+            return
+        try:
+            if kwargs['upsert']:
+                self.upsert(kwargs['batch_size'], remap=remap)
+            else:
+                self.restored_authors = set()
+                self.import_users()
+                self.import_categories()
+                self.import_genres()
+                self.import_titles()
+                self.import_genres_titles()
+                self.import_reviews()
+                self.import_comments()
+                # Сигналы сохранения записали активность авторов на момент
+                # загрузки, до восстановления pub_date.
+                if self.restored_authors:
+                    repair_user_stats(self.restored_authors)
+        finally:
+            # Строки вставлены с явными id: счётчики id сдвигаются за них.
+            reset_sequences(source.model for source in SOURCES)
+
+    def file_exists(self, path):
+        if os.path.exists(path):
+            return True
+        self.stdout.write(self.style.WARNING(f'Файл {path} не найден.'))
+        return False
+
+    def inputs(self):
+        """
+        Пары (Source, путь) для загрузки: файлы каталога в любом формате
+        и сжатии ``reviews.readers`` или стандартный ввод.
+        """
+        for source in SOURCES:
+            if self.stdin:
+                if source.kind == self.stdin:
+                    yield source, STDIN
+                continue
+            path = find_input(self.path, source.filename)
+            if path is None:
+                self.file_exists(os.path.join(self.path, source.filename))
+                continue
+            yield source, path
+
+    @staticmethod
+    def label(source, path):
+        return f'stdin ({source.kind})' if path == STDIN else path
+
+    def load(self, source, path, validation, upsert=None):
+        """
+        Проверяет строки файла и, если передан ``upsert``, загружает чистые
+        за одно чтение файла. Отклонённые строки пишутся в каталог отказов.
+        """
+        name = self.label(source, path)
+        os.makedirs(self.rejects, exist_ok=True)
+        rejects_path = os.path.join(self.rejects, source.filename)
+        rows = read_rows(path, self.file_format if path == STDIN else None)
+        with open(rejects_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow([*source.header, 'errors'])
+            if upsert is None:
+                validation.run(rows, writer)
+            else:
+                upsert.run(validation.filter(rows, writer))
+        summary = f'{name}: строк {validation.rows}'
+        if not validation.rejected:
+            os.remove(rejects_path)
+            try:
+                # Каталог отказов остаётся, только если в нём есть файлы.
+                os.rmdir(self.rejects)
+            except OSError:
+                pass
+            self.stdout.write(self.style.SUCCESS(f'{summary}, ошибок нет.'))
+            return
+        errors = ', '.join(
+            f'{column}: {count}'
+            for column, count in validation.errors.most_common()
+        )
+        self.stdout.write(self.style.WARNING(
+            f'{summary}, отклонено {validation.rejected} ({errors}), '
+            f'отказы в {rejects_path}.'
+        ))
+
+    def upsert(self, batch_size, validate_only=False, remap=None):
+        affected, known_ids = {}, {}
+        for source, path in self.inputs():
+            validation = Validation(source, known_ids, remap)
+            upsert = None if validate_only else Upsert(source, batch_size)
+            try:
+                self.load(source, path, validation, upsert)
+            except (ImproperlyConfigured, IntegrityError, ValueError) as error:
+                # Предыдущие файлы уже загружены: их данные пересчитываются.
+                self.refresh(affected, validate_only)
+                raise CommandError(
+                    f'{self.label(source, path)} не загружен: {error}'
+                )
+            if validate_only:
+                continue
+            affected[source.kind] = upsert.affected
+            counts = upsert.counts
+            self.stdout.write(self.style.SUCCESS(
+                f'{self.label(source, path)}: вставлено '
+                f'{counts["inserted"]}, обновлено '
+                f'{counts["updated"]}, без изменений {counts["unchanged"]}.'
+            ))
+        self.refresh(affected, validate_only)
+
+    @staticmethod
+    def refresh(affected, validate_only):
+        """
+        Пересчитывает денормализованные данные загруженных файлов. Запись
+        идёт без сигналов, поэтому кэш фасетов сбрасывается здесь.
+        """
+        refresh_denormalized(affected)
+        if not validate_only:
+            facets.invalidate()
+
+    def restore_pub_date(self, obj, value):
+        # pub_date с auto_now_add при создании получает текущее время.
+        type(obj).all_objects.filter(id=obj.id).update(
+            pub_date=parse_datetime(value)
+        )
+        self.restored_authors.add(obj.author_id)
 
     def import_users(self):
-        with open(
-            STATIC_DATA_PATH + 'users.csv',
-            'r',
-            encoding='utf-8'
-        ) as file:
+        path = os.path.join(self.path, 'users.csv')
+        if not self.file_exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as file:
             reader = csv.reader(file)
             next(reader)
             for row in reader:
@@ -61,11 +237,10 @@ class Command(BaseCommand):
                     )
 
     def import_categories(self):
-        with open(
-            STATIC_DATA_PATH + 'category.csv',
-            'r',
-            encoding='utf-8'
-        ) as file:
+        path = os.path.join(self.path, 'category.csv')
+        if not self.file_exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as file:
             reader = csv.reader(file)
             next(reader)
             for row in reader:
@@ -76,11 +251,10 @@ class Command(BaseCommand):
                 )
 
     def import_genres(self):
-        with open(
-            STATIC_DATA_PATH + 'genre.csv',
-            'r',
-            encoding='utf-8'
-        ) as file:
+        path = os.path.join(self.path, 'genre.csv')
+        if not self.file_exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as file:
             reader = csv.reader(file)
             next(reader)
             for row in reader:
@@ -91,11 +265,10 @@ class Command(BaseCommand):
                 )
 
     def import_titles(self):
-        with open(
-            STATIC_DATA_PATH + 'titles.csv',
-            'r',
-            encoding='utf-8'
-        ) as file:
+        path = os.path.join(self.path, 'titles.csv')
+        if not self.file_exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as file:
             reader = csv.reader(file)
             next(reader)
             for row in reader:
@@ -108,11 +281,10 @@ class Command(BaseCommand):
                 )
 
     def import_genres_titles(self):
-        with open(
-            STATIC_DATA_PATH + 'genre_title.csv',
-            'r',
-            encoding='utf-8'
-        ) as file:
+        path = os.path.join(self.path, 'genre_title.csv')
+        if not self.file_exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as file:
             reader = csv.reader(file)
             next(reader)
             for row in reader:
@@ -121,11 +293,10 @@ class Command(BaseCommand):
                 title.genre.add(genre)
 
     def import_reviews(self):
-        with open(
-            STATIC_DATA_PATH + 'review.csv',
-            'r',
-            encoding='utf-8'
-        ) as file:
+        path = os.path.join(self.path, 'review.csv')
+        if not self.file_exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as file:
             reader = csv.reader(file)
             next(reader)
             for row in reader:
@@ -147,36 +318,39 @@ class Command(BaseCommand):
                     )
                     continue
 
-                Review.objects.get_or_create(
+                review, created = Review.all_objects.get_or_create(
                     id=row[0],
                     defaults={
                         'title': title,
                         'text': row[2],
                         'author': author,
-                        'score': row[4],
-                        'pub_date': parse_datetime(row[5])
+                        'score': int(row[4]),
                     }
                 )
+                if created:
+                    self.restore_pub_date(review, row[5])
 
     def import_comments(self):
-        with open(
-            STATIC_DATA_PATH + 'comments.csv',
-            'r',
-            encoding='utf-8'
-        ) as file:
+        path = os.path.join(self.path, 'comments.csv')
+        if not self.file_exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as file:
             reader = csv.reader(file)
             next(reader)
             for row in reader:
                 try:
-                    review = Review.objects.get(id=row[1])
+                    review = Review.all_objects.get(id=row[1])
                     author = User.objects.get(id=row[3])
-                    comment, created = Comment.objects.get_or_create(
+                    comment, created = Comment.all_objects.get_or_create(
                         id=row[0],
-                        review=review,
-                        text=row[2],
-                        author=author,
-                        pub_date=parse_datetime(row[4])
+                        defaults={
+                            'review': review,
+                            'text': row[2],
+                            'author': author,
+                        }
                     )
+                    if created:
+                        self.restore_pub_date(comment, row[4])
                 except ObjectDoesNotExist as e:
                     self.stdout.write(
                         self.style.WARNING(
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.deletion import process_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет задания на удаление произведений и пользователей с '
+        'большим каскадом, поставленные через API или админку. Запускать '
+        'периодически, например из cron. Задания с ошибкой остаются в '
+        'очереди и повторяются при следующем запуске.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int,
+            help='Выполнить не больше указанного числа заданий.'
+        )
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        if limit is not None and limit < 1:
+            raise CommandError('--limit должен быть не меньше 1.')
+        done, failed = process_jobs(limit)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено заданий на удаление: {done}.'
+        ))
+        if failed:
+            raise CommandError(
+                f'Заданий с ошибкой: {failed}; ошибки записаны в задания '
+                f'(DeletionJob.error), они будут повторены.'
+            )
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from reviews.deletion import get_config, purge_hidden
+
+
+class Command(BaseCommand):
+    help = (
+        'Окончательно удаляет пачками отзывы и комментарии, скрытые '
+        'модераторами больше DELETION["PURGE_AFTER_DAYS"] дней назад. '
+        'Запускать периодически, например из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help='Возраст скрытых строк в днях (по умолчанию из настроек).'
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is None:
+            days = get_config()['PURGE_AFTER_DAYS']
+        if days < 0:
+            raise CommandError('Число дней не может быть отрицательным.')
+        reviews, comments = purge_hidden(
+            timezone.now() - timedelta(days=days)
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено скрытых отзывов: {reviews}, комментариев: {comments}.'
+        ))
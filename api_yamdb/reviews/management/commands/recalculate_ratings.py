@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from reviews.ratings import recalculate_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает суммы и количества оценок и взвешенный рейтинг '
+        'произведений по таблице отзывов. Нужен после загрузки отзывов в '
+        'обход ORM или после изменения WEIGHTED_RATING.'
+    )
+
+    def handle(self, *args, **options):
+        titles = recalculate_ratings()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинги пересчитаны: {titles} произведений.'
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from reviews.leaderboards import (refresh_top, refresh_top_incremental,
+                                  refresh_trending)
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет предрасчитанные рейтинги произведений. По умолчанию '
+        'пересчитывает только произведения с новыми отзывами; запускать '
+        'периодически, например из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать рейтинги лучших целиком.'
+        )
+
+    def handle(self, *args, **options):
+        if options['full']:
+            scopes = refresh_top()
+            self.stdout.write(self.style.SUCCESS(
+                f'Рейтинги лучших пересчитаны: {scopes} областей.'
+            ))
+        else:
+            titles = refresh_top_incremental()
+            self.stdout.write(self.style.SUCCESS(
+                f'Рейтинги лучших обновлены: {titles} произведений.'
+            ))
+        windows = refresh_trending()
+        self.stdout.write(self.style.SUCCESS(
+            f'Набирающие популярность обновлены: {windows} окон.'
+        ))
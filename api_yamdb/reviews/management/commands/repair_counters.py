@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from reviews.counters import repair_comments_count, repair_user_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет денормализованные счётчики комментариев отзывов и '
+        'активность пользователей с таблицами отзывов и комментариев и '
+        'исправляет разошедшиеся.'
+    )
+
+    def handle(self, *args, **options):
+        reviews = repair_comments_count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики комментариев исправлены у {reviews} отзывов.'
+        ))
+        users = repair_user_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Активность пересчитана у {users} пользователей.'
+        ))
@@ -1,4 +1,5 @@
 from django.contrib.auth.models import BaseUserManager
+from django.db import models
 
 
 class UserManager(BaseUserManager):
@@ -26,3 +27,10 @@ class UserManager(BaseUserManager):
             raise ValueError('Суперюзер должен иметь is_superuser=True')
 
         return self.create_user(email, username, password, **extra_fields)
+
+
+class VisibleManager(models.Manager):
+    '''Менеджер только видимых (не скрытых модератором) строк'''
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
@@ -0,0 +1,199 @@
+# Generated by Django 3.2 on 2026-10-19 10:38
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import reviews.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Leaderboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('all', 'Лучшие'), ('category', 'Лучшие в категории'), ('genre', 'Лучшие в жанре'), ('trending', 'Набирающие популярность')], max_length=10, verbose_name='Вид рейтинга')),
+                ('scope', models.PositiveIntegerField(verbose_name='Область')),
+                ('rank', models.PositiveIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('reviews_count', models.PositiveIntegerField(verbose_name='Количество отзывов')),
+            ],
+            options={
+                'verbose_name': 'позиция в рейтинге',
+                'verbose_name_plural': 'Рейтинги',
+                'ordering': ('kind', 'scope', 'rank'),
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardPendingTitle',
+            fields=[
+                ('title_id', models.BigIntegerField(primary_key=True, serialize=False)),
+            ],
+            options={
+                'verbose_name': 'произведение к пересчёту рейтинга',
+                'verbose_name_plural': 'Произведения к пересчёту рейтинга',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='category',
+            options={'ordering': ('name',), 'verbose_name': 'категория', 'verbose_name_plural': 'Категории'},
+        ),
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'default_related_name': 'comments', 'ordering': ('pub_date',), 'verbose_name': 'комментарий', 'verbose_name_plural': 'Комментарии'},
+        ),
+        migrations.AlterModelOptions(
+            name='genre',
+            options={'ordering': ('name',), 'verbose_name': 'жанр', 'verbose_name_plural': 'Жанры'},
+        ),
+        migrations.AlterModelOptions(
+            name='review',
+            options={'default_related_name': 'reviews', 'ordering': ('pub_date',), 'verbose_name': 'отзыв', 'verbose_name_plural': 'Отзывы'},
+        ),
+        migrations.AlterModelOptions(
+            name='title',
+            options={'default_related_name': 'titles', 'ordering': ('name',), 'verbose_name': 'произведение', 'verbose_name_plural': 'Произведения'},
+        ),
+        migrations.AlterModelOptions(
+            name='user',
+            options={'ordering': ('username',), 'verbose_name': 'пользователь', 'verbose_name_plural': 'Пользователи'},
+        ),
+        migrations.RemoveField(
+            model_name='title',
+            name='rating',
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(max_length=256, verbose_name='Название'),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='slug',
+            field=models.SlugField(unique=True, verbose_name='Уникальный идентификатор'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='pub_date',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Дата публикации'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='review',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='reviews.review', verbose_name='Отзыв'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='text',
+            field=models.TextField(verbose_name='Текст'),
+        ),
+        migrations.AlterField(
+            model_name='genre',
+            name='name',
+            field=models.CharField(max_length=256, verbose_name='Название'),
+        ),
+        migrations.AlterField(
+            model_name='genre',
+            name='slug',
+            field=models.SlugField(unique=True, verbose_name='Уникальный идентификатор'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='pub_date',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Дата публикации'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='score',
+            field=models.PositiveSmallIntegerField(validators=[django.core.validators.MaxValueValidator(10), django.core.validators.MinValueValidator(1)], verbose_name='Оценка'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='text',
+            field=models.TextField(verbose_name='Текст'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='reviews.title', verbose_name='Произведение'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='category',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='titles', to='reviews.category', verbose_name='Категория'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='description',
+            field=models.TextField(blank=True, verbose_name='Описание'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='genre',
+            field=models.ManyToManyField(related_name='titles', to='reviews.Genre', verbose_name='Жанр'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='name',
+            field=models.CharField(max_length=256, verbose_name='Название'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.SmallIntegerField(validators=[reviews.validators.validate_year], verbose_name='Год'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='bio',
+            field=models.TextField(blank=True, verbose_name='Биография'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='confirmation_code',
+            field=models.CharField(blank=True, max_length=100, null=True, verbose_name='Код подтверждения'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='email',
+            field=models.EmailField(max_length=254, unique=True, verbose_name='Электронная почта'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='role',
+            field=models.CharField(choices=[('user', 'User'), ('moderator', 'Moderator'), ('admin', 'Admin')], default='user', max_length=10, verbose_name='Роль'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='username',
+            field=models.CharField(max_length=150, unique=True, validators=[django.core.validators.RegexValidator(message='Username must be 150 characters or fewer. Letters, digits and @/./+/-/_ only.', regex='^[\\w.@+-]+$'), reviews.validators.validate_username], verbose_name='Имя пользователя'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['pub_date'], name='review_pub_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='leaderboard',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.title', verbose_name='Произведение'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboard',
+            constraint=models.UniqueConstraint(fields=('kind', 'scope', 'rank'), name='unique_leaderboard_rank'),
+        ),
+    ]
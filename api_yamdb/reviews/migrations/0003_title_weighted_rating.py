@@ -0,0 +1,66 @@
+# Generated by Django 3.2 on 2026-10-19 10:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import (Case, Count, ExpressionWrapper, F, FloatField,
+                              IntegerField, OuterRef, Subquery, Sum, Value,
+                              When)
+from django.db.models.functions import Coalesce
+
+
+def fill_ratings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    config = {'PRIOR_MEAN': 5.5, 'PRIOR_WEIGHT': 10,
+              **getattr(settings, 'WEIGHTED_RATING', {})}
+    reviews = Review.objects.filter(
+        title_id=OuterRef('pk')
+    ).order_by().values('title_id')
+    Title.objects.update(
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total'),
+                     output_field=IntegerField()),
+            0
+        ),
+        score_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('id')).values('total'),
+                     output_field=IntegerField()),
+            0
+        ),
+    )
+    Title.objects.update(weighted_rating=Case(
+        When(score_count=0, then=Value(None)),
+        default=ExpressionWrapper(
+            (Value(float(config['PRIOR_WEIGHT'] * config['PRIOR_MEAN']))
+             + F('score_sum'))
+            / (Value(float(config['PRIOR_WEIGHT'])) + F('score_count')),
+            output_field=FloatField()
+        ),
+        output_field=FloatField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_leaderboards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='score_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2 on 2026-10-19 10:48
+
+from django.db import migrations, models
+import reviews.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_score_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.SmallIntegerField(db_index=True, validators=[reviews.validators.validate_year], verbose_name='Год'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2 on 2026-10-19 10:57
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comments_count(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    Review.objects.update(comments_count=Coalesce(
+        Subquery(
+            Comment.objects.filter(review_id=OuterRef('pk')).order_by()
+            .values('review_id').annotate(total=Count('id')).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_year_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(fill_comments_count, migrations.RunPython.noop),
+    ]
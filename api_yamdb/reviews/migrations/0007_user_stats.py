@@ -0,0 +1,69 @@
+# Generated by Django 3.2 on 2026-10-19 10:58
+
+from django.db import migrations, models
+from django.db.models import (Count, Exists, IntegerField, OuterRef, Q,
+                              Subquery, Sum)
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_user_stats(apps, schema_editor):
+    User = apps.get_model('reviews', 'User')
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    UserStats = apps.get_model('reviews', 'UserStats')
+
+    def aggregate(model, expression):
+        return Coalesce(Subquery(
+            model.objects.filter(author_id=OuterRef('pk')).order_by()
+            .values('author_id').annotate(total=expression).values('total'),
+            output_field=IntegerField()
+        ), 0)
+
+    def latest(model):
+        return Subquery(
+            model.objects.filter(author_id=OuterRef('pk'))
+            .order_by('-pub_date').values('pub_date')[:1]
+        )
+
+    active = User.objects.filter(
+        Exists(Review.objects.filter(author_id=OuterRef('pk')))
+        | Exists(Comment.objects.filter(author_id=OuterRef('pk')))
+    ).values_list('pk', flat=True)
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk) for pk in active), batch_size=10000
+    )
+    UserStats.objects.update(
+        reviews_count=aggregate(Review, Count('id')),
+        score_sum=aggregate(Review, Sum('score')),
+        comments_count=aggregate(Comment, Count('id')),
+        last_activity=latest(Review),
+    )
+    UserStats.objects.filter(
+        Q(last_activity__isnull=True) | Q(last_activity__lt=latest(Comment))
+    ).update(last_activity=latest(Comment))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_review_comments_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='reviews.user', verbose_name='Пользователь')),
+                ('reviews_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('score_sum', models.PositiveIntegerField(default=0, verbose_name='Сумма оценок')),
+                ('comments_count', models.PositiveIntegerField(default=0, verbose_name='Количество комментариев')),
+                ('last_activity', models.DateTimeField(blank=True, null=True, verbose_name='Последняя активность')),
+            ],
+            options={
+                'verbose_name': 'активность пользователя',
+                'verbose_name_plural': 'Активность пользователей',
+            },
+        ),
+        migrations.RunPython(fill_user_stats, migrations.RunPython.noop),
+    ]
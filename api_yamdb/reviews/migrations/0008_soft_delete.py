@@ -0,0 +1,47 @@
+# Generated by Django 3.2 on 2026-10-19 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_user_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='review',
+            name='unique_title_author',
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Скрыт'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Скрыт'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['review', 'pub_date'], name='comment_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='comment_hidden_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['title', 'pub_date'], name='review_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='review_hidden_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(condition=models.Q(deleted_at__isnull=True), fields=('title', 'author'), name='unique_title_author'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-19 11:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='archived_comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев в архиве'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('review', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to='reviews.review', verbose_name='Отзыв')),
+            ],
+            options={
+                'verbose_name': 'архивный комментарий',
+                'verbose_name_plural': 'Архивные комментарии',
+                'ordering': ('pub_date',),
+                'default_related_name': 'archived_comments',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['review', 'pub_date'], name='archived_review_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2 on 2026-10-19 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_comment_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('title', 'Произведение'), ('user', 'Пользователь')], max_length=10, verbose_name='Что удаляется')),
+                ('object_id', models.BigIntegerField(verbose_name='id объекта')),
+                ('requested_at', models.DateTimeField(auto_now_add=True, verbose_name='Запрошено')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начато')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('affected', models.JSONField(blank=True, default=dict, verbose_name='Затронутые id')),
+            ],
+            options={
+                'verbose_name': 'задание на удаление',
+                'verbose_name_plural': 'Задания на удаление',
+                'ordering': ('requested_at',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='deletionjob',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_deletion_job'),
+        ),
+    ]
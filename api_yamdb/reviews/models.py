@@ -3,18 +3,23 @@ from django.conf import settings
 from django.core.validators import RegexValidator
 from django.db import models
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db.models import UniqueConstraint
+from django.db.models import Q, UniqueConstraint
 
 
-from reviews.managers import UserManager
+from reviews.managers import UserManager, VisibleManager
 from reviews.service import generate_confirmation_code
 from reviews.validators import validate_username, validate_year
 from reviews.constants import (CATEGORY_NAME_MAX_LEN,
                                CONFIRMATION_CODE_MAX_LEN,
+                               DELETION_KIND_CHOICES,
+                               DELETION_KIND_MAX_LEN,
                                EMAIL_MAX_LEN,
+                               LEADERBOARD_KIND_CHOICES,
+                               LEADERBOARD_KIND_MAX_LEN,
                                MAX_SCORE,
                                MIN_SCORE,
                                ROLE_MAX_LEN,
+                               SCORE_COUNT_FIELDS,
                                TEXT_PREVIEW_LEN,
                                TITLE_NAME_MAX_LEN,
                                USERNAME_MAX_LEN,
@@ -112,7 +117,7 @@ class Title(models.Model):
         max_length=TITLE_NAME_MAX_LEN, verbose_name='Название'
     )
     year = models.SmallIntegerField(
-        validators=[validate_year], verbose_name='Год'
+        validators=[validate_year], db_index=True, verbose_name='Год'
     )
     description = models.TextField(blank=True, verbose_name='Описание')
     category = models.ForeignKey(
@@ -122,6 +127,51 @@ class Title(models.Model):
         verbose_name='Категория'
     )
     genre = models.ManyToManyField(Genre, blank=False, verbose_name='Жанр')
+    score_sum = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Сумма оценок'
+    )
+    score_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Количество оценок'
+    )
+    weighted_rating = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name='Взвешенный рейтинг'
+    )
+    # Распределение оценок: счётчики обновляются сигналами отзывов тем же
+    # UPDATE, что и сумма. Имена по оценкам — SCORE_COUNT_FIELDS.
+    score_1_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Оценок 1'
+    )
+    score_2_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Оценок 2'
+    )
+    score_3_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Оценок 3'
+    )
+    score_4_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Оценок 4'
+    )
+    score_5_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Оценок 5'
+    )
+    score_6_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Оценок 6'
+    )
+    score_7_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Оценок 7'
+    )
+    score_8_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Оценок 8'
+    )
+    score_9_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Оценок 9'
+    )
+    score_10_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Оценок 10'
+    )
 
     class Meta:
         verbose_name = 'произведение'
@@ -132,9 +182,23 @@ class Title(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def score_counts(self):
+        """{оценка: число отзывов} из счётчиков произведения."""
+        return {
+            score: getattr(self, field_name)
+            for score, field_name in SCORE_COUNT_FIELDS.items()
+        }
+
 
 class AbstractReviewComment(models.Model):
-    """Абстрактная модель для отзывов и комментариев."""
+    """
+    Абстрактная модель для отзывов и комментариев.
+
+    Удалённые через API строки только скрываются (``deleted_at``) и
+    физически удаляются командой ``purge_deleted``. ``objects`` и связанные
+    менеджеры возвращают только видимые строки, ``all_objects`` — все.
+    """
 
     text = models.TextField(verbose_name='Текст')
     author = models.ForeignKey(
@@ -145,6 +209,12 @@ class AbstractReviewComment(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True, verbose_name='Дата публикации'
     )
+    deleted_at = models.DateTimeField(
+        null=True, blank=True, editable=False, verbose_name='Скрыт'
+    )
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
 
     class Meta:
         abstract = True
@@ -172,17 +242,51 @@ class Review(AbstractReviewComment):
         ],
         verbose_name='Оценка'
     )
+    comments_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Количество комментариев'
+    )
+    # Сколько из comments_count перенесено в ArchivedComment.
+    archived_comments_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Комментариев в архиве'
+    )
 
     class Meta(AbstractReviewComment.Meta):
         constraints = [
             UniqueConstraint(
-                fields=['title', 'author'], name='unique_title_author'
+                fields=['title', 'author'], name='unique_title_author',
+                condition=Q(deleted_at__isnull=True)
             )
         ]
+        indexes = [
+            models.Index(fields=['pub_date'], name='review_pub_date_idx'),
+            models.Index(
+                fields=['title', 'pub_date'], name='review_visible_idx',
+                condition=Q(deleted_at__isnull=True)
+            ),
+            models.Index(
+                fields=['deleted_at'], name='review_hidden_idx',
+                condition=Q(deleted_at__isnull=False)
+            ),
+        ]
         default_related_name = 'reviews'
         verbose_name = 'отзыв'
         verbose_name_plural = 'Отзывы'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_rating_fields()
+        return instance
+
+    def remember_rating_fields(self):
+        """
+        Запоминает сохранённые произведение и оценку, чтобы сигналы могли
+        учесть их изменение в денормализованном рейтинге.
+        """
+        self._saved_rating_fields = (
+            self.__dict__.get('title_id'), self.__dict__.get('score')
+        )
+
 
 class Comment(AbstractReviewComment):
     """
@@ -197,6 +301,192 @@ class Comment(AbstractReviewComment):
     )
 
     class Meta(AbstractReviewComment.Meta):
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date'], name='comment_visible_idx',
+                condition=Q(deleted_at__isnull=True)
+            ),
+            models.Index(
+                fields=['deleted_at'], name='comment_hidden_idx',
+                condition=Q(deleted_at__isnull=False)
+            ),
+        ]
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         default_related_name = 'comments'
+
+
+class ArchivedComment(models.Model):
+    """
+    Старый комментарий, перенесённый из ``Comment`` командой
+    ``archive_comments`` с тем же id. Изменяется только через возврат в
+    ``Comment`` (``reviews.archive``), поэтому нет и ``deleted_at``.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    review = models.ForeignKey(
+        Review,
+        on_delete=models.CASCADE,
+        db_index=False,
+        verbose_name='Отзыв'
+    )
+    text = models.TextField(verbose_name='Текст')
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        ordering = ('pub_date',)
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date'], name='archived_review_idx'
+            ),
+        ]
+        default_related_name = 'archived_comments'
+        verbose_name = 'архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+    def __str__(self):
+        return self.text[:TEXT_PREVIEW_LEN]
+
+
+class Leaderboard(models.Model):
+    """
+    Предрасчитанная позиция произведения в рейтинге. Для лучших в
+    категории или жанре ``scope`` — id категории или жанра, для
+    набирающих популярность — длина окна в днях.
+    """
+
+    kind = models.CharField(
+        max_length=LEADERBOARD_KIND_MAX_LEN,
+        choices=LEADERBOARD_KIND_CHOICES,
+        verbose_name='Вид рейтинга'
+    )
+    scope = models.PositiveIntegerField(verbose_name='Область')
+    rank = models.PositiveIntegerField(verbose_name='Место')
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Произведение'
+    )
+    score = models.FloatField(verbose_name='Оценка')
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов'
+    )
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['kind', 'scope', 'rank'],
+                name='unique_leaderboard_rank'
+            )
+        ]
+        ordering = ('kind', 'scope', 'rank')
+        verbose_name = 'позиция в рейтинге'
+        verbose_name_plural = 'Рейтинги'
+
+    def __str__(self):
+        return f'{self.kind}:{self.scope} #{self.rank}'
+
+
+class LeaderboardPendingTitle(models.Model):
+    """
+    Произведение, у которого изменились отзывы, жанры или категория после
+    последнего обновления рейтингов. Без внешнего ключа: запись может
+    пережить удаление произведения и просто игнорируется при обновлении.
+    """
+
+    title_id = models.BigIntegerField(primary_key=True)
+
+    class Meta:
+        verbose_name = 'произведение к пересчёту рейтинга'
+        verbose_name_plural = 'Произведения к пересчёту рейтинга'
+
+
+class UserStats(models.Model):
+    """
+    Активность пользователя: число отзывов и комментариев, сумма
+    поставленных оценок и время последнего отзыва или комментария.
+    Поддерживается сигналами отзывов и комментариев.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    reviews_count = models.PositiveIntegerField(
+        default=0, verbose_name='Количество отзывов'
+    )
+    score_sum = models.PositiveIntegerField(
+        default=0, verbose_name='Сумма оценок'
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0, verbose_name='Количество комментариев'
+    )
+    last_activity = models.DateTimeField(
+        null=True, blank=True, verbose_name='Последняя активность'
+    )
+
+    class Meta:
+        verbose_name = 'активность пользователя'
+        verbose_name_plural = 'Активность пользователей'
+
+    def __str__(self):
+        return str(self.user_id)
+
+    @property
+    def average_score(self):
+        if not self.reviews_count:
+            return None
+        return self.score_sum / self.reviews_count
+
+
+class DeletionJob(models.Model):
+    """
+    Удаление произведения или пользователя с большим каскадом, которое
+    выполняет команда ``process_deletions`` (``reviews.deletion``).
+    Задание удаляется после успешного выполнения; при ошибке или падении
+    процесса оно остаётся и выполняется снова. ``affected`` — id, данные
+    которых пересчитываются после удаления: они сохраняются до первой
+    пачки, чтобы прерванное удаление не потеряло их.
+    """
+
+    kind = models.CharField(
+        max_length=DELETION_KIND_MAX_LEN,
+        choices=DELETION_KIND_CHOICES,
+        verbose_name='Что удаляется'
+    )
+    object_id = models.BigIntegerField(verbose_name='id объекта')
+    requested_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Запрошено'
+    )
+    started_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Начато'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Попыток'
+    )
+    error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    affected = models.JSONField(
+        default=dict, blank=True, verbose_name='Затронутые id'
+    )
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['kind', 'object_id'], name='unique_deletion_job'
+            )
+        ]
+        ordering = ('requested_at',)
+        verbose_name = 'задание на удаление'
+        verbose_name_plural = 'Задания на удаление'
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
@@ -0,0 +1,79 @@
+"""
+Скрытие и восстановление отзывов и комментариев.
+
+Удаление через API только проставляет ``deleted_at``: строка перестаёт
+попадать в ``objects`` и связанные менеджеры, а рейтинг произведения,
+счётчик комментариев отзыва и ``UserStats`` автора сразу её не учитывают.
+Комментарии к скрытому отзыву тоже выпадают из ``UserStats`` своих
+авторов и возвращаются туда вместе с отзывом.
+Восстановление возвращает строку в агрегаты. Физически скрытые строки
+удаляет ``reviews.deletion.purge_hidden`` (команда ``purge_deleted``).
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.counters import change_comments_count, repair_user_stats
+from reviews.leaderboards import mark_pending
+from reviews.models import ArchivedComment, Comment, Review
+from reviews.ratings import apply_score_change
+
+
+def _commenter_ids(review):
+    return {
+        *Comment.objects.filter(review_id=review.pk).values_list(
+            'author_id', flat=True
+        ),
+        *ArchivedComment.objects.filter(review_id=review.pk).values_list(
+            'author_id', flat=True
+        ),
+    }
+
+
+def _apply(obj, sign):
+    author_ids = {obj.author_id}
+    if isinstance(obj, Review):
+        author_ids |= _commenter_ids(obj)
+        if sign > 0:
+            apply_score_change(obj.title_id, new_score=obj.score)
+        else:
+            apply_score_change(obj.title_id, old_score=obj.score)
+        mark_pending([obj.title_id])
+    else:
+        change_comments_count(obj.review_id, sign)
+    # Скрытая строка могла быть последней активностью автора.
+    repair_user_stats(author_ids)
+
+
+def restore_conflicts(review):
+    """Есть ли у автора видимый отзыв на то же произведение."""
+    return Review.objects.filter(
+        title_id=review.title_id, author_id=review.author_id
+    ).exists()
+
+
+def hide(obj):
+    """Скрывает видимую строку. Возвращает False, если она уже скрыта."""
+    deleted_at = timezone.now()
+    with transaction.atomic():
+        if not type(obj).objects.filter(pk=obj.pk).update(
+            deleted_at=deleted_at
+        ):
+            return False
+        obj.deleted_at = deleted_at
+        _apply(obj, -1)
+    return True
+
+
+def restore(obj):
+    """
+    Возвращает скрытую строку. Возвращает False, если она не скрыта. Отзыв
+    с ``restore_conflicts`` вернуть нельзя: мешает уникальность.
+    """
+    with transaction.atomic():
+        if not type(obj).all_objects.filter(
+            pk=obj.pk, deleted_at__isnull=False
+        ).update(deleted_at=None):
+            return False
+        obj.deleted_at = None
+        _apply(obj, 1)
+    return True
@@ -0,0 +1,50 @@
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+# Ниже этого числа строк оценка не используется: точный COUNT дёшев.
+ESTIMATE_THRESHOLD = 10000
+
+ESTIMATE_SQL = {
+    'postgresql': 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+    # Первое число в stat — количество строк таблицы (после ANALYZE).
+    'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+}
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор для списков админки по большим таблицам.
+
+    Для нефильтрованного списка берёт число строк из статистики
+    планировщика (``pg_class.reltuples`` в PostgreSQL, ``sqlite_stat1``
+    в SQLite) вместо ``COUNT(*)``. Отфильтрованные списки, небольшие
+    таблицы и базы без собранной статистики считаются точно.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = self.estimate()
+        if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+            return estimate
+        return super().count
+
+    def estimate(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where:
+            return None
+        connection = connections[self.object_list.db]
+        sql = ESTIMATE_SQL.get(connection.vendor)
+        if sql is None:
+            return None
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [query.model._meta.db_table])
+                row = cursor.fetchone()
+        except DatabaseError:
+            # Статистика не собиралась: в SQLite нет sqlite_stat1.
+            return None
+        if row is None or row[0] is None:
+            return None
+        estimate = int(str(row[0]).split()[0])
+        return estimate if estimate >= 0 else None
@@ -0,0 +1,146 @@
+"""
+Денормализованный рейтинг произведений.
+
+У каждого произведения хранятся сумма и количество оценок, число отзывов
+с каждой оценкой и взвешенный (байесовский) рейтинг::
+
+    weighted = (PRIOR_WEIGHT * PRIOR_MEAN + score_sum) /
+               (PRIOR_WEIGHT + score_count)
+
+Пока отзывов мало, рейтинг тянется к PRIOR_MEAN, поэтому одна оценка 10
+не обгоняет тысячи оценок 9. Значения поддерживаются сигналами отзывов
+одним UPDATE с F-выражениями; после массовых загрузок в обход ORM их
+пересчитывает ``recalculate_ratings``.
+"""
+from django.conf import settings
+from django.db.models import (Case, Count, ExpressionWrapper, F, FloatField,
+                              IntegerField, OuterRef, Subquery, Sum, Value,
+                              When)
+from django.db.models.functions import Coalesce
+
+from reviews.constants import SCORE_COUNT_FIELDS
+from reviews.models import Review, Title
+
+DEFAULTS = {
+    'PRIOR_MEAN': 5.5,
+    'PRIOR_WEIGHT': 10,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'WEIGHTED_RATING', {})}
+
+
+def weighted_rating(score_sum, score_count):
+    """SQL-выражение взвешенного рейтинга из выражений суммы и количества."""
+    config = get_config()
+    prior = config['PRIOR_WEIGHT'] * config['PRIOR_MEAN']
+    return ExpressionWrapper(
+        (Value(float(prior)) + score_sum)
+        / (Value(float(config['PRIOR_WEIGHT'])) + score_count),
+        output_field=FloatField()
+    )
+
+
+def average_rating():
+    """Средняя оценка из сохранённых суммы и количества (None без отзывов)."""
+    return Case(
+        When(score_count=0, then=Value(None)),
+        default=ExpressionWrapper(
+            F('score_sum') * Value(1.0) / F('score_count'),
+            output_field=FloatField()
+        ),
+        output_field=FloatField()
+    )
+
+
+def apply_score_change(title_id, old_score=None, new_score=None):
+    """
+    Учитывает появление (``old_score=None``), изменение или исчезновение
+    (``new_score=None``) оценки одним UPDATE без чтения строки.
+    """
+    sum_delta = (new_score or 0) - (old_score or 0)
+    count_delta = (new_score is not None) - (old_score is not None)
+    if not sum_delta and not count_delta:
+        return
+    new_sum = F('score_sum') + Value(sum_delta)
+    new_count = F('score_count') + Value(count_delta)
+    counters = {}
+    if old_score is not None:
+        field_name = SCORE_COUNT_FIELDS[old_score]
+        counters[field_name] = F(field_name) - Value(1)
+    if new_score is not None:
+        field_name = SCORE_COUNT_FIELDS[new_score]
+        counters[field_name] = F(field_name) + Value(1)
+    Title.objects.filter(pk=title_id).update(
+        **counters,
+        score_sum=new_sum,
+        score_count=new_count,
+        # В UPDATE справа стоят старые значения: отзывов не останется,
+        # если score_count == -count_delta.
+        weighted_rating=Case(
+            When(score_count=-count_delta, then=Value(None)),
+            default=weighted_rating(new_sum, new_count),
+            output_field=FloatField()
+        )
+    )
+
+
+def recalculate_ratings(title_ids=None):
+    """
+    Пересчитывает суммы, количества, распределения оценок и рейтинги по
+    таблице отзывов.
+    """
+    titles = Title.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+    reviews = Review.objects.filter(
+        title_id=OuterRef('pk')
+    ).order_by().values('title_id')
+    titles.update(
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total'),
+                     output_field=IntegerField()),
+            0
+        ),
+        score_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('id')).values('total'),
+                     output_field=IntegerField()),
+            0
+        ),
+        **{
+            field_name: Coalesce(
+                Subquery(
+                    reviews.filter(score=score).annotate(
+                        total=Count('id')
+                    ).values('total'),
+                    output_field=IntegerField()
+                ),
+                0
+            )
+            for score, field_name in SCORE_COUNT_FIELDS.items()
+        }
+    )
+    return titles.update(weighted_rating=Case(
+        When(score_count=0, then=Value(None)),
+        default=weighted_rating(F('score_sum'), F('score_count')),
+        output_field=FloatField()
+    ))
+
+
+def median_score(score_counts):
+    """Медиана по распределению {оценка: число отзывов}."""
+    total = sum(score_counts.values())
+    if not total:
+        return None
+    # Позиции средних элементов (одна при нечётном числе отзывов).
+    middle = {(total - 1) // 2, total // 2}
+    values = []
+    seen = 0
+    for score in sorted(score_counts):
+        count = score_counts[score]
+        values.extend(
+            score for position in middle if seen <= position < seen + count
+        )
+        seen += count
+    return sum(values) / len(values)
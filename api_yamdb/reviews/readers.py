@@ -0,0 +1,142 @@
+"""
+Потоковые читатели файлов для ``import_csv``.
+
+Читатель отдаёт строки файла как словари {колонка: значение} по одной, не
+распаковывая файл на диск. Сжатие определяется по сигнатуре первых байт
+(gzip, zstandard), формат — по расширению без суффикса сжатия
+(``review.csv.gz``, ``comments.ndjson.zst``) или явно, как для stdin.
+Новый формат добавляется в ``PARSERS`` и ``EXTENSIONS``, новое сжатие — в
+``DECOMPRESSORS``. Для ``.zst`` нужен необязательный пакет ``zstandard``.
+Повреждённый файл (обрыв сжатого потока, неверный CSV) даёт ``ValueError``
+с именем файла, как и остальные ошибки данных.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import zlib
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+STDIN = '-'
+
+
+def open_zstd(binary):
+    if zstandard is None:
+        raise ImproperlyConfigured(
+            'Для чтения файлов .zst установите пакет zstandard.'
+        )
+    return io.BufferedReader(
+        zstandard.ZstdDecompressor().stream_reader(binary)
+    )
+
+
+# Сигнатура → функция, распаковывающая двоичный поток на лету.
+DECOMPRESSORS = {
+    b'\x1f\x8b': lambda binary: gzip.GzipFile(fileobj=binary),
+    b'\x28\xb5\x2f\xfd': open_zstd,
+}
+COMPRESSED_SUFFIXES = ('', '.gz', '.zst')
+# Ошибки чтения повреждённого файла; gzip.BadGzipFile — это OSError.
+READ_ERRORS = (OSError, EOFError, zlib.error, csv.Error) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+def csv_rows(text):
+    yield from csv.DictReader(text)
+
+
+def ndjson_rows(text):
+    for line in text:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            # Строка без колонок будет отклонена проверкой.
+            yield {}
+            continue
+        yield {
+            column: '' if value is None else value
+            for column, value in row.items()
+        }
+
+
+PARSERS = {
+    'csv': csv_rows,
+    'ndjson': ndjson_rows,
+}
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+
+def detect_format(path):
+    stem, extension = os.path.splitext(path)
+    if extension in COMPRESSED_SUFFIXES:
+        extension = os.path.splitext(stem)[1]
+    if extension not in EXTENSIONS:
+        raise ValueError(f'Неизвестный формат файла {path}.')
+    return EXTENSIONS[extension]
+
+
+def find_input(directory, filename):
+    """
+    Путь к файлу ``filename`` (например, ``review.csv``) в каталоге в любом
+    поддерживаемом формате и сжатии или None.
+    """
+    stem = os.path.splitext(filename)[0]
+    for extension in EXTENSIONS:
+        for suffix in COMPRESSED_SUFFIXES:
+            path = os.path.join(directory, stem + extension + suffix)
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def decompressed(binary):
+    """Двоичный поток, распакованный по сигнатуре, или он же без сжатия."""
+    if not hasattr(binary, 'peek'):
+        binary = io.BufferedReader(binary)
+    head = binary.peek(4)[:4]
+    for magic, decompress in DECOMPRESSORS.items():
+        if head.startswith(magic):
+            return decompress(binary)
+    return binary
+
+
+def read_rows(path, file_format=None):
+    """
+    Строки файла ``path`` (``-`` — стандартный ввод) как словари.
+    ``file_format`` — ключ ``PARSERS``, по умолчанию по расширению.
+    """
+    parse = PARSERS[file_format or detect_format(path)]
+    if path == STDIN:
+        binary = sys.stdin.buffer
+    else:
+        binary = open(path, 'rb')
+    text = io.TextIOWrapper(
+        decompressed(binary), encoding='utf-8', newline=''
+    )
+    try:
+        yield from parse(text)
+    except READ_ERRORS as error:
+        name = 'stdin' if path == STDIN else path
+        raise ValueError(f'не удалось прочитать {name}: {error}') from error
+    finally:
+        if path == STDIN:
+            # Стандартный ввод не закрывается вместе с обёрткой.
+            text.detach()
+        else:
+            text.close()
+            binary.close()
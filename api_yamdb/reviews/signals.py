@@ -0,0 +1,93 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.counters import (change_comments_count, change_user_stats,
+                              repair_user_stats)
+from reviews.leaderboards import mark_pending
+from reviews.models import Comment, Review, Title
+from reviews.ratings import apply_score_change, recalculate_ratings
+
+
+def mark_leaderboard_pending(title_id):
+    mark_pending([title_id])
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    saved = getattr(instance, '_saved_rating_fields', None)
+    if instance.deleted_at is not None:
+        # Скрытый отзыв уже исключён из агрегатов (reviews.moderation).
+        pass
+    elif created:
+        apply_score_change(instance.title_id, new_score=instance.score)
+        change_user_stats(
+            instance.author_id, activity=instance.pub_date,
+            reviews_count=1, score_sum=instance.score
+        )
+    elif saved is None or None in saved:
+        # Исходная оценка неизвестна: пересчитываем по таблице.
+        recalculate_ratings([instance.title_id])
+        repair_user_stats([instance.author_id])
+    else:
+        if saved[0] != instance.title_id:
+            apply_score_change(saved[0], old_score=saved[1])
+            apply_score_change(instance.title_id, new_score=instance.score)
+            mark_leaderboard_pending(saved[0])
+        else:
+            apply_score_change(
+                instance.title_id, old_score=saved[1],
+                new_score=instance.score
+            )
+        change_user_stats(
+            instance.author_id, score_sum=instance.score - saved[1]
+        )
+    instance.remember_rating_fields()
+    mark_leaderboard_pending(instance.title_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    if instance.deleted_at is not None:
+        return
+    apply_score_change(instance.title_id, old_score=instance.score)
+    change_user_stats(
+        instance.author_id, reviews_count=-1, score_sum=-instance.score
+    )
+    mark_leaderboard_pending(instance.title_id)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, **kwargs):
+    mark_leaderboard_pending(instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, Title):
+        mark_leaderboard_pending(instance.pk)
+    else:
+        for title_id in pk_set or ():
+            mark_leaderboard_pending(title_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        change_comments_count(instance.review_id, 1)
+        change_user_stats(
+            instance.author_id, activity=instance.pub_date, comments_count=1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.deleted_at is not None:
+        return
+    change_comments_count(instance.review_id, -1)
+    if not Review.all_objects.filter(
+        pk=instance.review_id, deleted_at__isnull=False
+    ).exists():
+        # Комментарии к скрытому отзыву в UserStats не учитываются.
+        change_user_stats(instance.author_id, comments_count=-1)
@@ -0,0 +1,237 @@
+"""
+Бенчмарк секционирования отзывов по ``pub_date``.
+
+Одни и те же сгенерированные отзывы пишутся в таблицу ``reviews_review`` и
+в набор годовых секций, после чего замеряются скорость вставки и чтения
+в обоих вариантах. Чтение повторяет запросы ``ReviewViewSet``: первая
+страница отзывов произведения по ``pub_date`` и свежие отзывы за последний
+год, где секционирование может отбросить старые секции.
+
+Секции строятся так, как их пришлось бы строить в проекте:
+
+* PostgreSQL — декларативное секционирование ``PARTITION BY RANGE``;
+* SQLite — по таблице на год и представление ``UNION ALL`` поверх них,
+  вставка направляется в секцию по году.
+
+У секций те же индексы, что у ``reviews_review``, и пишет в оба варианта
+один ``DatabaseWriter``. Бенчмарк остался как инструмент для повторной
+оценки: модель ``Review`` не секционирована (см. README).
+
+    python -m benchmarks.bench_review_partitions --reviews 1000000
+"""
+import argparse
+import random
+import re
+import time
+
+from benchmarks.django_env import setup
+
+PAGE_SIZE = 5
+BATCH_SIZE = 10000
+PARTITIONED = 'bench_review_partitioned'
+
+
+def measure(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def seed(titles, reviews):
+    """Наполняет справочники, возвращает строки отзывов без записи в базу."""
+    from reviews.generators import DatabaseWriter, DataGenerator
+    from reviews.models import Comment, Review
+
+    sizes = {'categories': 10, 'genres': 50, 'users': 10000,
+             'titles': titles, 'reviews': reviews, 'comments': 0}
+    writer = DatabaseWriter(BATCH_SIZE)
+    review_rows = []
+    for model, rows in DataGenerator(sizes).tables():
+        if model is Review:
+            review_rows = list(rows)
+        elif model is not Comment:
+            writer.write(model, rows)
+    return review_rows
+
+
+class Partitions:
+    """
+    Годовые секции отзывов в текущей базе с теми же индексами, что у
+    ``reviews_review``, чтобы вставка сравнивалась честно.
+    """
+
+    def __init__(self, years):
+        from django.db import connection
+
+        from reviews.generators import COLUMNS
+        from reviews.models import Review
+
+        self.connection = connection
+        self.years = years
+        self.native = connection.vendor == 'postgresql'
+        self.pub_date_index = COLUMNS[Review].index('pub_date')
+
+    def table(self, year):
+        return f'{PARTITIONED}_{year}'
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            if self.native:
+                self.create_native(cursor)
+                return
+            cursor.execute(
+                "SELECT sql FROM sqlite_master WHERE tbl_name = "
+                "'reviews_review' AND sql IS NOT NULL"
+            )
+            schema = [sql for sql, in cursor.fetchall()]
+            for year in self.years:
+                table = self.table(year)
+                for sql in schema:
+                    # Имена индексов уникальны на всю базу.
+                    sql = re.sub(r'INDEX "(\w+)"', rf'INDEX "{table}_\1"',
+                                 sql)
+                    cursor.execute(
+                        sql.replace('"reviews_review"', f'"{table}"')
+                    )
+            cursor.execute(
+                f'CREATE VIEW {PARTITIONED} AS ' + ' UNION ALL '.join(
+                    f'SELECT * FROM {self.table(year)}' for year in self.years
+                )
+            )
+
+    def create_native(self, cursor):
+        # Первичный ключ и уникальность секционированной таблицы обязаны
+        # включать pub_date, а внешние ключи на неё по одному id
+        # невозможны — поэтому модель Review не секционирована.
+        cursor.execute(
+            f'CREATE TABLE {PARTITIONED} (LIKE reviews_review INCLUDING '
+            'DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (pub_date)'
+        )
+        for year in self.years:
+            cursor.execute(
+                f'CREATE TABLE {self.table(year)} PARTITION OF '
+                f"{PARTITIONED} FOR VALUES FROM ('{year}-01-01') "
+                f"TO ('{year + 1}-01-01')"
+            )
+        for sql in (
+            'ALTER TABLE {table} ADD PRIMARY KEY (id, pub_date)',
+            'CREATE UNIQUE INDEX {table}_title_author ON {table} '
+            '(title_id, author_id, pub_date) WHERE deleted_at IS NULL',
+            'CREATE INDEX {table}_author ON {table} (author_id)',
+            'CREATE INDEX {table}_title ON {table} (title_id)',
+            'CREATE INDEX {table}_pub_date ON {table} (pub_date)',
+            'CREATE INDEX {table}_visible ON {table} (title_id, pub_date) '
+            'WHERE deleted_at IS NULL',
+            'CREATE INDEX {table}_hidden ON {table} (deleted_at) '
+            'WHERE deleted_at IS NOT NULL',
+        ):
+            cursor.execute(sql.format(table=PARTITIONED))
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            if self.native:
+                cursor.execute(f'DROP TABLE {PARTITIONED}')
+                return
+            cursor.execute(f'DROP VIEW {PARTITIONED}')
+            for year in self.years:
+                cursor.execute(f'DROP TABLE {self.table(year)}')
+
+    def write(self, writer, rows):
+        """
+        Пишет тем же ``DatabaseWriter``, что и в ``reviews_review``: в
+        PostgreSQL строки по секциям разносит сама база, в SQLite — по
+        году ``pub_date``.
+        """
+        from reviews.models import Review
+
+        if self.native:
+            writer.write(Review, rows, table=PARTITIONED)
+            return
+        by_year = {}
+        for row in rows:
+            by_year.setdefault(row[self.pub_date_index].year, []).append(row)
+        for year, year_rows in by_year.items():
+            writer.write(Review, year_rows, table=self.table(year))
+
+
+def read_queries(source, title_ids, since, repeat):
+    """Время на запрос (мс): первая страница и свежие отзывы."""
+    from django.db import connection
+
+    page_sql = (f'SELECT id FROM {source} WHERE title_id = %s '
+                'AND deleted_at IS NULL ORDER BY pub_date '
+                f'LIMIT {PAGE_SIZE}')
+    recent_sql = (f'SELECT id FROM {source} WHERE title_id = %s '
+                  'AND deleted_at IS NULL AND pub_date >= %s '
+                  f'ORDER BY pub_date DESC LIMIT {PAGE_SIZE}')
+    since = connection.ops.adapt_datetimefield_value(since)
+
+    def run(sql, extra):
+        with connection.cursor() as cursor:
+            for title_id in title_ids:
+                cursor.execute(sql, [title_id, *extra])
+                cursor.fetchall()
+
+    return tuple(
+        measure(lambda: run(sql, extra), repeat) / len(title_ids) * 1000
+        for sql, extra in ((page_sql, ()), (recent_sql, (since,)))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=10000)
+    parser.add_argument('--reviews', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=1000,
+                        help='Запросов чтения на замер.')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup()
+    from datetime import timedelta
+
+    from django.db import connection
+    from django.utils import timezone
+
+    from reviews.generators import DatabaseWriter
+    from reviews.models import Review
+
+    started = time.perf_counter()
+    rows = seed(args.titles, args.reviews)
+    print(f'Данные созданы за {time.perf_counter() - started:.1f} с, '
+          f'отзывов: {len(rows)}, база: {connection.vendor}')
+    if not rows:
+        return
+    pub_date = Partitions([]).pub_date_index
+    years = sorted({row[pub_date].year for row in rows})
+    partitions = Partitions(years)
+    partitions.create()
+
+    writer = DatabaseWriter(BATCH_SIZE)
+    inserts = {}
+    started = time.perf_counter()
+    writer.write(Review, rows)
+    inserts['reviews_review'] = time.perf_counter() - started
+    started = time.perf_counter()
+    partitions.write(writer, rows)
+    inserts[PARTITIONED] = time.perf_counter() - started
+
+    rnd = random.Random(0)
+    # Выбор по строкам отзывов: популярные произведения читаются чаще.
+    title_ids = [rnd.choice(rows)[1] for _ in range(args.queries)]
+    since = timezone.now() - timedelta(days=365)
+    print(f'{"хранение":<28}{"вставка, строк/с":>18}'
+          f'{"страница, мс":>15}{"за год, мс":>13}')
+    for source, elapsed in inserts.items():
+        page, recent = read_queries(source, title_ids, since, args.repeat)
+        print(f'{source:<28}{len(rows) / elapsed:>18.0f}'
+              f'{page:>15.3f}{recent:>13.3f}')
+    print(f'секций: {len(years)} ({years[0]}–{years[-1]})')
+    partitions.drop()
+
+
+if __name__ == '__main__':
+    main()
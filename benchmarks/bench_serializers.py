@@ -0,0 +1,105 @@
+"""
+Микробенчмарк сериализаторов списков.
+
+Сравнивает стоимость одного объекта у ``TitleSerializer``,
+``ReviewSerializer``, ``CommentSerializer`` и их облегчённых аналогов
+из ``api.fast_serializers``. Запросы к базе в замер не входят.
+
+    python -m benchmarks.bench_serializers --objects 1000 --repeat 5
+"""
+import argparse
+import random
+import time
+
+from benchmarks.django_env import setup
+
+
+def seed(objects):
+    from reviews.models import Category, Comment, Genre, Review, Title, User
+
+    # Идентификаторы задаются явно: SQLite не возвращает их из bulk_create.
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genres = Genre.objects.bulk_create(
+        Genre(id=i, name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(1, 6)
+    )
+    users = User.objects.bulk_create(
+        User(id=i, username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(1, objects + 1)
+    )
+    titles = Title.objects.bulk_create(
+        Title(id=i, name=f'Произведение {i}', year=2000, category=category,
+              description='Описание')
+        for i in range(1, objects + 1)
+    )
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title_id=title.id, genre_id=genre.id)
+        for title in titles
+        for genre in random.sample(genres, 2)
+    )
+    reviews = Review.objects.bulk_create(
+        Review(id=user.id, title=titles[0], author=user, text='Текст отзыва',
+               score=random.randint(1, 10))
+        for user in users
+    )
+    Comment.objects.bulk_create(
+        Comment(review=reviews[0], author=user, text='Текст комментария')
+        for user in users
+    )
+
+
+def measure(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--objects', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+    from django.db.models import Avg
+
+    from api.fast_serializers import (FastCommentSerializer,
+                                      FastReviewSerializer,
+                                      FastTitleSerializer)
+    from api.serializers import (CommentSerializer, ReviewSerializer,
+                                 TitleSerializer)
+    from reviews.models import Comment, Review, Title
+
+    seed(args.objects)
+    cases = (
+        ('titles', TitleSerializer, FastTitleSerializer,
+         Title.objects.annotate(rating=Avg('reviews__score'))
+         .prefetch_related('genre').select_related('category')),
+        ('reviews', ReviewSerializer, FastReviewSerializer,
+         Review.objects.select_related('author')),
+        ('comments', CommentSerializer, FastCommentSerializer,
+         Comment.objects.select_related('author')),
+    )
+    print(f'{"endpoint":<10}{"drf, мкс/объект":>18}'
+          f'{"fast, мкс/объект":>18}{"ускорение":>12}')
+    for name, serializer, fast_serializer, queryset in cases:
+        instances = list(queryset)
+        rows = list(fast_serializer.values(queryset))
+        count = len(instances)
+        slow = measure(
+            lambda: serializer(instances, many=True).data, args.repeat
+        )
+        # Запрос жанров у FastTitleSerializer входит в замер: он
+        # выполняется на каждой странице.
+        fast = measure(
+            lambda: fast_serializer.to_representation(rows), args.repeat
+        )
+        print(f'{name:<10}{slow / count * 1e6:>18.2f}'
+              f'{fast / count * 1e6:>18.2f}{slow / fast:>11.1f}x')
+
+
+if __name__ == '__main__':
+    main()
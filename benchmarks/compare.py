@@ -0,0 +1,38 @@
+"""
+Сравнение двух прогонов ``benchmarks.run``.
+
+    python -m benchmarks.compare benchmarks/results/old.json new.json
+"""
+import argparse
+import json
+from pathlib import Path
+
+METRICS = ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms')
+
+
+def change(old, new):
+    if not old or new is None:
+        return '   n/a'
+    return f'{(new - old) / old * 100:+6.1f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('base', type=Path)
+    parser.add_argument('head', type=Path)
+    args = parser.parse_args()
+
+    base = json.loads(args.base.read_text())
+    head = json.loads(args.head.read_text())
+    print(f'{base["commit"]} -> {head["commit"]}')
+    print(f'{"сценарий":<16}' + ''.join(f'{name:>16}' for name in METRICS))
+    for name, new in head['results'].items():
+        old = base['results'].get(name, {})
+        print(f'{name:<16}' + ''.join(
+            f'{new[metric]:>9.1f}{change(old.get(metric), new[metric])}'
+            for metric in METRICS
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+"""Подготовка окружения Django для скриптов бенчмарков."""
+import os
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+PROJECT_DIR = ROOT_DIR / 'api_yamdb'
+
+
+def setup(test_db=True):
+    """
+    Настраивает Django. При ``test_db=True`` создаёт отдельную тестовую
+    базу, чтобы бенчмарк не трогал данные разработчика.
+    """
+    if str(PROJECT_DIR) not in sys.path:
+        sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+    import django
+    django.setup()
+
+    if test_db:
+        from django.db import connection
+        from django.test.utils import setup_test_environment
+
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
@@ -0,0 +1,297 @@
+"""
+Нагрузочный бенчмарк API.
+
+Наполняет базу синтетическими данными и прогоняет основные эндпоинты:
+список произведений с фильтрами, страницы отзывов и комментариев,
+регистрацию и получение токена. Для каждого сценария считает пропускную
+способность и задержки p50/p95/p99 и сохраняет результат в JSON.
+
+Через тестовый клиент Django на отдельной тестовой базе:
+
+    python -m benchmarks.run --requests 200
+
+Против запущенного сервера (база сервера наполняется с ``--seed``):
+
+    python -m benchmarks.run --target http://127.0.0.1:8000 --seed
+
+Сравнение двух прогонов: ``python -m benchmarks.compare old.json new.json``.
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks import django_env
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(percent / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True, text=True, check=True,
+            cwd=django_env.ROOT_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+class ClientTransport:
+    """Запросы через тестовый клиент Django, без сети."""
+
+    concurrency = 1
+
+    def __init__(self):
+        from django.test import Client
+        self.client = Client()
+
+    def request(self, method, path, data=None):
+        if method == 'GET':
+            response = self.client.get(path, data)
+        else:
+            response = self.client.post(
+                path, json.dumps(data), content_type='application/json'
+            )
+        return response.status_code
+
+
+class HttpTransport:
+    """
+    Запросы по HTTP к запущенному серверу. ``requests.Session`` не
+    потокобезопасен, поэтому у каждого потока пула своя сессия.
+    """
+
+    def __init__(self, base_url, concurrency):
+        import requests
+        self.session_class = requests.Session
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.local = threading.local()
+
+    @property
+    def session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = self.session_class()
+        return session
+
+    def request(self, method, path, data=None):
+        url = self.base_url + path
+        if method == 'GET':
+            response = self.session.get(url, params=data)
+        else:
+            response = self.session.post(url, json=data)
+        return response.status_code
+
+
+def build_scenarios(sizes, rnd):
+    """Сценарий — функция, возвращающая (метод, путь, данные)."""
+    from django.db.models import Count
+
+    from reviews.models import Comment, Review, User
+
+    titles = sizes['titles']
+    reviewed = list(
+        Review.objects.values_list('title_id').annotate(count=Count('id'))
+        .order_by('title_id')[:1000]
+    )
+    commented = list(
+        Comment.objects.values_list('review_id', 'review__title_id')
+        .distinct()[:1000]
+    )
+    users = list(
+        User.objects.exclude(confirmation_code=None)
+        .values_list('username', 'confirmation_code')[:1000]
+    )
+    page_size = 5
+
+    def title_page():
+        return 'GET', '/api/v1/titles/', {
+            'page': rnd.randint(1, max(1, titles // page_size))
+        }
+
+    def title_filtered():
+        params = rnd.choice((
+            {'genre': f'genre-{rnd.randint(1, sizes["genres"])}'},
+            {'category': f'category-{rnd.randint(1, sizes["categories"])}'},
+            {'year': rnd.randint(1950, 2020)},
+            {'name': str(rnd.randint(1, 99))},
+        ))
+        return 'GET', '/api/v1/titles/', params
+
+    def review_page():
+        title_id, count = rnd.choice(reviewed)
+        return 'GET', f'/api/v1/titles/{title_id}/reviews/', {
+            'page': rnd.randint(1, (count - 1) // page_size + 1)
+        }
+
+    def comment_page():
+        review_id, title_id = rnd.choice(commented)
+        return 'GET', (
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        ), None
+
+    def signup():
+        name = f'bench_{uuid.uuid4().hex[:12]}'
+        return 'POST', '/api/v1/auth/signup/', {
+            'username': name, 'email': f'{name}@yamdb.fake'
+        }
+
+    def token():
+        username, code = rnd.choice(users)
+        return 'POST', '/api/v1/auth/token/', {
+            'username': username, 'confirmation_code': code
+        }
+
+    scenarios = {
+        'titles_list': title_page,
+        'titles_filtered': title_filtered,
+        'signup': signup,
+        'token': token,
+    }
+    if reviewed:
+        scenarios['review_page'] = review_page
+    if commented:
+        scenarios['comment_page'] = comment_page
+    return scenarios
+
+
+def run_scenario(transport, make_request, requests_count, warmup):
+    for _ in range(warmup):
+        transport.request(*make_request())
+
+    def timed_request(_):
+        method, path, data = make_request()
+        start = time.perf_counter()
+        status = transport.request(method, path, data)
+        return time.perf_counter() - start, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=transport.concurrency) as pool:
+        samples = list(pool.map(timed_request, range(requests_count)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in samples)
+    errors = sum(1 for _, status in samples if status >= 400)
+    result = {
+        'requests': requests_count,
+        'errors': errors,
+        'throughput_rps': requests_count / elapsed if elapsed else None,
+        'mean_ms': sum(latencies) / len(latencies) * 1000,
+    }
+    for percent in PERCENTILES:
+        result[f'p{percent}_ms'] = percentile(latencies, percent) * 1000
+    return result
+
+
+def print_report(results):
+    print(f'{"сценарий":<16}{"rps":>10}{"p50, мс":>10}'
+          f'{"p95, мс":>10}{"p99, мс":>10}{"ошибки":>8}')
+    for name, result in results.items():
+        print(f'{name:<16}{result["throughput_rps"]:>10.1f}'
+              f'{result["p50_ms"]:>10.2f}{result["p95_ms"]:>10.2f}'
+              f'{result["p99_ms"]:>10.2f}{result["errors"]:>8}')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--target', default='client',
+                        help='`client` или базовый URL сервера.')
+    parser.add_argument('--seed', action='store_true',
+                        help='Наполнить базу сервера (для --target URL).')
+    parser.add_argument('--random-seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Запросов на сценарий.')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Параллельных запросов для --target URL.')
+    parser.add_argument('--scenarios', nargs='*',
+                        help='Запустить только указанные сценарии.')
+    parser.add_argument('--output', type=Path,
+                        help='Файл результатов, по умолчанию '
+                             'benchmarks/results/<commit>.json.')
+    from benchmarks.seed import DEFAULT_SIZES
+    for name, value in DEFAULT_SIZES.items():
+        parser.add_argument(f'--{name}', type=int, default=value)
+    args = parser.parse_args()
+    for name in ('requests', 'concurrency'):
+        if getattr(args, name) < 1:
+            parser.error(f'--{name} должно быть не меньше 1.')
+    if args.warmup < 0:
+        parser.error('--warmup не может быть отрицательным.')
+    return args
+
+
+def main():
+    args = parse_args()
+    from benchmarks.seed import DEFAULT_SIZES
+
+    in_process = args.target == 'client'
+    django_env.setup(test_db=in_process)
+    from django.conf import settings
+    from django.test.utils import override_settings
+
+    sizes = {name: getattr(args, name) for name in DEFAULT_SIZES}
+    with override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+    ):
+        if in_process or args.seed:
+            from benchmarks.seed import seed
+            started = time.perf_counter()
+            sizes = seed(sizes, args.random_seed)
+            print(f'Данные созданы за {time.perf_counter() - started:.1f} с')
+        transport = (
+            ClientTransport() if in_process
+            else HttpTransport(args.target, args.concurrency)
+        )
+        rnd = random.Random(args.random_seed)
+        scenarios = build_scenarios(sizes, rnd)
+        if args.scenarios:
+            scenarios = {
+                name: scenarios[name] for name in args.scenarios
+            }
+        results = {
+            name: run_scenario(transport, make_request, args.requests,
+                               args.warmup)
+            for name, make_request in scenarios.items()
+        }
+    print_report(results)
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'target': args.target,
+        'concurrency': transport.concurrency,
+        'database': settings.DATABASES['default']['ENGINE'],
+        'python': platform.python_version(),
+        'dataset': sizes,
+        'results': results,
+    }
+    output = args.output or RESULTS_DIR / f'{commit}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f'Результаты сохранены в {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""Наполнение базы синтетическими данными для бенчмарков."""
+DEFAULT_SIZES = {
+    'categories': 5,
+    'genres': 20,
+    'users': 1000,
+    'titles': 1000,
+    'reviews': 20000,
+    'comments': 20000,
+}
+BATCH_SIZE = 10000
+
+
+def seed(sizes=None, seed_value=0):
+    """
+    Наполняет пустую базу генератором ``generate_data`` (степенное
+    распределение отзывов и комментариев). Возвращает фактические размеры.
+    """
+    from reviews.generators import DatabaseWriter, DataGenerator
+    from reviews.counters import repair_comments_count, repair_user_stats
+    from reviews.models import Review
+    from reviews.ratings import recalculate_ratings
+
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    generator = DataGenerator(sizes, seed=seed_value)
+    writer = DatabaseWriter(BATCH_SIZE)
+    for model, rows in generator.tables():
+        writer.write(model, rows)
+    recalculate_ratings()
+    repair_comments_count()
+    repair_user_stats()
+    return {**sizes, 'reviews': Review.objects.count()}
@@ -0,0 +1,79 @@
+import pytest
+from django.db.models import Avg
+from rest_framework.renderers import JSONRenderer
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08FastSerializers:
+
+    @staticmethod
+    def render(data):
+        return JSONRenderer().render(data)
+
+    def test_01_title_parity(self, admin_client, admin, user_client, user):
+        from api.fast_serializers import FastTitleSerializer
+        from api.serializers import TitleSerializer
+        from reviews.models import Category, Title
+
+        create_comments(admin_client, {admin: admin_client, user: user_client})
+        Category.objects.filter(slug='books').delete()
+        queryset = Title.objects.annotate(
+            rating=Avg('reviews__score')
+        ).order_by('-rating', 'id')
+
+        expected = self.render(TitleSerializer(queryset, many=True).data)
+        fast = self.render(FastTitleSerializer.to_representation(
+            FastTitleSerializer.values(queryset)
+        ))
+        assert fast == expected, (
+            'Проверьте, что `FastTitleSerializer` возвращает те же данные, '
+            'что и `TitleSerializer`, байт в байт.'
+        )
+
+    def test_02_review_and_comment_parity(self, admin_client, admin,
+                                          user_client, user):
+        from api.fast_serializers import (FastCommentSerializer,
+                                          FastReviewSerializer)
+        from api.serializers import CommentSerializer, ReviewSerializer
+        from reviews.models import Comment, Review
+
+        create_comments(admin_client, {admin: admin_client, user: user_client})
+        for model, serializer, fast_serializer in (
+            (Review, ReviewSerializer, FastReviewSerializer),
+            (Comment, CommentSerializer, FastCommentSerializer),
+        ):
+            queryset = model.objects.all()
+            expected = self.render(serializer(queryset, many=True).data)
+            fast = self.render(fast_serializer.to_representation(
+                fast_serializer.values(queryset)
+            ))
+            assert fast == expected, (
+                f'Проверьте, что `{fast_serializer.__name__}` возвращает те '
+                f'же данные, что и `{serializer.__name__}`, байт в байт.'
+            )
+
+    def test_03_list_endpoints_use_fast_path(self, client, admin_client,
+                                             admin, user_client, user):
+        from api.serializers import CommentSerializer, ReviewSerializer
+        from reviews.models import Comment, Review
+
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        for url, serializer, queryset in (
+            (f'/api/v1/titles/{title_id}/reviews/', ReviewSerializer,
+             Review.objects.filter(title_id=title_id)),
+            (f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+             CommentSerializer, Comment.objects.filter(review_id=review_id)),
+        ):
+            response = client.get(url)
+            assert response.json()['results'] == (
+                serializer(queryset, many=True).data
+            ), (
+                f'Проверьте, что GET-запрос к `{url}` возвращает те же '
+                'данные, что и стандартный сериализатор.'
+            )
@@ -0,0 +1,91 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+
+from tests.utils import create_comments
+
+PROFILING_ON = {'ENABLED': True, 'SAMPLE_RATE': 1.0,
+                'DUPLICATE_QUERY_THRESHOLD': 2}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09Profiling:
+
+    PROFILING_URL = '/api/v1/profiling/'
+
+    def test_01_disabled_by_default(self, client):
+        response = client.get('/api/v1/titles/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что по умолчанию профилирование выключено и '
+            'заголовок `Server-Timing` не добавляется.'
+        )
+
+    def test_02_server_timing_and_routes(self, client, admin_client, admin,
+                                         user_client, user):
+        from api.profiling import store
+
+        _, _, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        store.reset()
+        with override_settings(PROFILING=PROFILING_ON):
+            response = client.get('/api/v1/titles/')
+            client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert 'db;dur=' in response.get('Server-Timing', ''), (
+            'Проверьте, что при включённом профилировании ответ содержит '
+            'заголовок `Server-Timing` с временем SQL-запросов.'
+        )
+
+        response = admin_client.get(self.PROFILING_URL)
+        assert response.status_code == HTTPStatus.OK
+        routes = response.json()['routes']
+        assert routes['title-list']['count'] == 1, (
+            f'Проверьте, что `{self.PROFILING_URL}` возвращает агрегаты по '
+            'именам маршрутов.'
+        )
+        assert routes['title-list']['sql_count'] > 0
+        assert routes['title-list']['response_bytes'] > 0
+        assert 'title-detail' in routes
+
+    def test_03_duplicate_queries_flagged(self, client, admin_client, admin,
+                                          user_client, user):
+        from api.profiling import record_queries
+        from api.serializers import TitleSerializer
+        from reviews.models import Title
+
+        create_comments(admin_client, {admin: admin_client, user: user_client})
+        with record_queries() as queries:
+            TitleSerializer(Title.objects.all(), many=True).data
+        assert queries.duplicates(2), (
+            'Проверьте, что повторяющиеся запросы (N+1) обнаруживаются.'
+        )
+
+    def test_04_staff_only(self, client, user_client):
+        assert client.get(self.PROFILING_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        assert user_client.get(self.PROFILING_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+
+    def test_05_serializer_time_for_all_actions(self, client, admin_client,
+                                                admin, user_client, user):
+        from api.profiling import store
+
+        _, _, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        store.reset()
+        with override_settings(PROFILING=PROFILING_ON):
+            client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+            client.get(f'/api/v1/titles/{titles[0]["id"]}/page/')
+            admin_client.post('/api/v1/categories/', data={
+                'name': 'Книги', 'slug': 'books'
+            })
+        routes = store.snapshot()['routes']
+        for route in ('title-detail', 'title-page', 'category-list'):
+            assert routes[route]['serializer_ms'] > 0, (
+                'Проверьте, что время сериализации учитывается не только '
+                f'в быстрых списках: маршрут `{route}`.'
+            )
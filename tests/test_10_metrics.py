@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+from django.test import override_settings
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10Metrics:
+
+    METRICS_URL = '/metrics'
+
+    @pytest.fixture(autouse=True)
+    def enable_metrics(self, settings):
+        settings.METRICS = {**settings.METRICS, 'ENABLED': True,
+                            'TOKEN': None}
+
+    def test_01_metrics_by_route(self, client):
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/0/')
+        response = client.get(self.METRICS_URL)
+        assert response.status_code == 200, (
+            f'Проверьте, что эндпоинт `{self.METRICS_URL}` доступен.'
+        )
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert (
+            'yamdb_http_requests_total{route="title-list",method="GET",'
+            'status="200"}'
+        ) in text, (
+            'Проверьте, что количество запросов считается по именам '
+            'маршрутов DRF.'
+        )
+        assert 'status="404"' in text
+        assert (
+            'yamdb_http_request_duration_seconds_bucket{route="title-list",'
+            'le="+Inf"}'
+        ) in text
+        assert 'yamdb_db_queries_per_request_count{route="title-list"}' in (
+            text
+        )
+
+    def test_02_multiprocess_merge(self, client, tmp_path):
+        from api.metrics import registry
+
+        other = {'yamdb_cache_requests_total': [[['facets', 'hit'], 7]]}
+        with open(os.path.join(tmp_path, 'metrics_999999.json'), 'w') as f:
+            json.dump(other, f)
+        with override_settings(METRICS={'ENABLED': True,
+                                        'MULTIPROCESS_DIR': str(tmp_path),
+                                        'FLUSH_INTERVAL': 0}):
+            client.get('/api/v1/titles/')
+            text = client.get(self.METRICS_URL).content.decode()
+        assert (
+            'yamdb_cache_requests_total{cache="facets",result="hit"} 7'
+        ) in text, (
+            'Проверьте, что метрики других процессов из общего каталога '
+            'суммируются.'
+        )
+        assert os.path.exists(registry.process_file(str(tmp_path))), (
+            'Проверьте, что процесс сохраняет свои метрики в общий каталог.'
+        )
+
+    def test_03_counts_queries_without_normalizing(self, client,
+                                                   monkeypatch):
+        from api import profiling
+        from api.metrics import DB_QUERIES
+
+        def normalize_sql(sql):
+            raise AssertionError('Метрикам не нужен разбор SQL.')
+
+        monkeypatch.setattr(profiling, 'normalize_sql', normalize_sql)
+        key = ('title-list',)
+        before = DB_QUERIES.values.get(key, [0])[-1]
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200, (
+            'Проверьте, что `MetricsMiddleware` только считает SQL-запросы '
+            'и их время, не нормализуя текст каждого запроса.'
+        )
+        assert DB_QUERIES.values[key][-1] == before + 1
+
+    def test_04_access(self, client, settings):
+        from api.metrics import DEFAULTS
+
+        assert DEFAULTS['ENABLED'] is False, (
+            'Проверьте, что метрики по умолчанию выключены.'
+        )
+        settings.METRICS = {}
+        assert client.get(self.METRICS_URL).status_code == 404
+        settings.METRICS = {'ENABLED': True, 'TOKEN': 'secret'}
+        assert client.get(self.METRICS_URL).status_code == 403, (
+            'Проверьте, что с `METRICS["TOKEN"]` метрики недоступны без '
+            'токена.'
+        )
+        assert client.get(
+            self.METRICS_URL, HTTP_AUTHORIZATION='Bearer wrong'
+        ).status_code == 403
+        assert client.get(
+            self.METRICS_URL, HTTP_AUTHORIZATION='Bearer secret'
+        ).status_code == 200
@@ -0,0 +1,116 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11Leaderboards:
+
+    TOP_URL = '/api/v1/titles/top/'
+    TRENDING_URL = '/api/v1/titles/trending/'
+
+    def test_01_top_and_trending(self, client, admin_client, admin,
+                                 user_client, user):
+        titles, categories, genres = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Хорошо', 6)
+        create_single_review(user_client, titles[0]['id'], 'Неплохо', 6)
+        create_single_review(admin_client, titles[1]['id'], 'Отлично', 9)
+        call_command('refresh_leaderboards', '--full')
+
+        response = client.get(self.TOP_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что эндпоинт `{self.TOP_URL}` доступен.'
+        )
+        assert [entry['id'] for entry in response.json()] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            f'Проверьте, что `{self.TOP_URL}` упорядочивает произведения '
+            'по взвешенному рейтингу.'
+        )
+        response = client.get(
+            self.TOP_URL, {'category': categories[0]['slug']}
+        )
+        assert [entry['id'] for entry in response.json()] == [
+            titles[0]['id']
+        ]
+        response = client.get(self.TOP_URL, {'genre': genres[2]['slug']})
+        assert response.json()[0] == {
+            'rank': 1, 'id': titles[1]['id'], 'name': titles[1]['name'],
+            'year': titles[1]['year'], 'score': pytest.approx((55 + 9) / 11),
+            'reviews_count': 1
+        }
+
+        response = client.get(self.TRENDING_URL, {'days': 7})
+        assert response.json()[0]['id'] == titles[0]['id'], (
+            f'Проверьте, что `{self.TRENDING_URL}` упорядочивает '
+            'произведения по числу отзывов за период.'
+        )
+        assert client.get(self.TRENDING_URL, {'days': 5}).status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+
+    def test_02_incremental_refresh(self, client, admin_client, admin,
+                                    user_client, user, moderator_client):
+        from reviews.models import LeaderboardPendingTitle
+
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Хорошо', 6)
+        create_single_review(admin_client, titles[1]['id'], 'Отлично', 9)
+        call_command('refresh_leaderboards', '--full')
+        assert not LeaderboardPendingTitle.objects.exists()
+
+        create_single_review(user_client, titles[0]['id'], 'Шедевр', 10)
+        create_single_review(moderator_client, titles[0]['id'], 'Шедевр', 10)
+        assert LeaderboardPendingTitle.objects.count() == 1, (
+            'Проверьте, что новый отзыв помечает произведение для '
+            'пересчёта рейтинга.'
+        )
+        call_command('refresh_leaderboards')
+        response = client.get(self.TOP_URL)
+        assert [entry['id'] for entry in response.json()] == [
+            titles[0]['id'], titles[1]['id']
+        ]
+        assert response.json()[0]['reviews_count'] == 3
+        assert not LeaderboardPendingTitle.objects.exists()
+
+    def test_03_incremental_refresh_drop_from_full_board(
+            self, client, admin_client, admin, settings):
+        from reviews.models import Review
+
+        settings.LEADERBOARDS = {'SIZE': 1, 'TRENDING_DAYS': (7,)}
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Хорошо', 9)
+        create_single_review(admin_client, titles[1]['id'], 'Неплохо', 6)
+        call_command('refresh_leaderboards', '--full')
+        assert client.get(self.TOP_URL).json()[0]['id'] == titles[0]['id']
+
+        review = Review.objects.get(title_id=titles[0]['id'])
+        review.score = 1
+        review.save()
+        call_command('refresh_leaderboards')
+        assert client.get(self.TOP_URL).json()[0]['id'] == titles[1]['id'], (
+            'Проверьте, что при падении оценки произведения из заполненного '
+            'рейтинга его место занимает следующее произведение.'
+        )
+
+    @pytest.mark.parametrize('limit', ('-1', '0', 'abc'))
+    def test_04_invalid_limit(self, client, limit):
+        response = client.get(self.TOP_URL, {'limit': limit})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что `{self.TOP_URL}` отклоняет `limit` меньше 1 '
+            'и не целые значения.'
+        )
+        assert 'limit' in response.json()
+
+    def test_05_limit(self, client, admin_client, admin):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Хорошо', 9)
+        create_single_review(admin_client, titles[1]['id'], 'Неплохо', 6)
+        call_command('refresh_leaderboards', '--full')
+        response = client.get(self.TOP_URL, {'limit': 1})
+        assert [entry['id'] for entry in response.json()] == [
+            titles[0]['id']
+        ]
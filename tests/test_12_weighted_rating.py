@@ -0,0 +1,139 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12WeightedRating:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @staticmethod
+    def stored(title_id):
+        from reviews.models import Title
+
+        return Title.objects.values_list(
+            'score_sum', 'score_count', 'weighted_rating'
+        ).get(id=title_id)
+
+    def test_01_incremental_maintenance(self, admin_client, admin,
+                                        user_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert self.stored(title_id) == (0, 0, None)
+
+        review = create_single_review(admin_client, title_id, 'Хорошо', 6)
+        create_single_review(user_client, title_id, 'Отлично', 10)
+        score_sum, score_count, weighted = self.stored(title_id)
+        assert (score_sum, score_count) == (16, 2), (
+            'Проверьте, что новый отзыв увеличивает сумму и количество '
+            'оценок произведения.'
+        )
+        assert weighted == pytest.approx((55 + 16) / 12)
+
+        review_url = (
+            f'{self.TITLES_URL}{title_id}/reviews/{review.json()["id"]}/'
+        )
+        admin_client.patch(review_url, data={'score': 8})
+        assert self.stored(title_id)[:2] == (18, 2), (
+            'Проверьте, что изменение оценки обновляет сумму оценок.'
+        )
+        response = admin_client.get(f'{self.TITLES_URL}{title_id}/')
+        assert response.json()['rating'] == 9
+
+        admin_client.delete(review_url)
+        assert self.stored(title_id) == (
+            10, 1, pytest.approx((55 + 10) / 11)
+        )
+        user_review = admin_client.get(
+            f'{self.TITLES_URL}{title_id}/reviews/'
+        ).json()['results'][0]
+        admin_client.delete(
+            f'{self.TITLES_URL}{title_id}/reviews/{user_review["id"]}/'
+        )
+        assert self.stored(title_id) == (0, 0, None), (
+            'Проверьте, что после удаления всех отзывов рейтинг '
+            'произведения сбрасывается.'
+        )
+
+    def test_02_ordering(self, client, admin_client, admin, user_client,
+                         user, moderator_client, moderator):
+        titles, _, _ = create_titles(admin_client)
+        # Одна оценка 10 против трёх оценок 9: средняя выше у первого,
+        # взвешенный рейтинг — у второго.
+        create_single_review(admin_client, titles[0]['id'], 'Шедевр', 10)
+        for client_ in (admin_client, user_client, moderator_client):
+            create_single_review(client_, titles[1]['id'], 'Отлично', 9)
+
+        response = client.get(self.TITLES_URL,
+                              {'ordering': '-weighted_rating'})
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            'Проверьте, что `ordering=-weighted_rating` упорядочивает '
+            'произведения по взвешенному рейтингу.'
+        )
+        response = client.get(self.TITLES_URL, {'ordering': '-rating'})
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id'], titles[1]['id']
+        ]
+
+    def test_03_recalculate_command(self, admin_client, admin):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Хорошо', 7)
+        Title.objects.update(score_sum=0, score_count=0, weighted_rating=None,
+                             score_7_count=0)
+        call_command('recalculate_ratings')
+        assert self.stored(titles[0]['id']) == (
+            7, 1, pytest.approx((55 + 7) / 11)
+        )
+        assert Title.objects.get(id=titles[0]['id']).score_7_count == 1
+        assert self.stored(titles[1]['id']) == (0, 0, None)
+
+    def test_04_rating_stats(self, client, admin_client, admin, user_client,
+                             user, moderator_client, moderator):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'{self.TITLES_URL}{title_id}/rating-stats/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что эндпоинт `{url}` доступен без авторизации.'
+        )
+        assert response.json()['total'] == 0
+        assert response.json()['median'] is None
+
+        review = create_single_review(admin_client, title_id, 'Хорошо', 6)
+        create_single_review(user_client, title_id, 'Отлично', 10)
+        moderator_review = create_single_review(
+            moderator_client, title_id, 'Отлично', 10
+        )
+        admin_client.patch(
+            f'{self.TITLES_URL}{title_id}/reviews/{review.json()["id"]}/',
+            data={'score': 7}
+        )
+        data = client.get(url).json()
+        expected_scores = {str(score): 0 for score in range(1, 11)}
+        expected_scores.update({'7': 1, '10': 2})
+        assert data['scores'] == expected_scores, (
+            'Проверьте, что распределение оценок учитывает создание и '
+            'изменение отзывов.'
+        )
+        assert data['total'] == 3
+        assert data['mean'] == pytest.approx(9)
+        assert data['median'] == 10
+
+        moderator_client.delete(
+            f'{self.TITLES_URL}{title_id}/reviews/'
+            f'{moderator_review.json()["id"]}/'
+        )
+        data = client.get(url).json()
+        assert (data['scores']['10'], data['total']) == (1, 2)
+        assert data['median'] == 8.5
+        assert client.get(
+            f'{self.TITLES_URL}0/rating-stats/'
+        ).status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,66 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Facets:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_facet_counts(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = client.get(self.TITLES_URL,
+                              {'facets': 'genre,category,year'})
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data['count'] == 2
+        assert {
+            entry['slug']: entry['count'] for entry in data['facets']['genre']
+        } == {genre['slug']: 1 for genre in genres}, (
+            'Проверьте, что фасет `genre` считает произведения по жанрам.'
+        )
+        assert {
+            entry['slug']: entry['count']
+            for entry in data['facets']['category']
+        } == {category['slug']: 1 for category in categories}
+        assert data['facets']['year'] == [
+            {'from': 1980, 'to': 1989, 'count': 2}
+        ]
+
+        response = client.get(self.TITLES_URL, {
+            'facets': 'genre', 'genre': genres[0]['slug']
+        })
+        data = response.json()
+        assert list(data['facets']) == ['genre']
+        assert {
+            entry['slug']: entry['count'] for entry in data['facets']['genre']
+        } == {genres[0]['slug']: 1, genres[1]['slug']: 1}, (
+            'Проверьте, что фасеты учитывают текущие параметры фильтра.'
+        )
+        assert 'facets' not in client.get(self.TITLES_URL).json()
+
+    def test_02_invalidation_and_validation(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        params = {'facets': 'category'}
+        assert client.get(self.TITLES_URL, params).json()['facets'] == {
+            'category': [
+                {'slug': category['slug'], 'name': category['name'],
+                 'count': 1}
+                for category in sorted(categories,
+                                       key=lambda item: item['slug'])
+            ]
+        }
+        admin_client.patch(f'{self.TITLES_URL}{titles[1]["id"]}/',
+                           data={'category': categories[0]['slug']})
+        assert client.get(self.TITLES_URL, params).json()['facets'] == {
+            'category': [{'slug': categories[0]['slug'],
+                          'name': categories[0]['name'], 'count': 2}]
+        }, (
+            'Проверьте, что закэшированные фасеты сбрасываются при '
+            'изменении произведений.'
+        )
+        response = client.get(self.TITLES_URL, {'facets': 'author'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,90 @@
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleFilters:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def ids(self, client, params):
+        response = client.get(self.TITLES_URL, params)
+        return sorted(title['id'] for title in response.json()['results'])
+
+    def test_01_multi_value_and_range(self, client, admin_client, admin):
+        titles, categories, genres = create_titles(admin_client)
+        both = sorted(title['id'] for title in titles)
+        first, second = titles[0]['id'], titles[1]['id']
+
+        assert self.ids(client, {
+            'genre__in': f'{genres[0]["slug"]},{genres[1]["slug"]}'
+        }) == [first], (
+            'Проверьте, что `genre__in` не дублирует произведение с '
+            'несколькими подходящими жанрами.'
+        )
+        assert self.ids(client, {
+            'genre__in': f'{genres[0]["slug"]},{genres[2]["slug"]}'
+        }) == both
+        assert self.ids(client, {'genre': genres[2]['slug'].upper()}) == [
+            second
+        ]
+        assert self.ids(client, {
+            'category__in': ','.join(c['slug'] for c in categories)
+        }) == both
+        assert self.ids(client, {'year_min': 1985}) == [second]
+        assert self.ids(client, {'year_max': 1985}) == [first]
+        assert self.ids(client, {'year_min': 1984, 'year_max': 1988}) == both
+
+        create_single_review(admin_client, first, 'Хорошо', 4)
+        create_single_review(admin_client, second, 'Отлично', 9)
+        assert self.ids(client, {'rating_min': 5}) == [second], (
+            'Проверьте, что `rating_min` отбирает произведения по средней '
+            'оценке.'
+        )
+        assert self.ids(client, {'rating_max': 4}) == [first]
+        assert self.ids(client, {
+            'rating_min': 3, 'genre__in': genres[0]['slug'],
+            'year_max': 2000
+        }) == [first]
+
+    def test_03_rating_matches_displayed_value(self, client, admin_client,
+                                               admin, user_client, user):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        create_single_review(admin_client, first, 'Хорошо', 7)
+        create_single_review(user_client, first, 'Неплохо', 6)
+        create_single_review(admin_client, second, 'Отлично', 7)
+        ratings = {
+            title['id']: title['rating']
+            for title in client.get(self.TITLES_URL).json()['results']
+        }
+        assert ratings == {first: 6, second: 7}
+        assert self.ids(client, {'rating_max': 6}) == [first], (
+            'Проверьте, что `rating_max` сравнивает с целым значением '
+            '`rating`, которое выводит список (средняя 6.5 — это 6).'
+        )
+        assert self.ids(client, {'rating_min': 7}) == [second]
+        assert self.ids(client, {'rating_min': 6, 'rating_max': 6}) == [
+            first
+        ]
+        assert self.ids(client, {'rating_min': 6.5}) == [second]
+
+    def test_02_genres_use_exists(self, client, admin_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        _, _, genres = create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            client.get(self.TITLES_URL, {
+                'genre__in': ','.join(genre['slug'] for genre in genres)
+            })
+        title_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_title"' in query['sql']
+        ]
+        assert title_queries
+        assert all('EXISTS' in sql and 'DISTINCT' not in sql
+                   for sql in title_queries), (
+            'Проверьте, что фильтр по жанрам использует подзапрос EXISTS.'
+        )
@@ -0,0 +1,88 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15SparseFieldsets:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_fields(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[1]['id'], 'Отлично', 9)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.TITLES_URL,
+                                  {'fields': 'rating,id,name'})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'] == [
+            {'id': titles[1]['id'], 'name': titles[1]['name'], 'rating': 9},
+            {'id': titles[0]['id'], 'name': titles[0]['name'],
+             'rating': None},
+        ], (
+            'Проверьте, что `fields=` оставляет в ответе только указанные '
+            'поля, а порядок произведений не меняется.'
+        )
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        assert 'reviews_category' not in sql, (
+            'Проверьте, что без поля `category` запрос не соединяется с '
+            'категориями.'
+        )
+        assert 'reviews_title_genre' not in sql, (
+            'Проверьте, что без поля `genre` жанры не запрашиваются.'
+        )
+
+    def test_02_expand(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = client.get(self.TITLES_URL, {
+            'fields': 'id,category,genre', 'expand': 'category'
+        })
+        title = next(
+            item for item in response.json()['results']
+            if item['id'] == titles[0]['id']
+        )
+        assert title == {
+            'id': titles[0]['id'],
+            'category': categories[0],
+            'genre': sorted(
+                (genres[0]['slug'], genres[1]['slug']),
+                key=lambda slug: next(
+                    genre['name'] for genre in genres
+                    if genre['slug'] == slug
+                )
+            ),
+        }, (
+            'Проверьте, что связи из `expand=` вложены, а остальные '
+            'выводятся слагами.'
+        )
+
+        detail_url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        response = client.get(detail_url, {
+            'fields': 'id,category,genre', 'expand': 'category'
+        })
+        assert response.json() == title, (
+            'Проверьте, что `fields=` и `expand=` одинаково работают в '
+            'списке и для одного произведения.'
+        )
+        response = client.get(detail_url, {'fields': 'name,category',
+                                           'expand': ''})
+        assert response.json() == {
+            'name': titles[0]['name'], 'category': categories[0]['slug']
+        }
+        assert set(client.get(detail_url).json()) == {
+            'id', 'name', 'year', 'description', 'category', 'genre', 'rating'
+        }
+
+    def test_03_validation(self, client, admin_client):
+        create_titles(admin_client)
+        for params in ({'fields': 'id,author'}, {'fields': ''},
+                       {'expand': 'rating'}):
+            response = client.get(self.TITLES_URL, params)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что запрос с параметрами {params} возвращает '
+                'ответ со статусом 400.'
+            )
@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16TitleBatch:
+
+    BATCH_URL = '/api/v1/titles/batch/'
+
+    def test_01_batch(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Хорошо', 7)
+        ids = [titles[1]['id'], 0, titles[0]['id'], titles[1]['id']]
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.BATCH_URL,
+                                  {'ids': ','.join(map(str, ids))})
+        assert len(context.captured_queries) == 2, (
+            'Проверьте, что произведения и их жанры загружаются двумя '
+            'запросами независимо от числа id.'
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что эндпоинт `{self.BATCH_URL}` доступен без '
+            'авторизации.'
+        )
+        data = response.json()
+        assert [title['id'] for title in data['results']] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            'Проверьте, что произведения возвращаются в порядке запроса '
+            'без повторов.'
+        )
+        assert data['missing'] == [0]
+        assert data['results'][1] == client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/'
+        ).json()
+
+        response = client.get(self.BATCH_URL, {
+            'ids': titles[0]['id'], 'fields': 'name,rating'
+        })
+        assert response.json()['results'] == [
+            {'name': titles[0]['name'], 'rating': 7}
+        ], (
+            'Проверьте, что `fields=` без `id` возвращает только '
+            'запрошенные поля, как и список произведений.'
+        )
+        response = client.get(self.BATCH_URL, {
+            'ids': titles[0]['id'], 'fields': 'name,id'
+        })
+        assert response.json()['results'] == [
+            {'id': titles[0]['id'], 'name': titles[0]['name']}
+        ]
+
+    def test_02_validation(self, client):
+        for ids in ('', 'a,b', ','.join(map(str, range(1, 102)))):
+            response = client.get(self.BATCH_URL, {'ids': ids})
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что `ids={ids[:20]}` возвращает ответ со '
+                'статусом 400.'
+            )
@@ -0,0 +1,112 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_comment, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17TitlePage:
+
+    def create_page(self, admin_client, user_client, moderator_client):
+        from tests.utils import create_titles
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        reviews = [
+            create_single_review(client, title_id, f'Отзыв {score}', score)
+            .json()
+            for client, score in ((admin_client, 5), (user_client, 7),
+                                  (moderator_client, 9))
+        ]
+        for number in range(4):
+            create_single_comment(admin_client, title_id, reviews[0]['id'],
+                                  f'Комментарий {number}')
+        create_single_comment(user_client, title_id, reviews[1]['id'],
+                              'Единственный')
+        return titles[0], reviews
+
+    def test_01_title_page(self, client, admin_client, admin, user_client,
+                           user, moderator_client, moderator, monkeypatch):
+        from api.views import TitleViewSet
+
+        monkeypatch.setattr(TitleViewSet.pagination_class, 'page_size', 2)
+        title, reviews = self.create_page(admin_client, user_client,
+                                          moderator_client)
+        url = f'/api/v1/titles/{title["id"]}/page/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        queries = len(context.captured_queries)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что эндпоинт `{url}` доступен без авторизации.'
+        )
+        data = response.json()
+        assert data['title'] == client.get(
+            f'/api/v1/titles/{title["id"]}/'
+        ).json()
+        assert data['rating_stats']['total'] == 3
+        assert data['reviews']['count'] == 3
+        assert data['reviews']['next'].endswith(
+            f'/api/v1/titles/{title["id"]}/reviews/?page=2'
+        )
+        page = data['reviews']['results']
+        assert [review['id'] for review in page] == [
+            reviews[0]['id'], reviews[1]['id']
+        ]
+        assert page[0]['comments']['count'] == 4
+        assert [comment['text'] for comment in
+                page[0]['comments']['results']] == [
+            'Комментарий 0', 'Комментарий 1', 'Комментарий 2'
+        ], (
+            'Проверьте, что для каждого отзыва возвращаются первые '
+            'комментарии в порядке публикации.'
+        )
+        assert page[1]['comments']['count'] == 1
+        assert page[1]['comments']['results'][0] == client.get(
+            f'/api/v1/titles/{title["id"]}/reviews/{reviews[1]["id"]}/'
+            f'comments/'
+        ).json()['results'][0]
+        assert queries <= 4, (
+            'Проверьте, что страница произведения строится постоянным '
+            'числом запросов.'
+        )
+
+        response = client.get(url, {'comments': 1, 'fields': 'id,name'})
+        data = response.json()
+        assert data['title'] == {'id': title['id'], 'name': title['name']}
+        assert len(data['reviews']['results'][0]['comments']['results']) == 1
+        assert client.get(url, {'comments': 100}).status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+        assert client.get('/api/v1/titles/0/page/').status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+
+    def test_02_zero_comments(self, client, admin_client, admin, user_client,
+                              user, moderator_client, moderator):
+        from api.fast_serializers import FastCommentSerializer
+
+        title, reviews = self.create_page(admin_client, user_client,
+                                          moderator_client)
+        response = client.get(f'/api/v1/titles/{title["id"]}/page/',
+                              {'comments': 0})
+        assert response.status_code == HTTPStatus.OK
+        assert [
+            review['comments'] for review in
+            response.json()['reviews']['results']
+        ] == [
+            {'count': 4, 'results': []},
+            {'count': 1, 'results': []},
+            {'count': 0, 'results': []},
+        ], (
+            'Проверьте, что с `comments=0` у отзывов нет комментариев, '
+            'но их общее число сохраняется.'
+        )
+        review_ids = [review['id'] for review in reviews]
+        assert FastCommentSerializer.first_by_review(review_ids, 0)[
+            review_ids[0]
+        ] == {'count': 4, 'results': []}, (
+            'Проверьте, что общее число считается и без `totals`.'
+        )
@@ -0,0 +1,91 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18CommentsCount:
+
+    @staticmethod
+    def comments_count(review_id):
+        from reviews.models import Review
+
+        return Review.objects.get(id=review_id).comments_count
+
+    def test_01_incremental_maintenance(self, client, admin_client, admin,
+                                        user_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_id = create_single_review(
+            admin_client, title_id, 'Хорошо', 7
+        ).json()['id']
+        comments_url = (
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        )
+        comment_id = create_single_comment(
+            admin_client, title_id, review_id, 'Согласен'
+        ).json()['id']
+        create_single_comment(user_client, title_id, review_id, 'Нет')
+        create_single_comment(user_client, title_id, review_id, 'Да')
+        assert self.comments_count(review_id) == 3, (
+            'Проверьте, что новый комментарий увеличивает `comments_count` '
+            'отзыва.'
+        )
+        admin_client.delete(f'{comments_url}{comment_id}/')
+        assert self.comments_count(review_id) == 2
+        user.delete()
+        assert self.comments_count(review_id) == 0, (
+            'Проверьте, что каскадное удаление комментариев уменьшает '
+            '`comments_count`.'
+        )
+        response = client.get(f'/api/v1/titles/{title_id}/reviews/')
+        assert response.json()['results'][0]['comments_count'] == 0
+
+    def test_02_review_list_queries(self, client, admin_client, admin,
+                                    user_client, user, moderator_client,
+                                    moderator):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        review_id = create_single_review(
+            admin_client, title_id, 'Хорошо', 7
+        ).json()['id']
+        create_single_comment(admin_client, title_id, review_id, 'Да')
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        one_review = len(context.captured_queries)
+
+        for client_ in (user_client, moderator_client):
+            other_id = create_single_review(
+                client_, title_id, 'Отлично', 9
+            ).json()['id']
+            for text in ('Да', 'Нет'):
+                create_single_comment(client_, title_id, other_id, text)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert len(context.captured_queries) == one_review, (
+            'Проверьте, что число запросов списка отзывов не зависит от '
+            'числа отзывов и комментариев.'
+        )
+        assert sorted(
+            review['comments_count'] for review in response.json()['results']
+        ) == [1, 2, 2]
+
+    def test_03_repair_command(self, admin_client, admin):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        review_id = create_single_review(
+            admin_client, titles[0]['id'], 'Хорошо', 7
+        ).json()['id']
+        create_single_comment(admin_client, titles[0]['id'], review_id, 'Да')
+        Review.objects.update(comments_count=10)
+        call_command('repair_counters')
+        assert self.comments_count(review_id) == 1, (
+            'Проверьте, что команда `repair_counters` исправляет '
+            'разошедшиеся счётчики.'
+        )
@@ -0,0 +1,73 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19UserStats:
+
+    USERS_ME_URL = '/api/v1/users/me/'
+
+    def test_01_profile_stats(self, admin_client, admin, user_client, user):
+        response = user_client.get(self.USERS_ME_URL)
+        assert response.json()['stats'] == {
+            'reviews_count': 0, 'average_score': None, 'comments_count': 0,
+            'last_activity': None
+        }, (
+            f'Проверьте, что `{self.USERS_ME_URL}` возвращает нулевую '
+            'активность пользователя без отзывов и комментариев.'
+        )
+
+        titles, _, _ = create_titles(admin_client)
+        first = create_single_review(
+            user_client, titles[0]['id'], 'Хорошо', 6
+        ).json()
+        create_single_review(user_client, titles[1]['id'], 'Отлично', 10)
+        comment = create_single_comment(
+            user_client, titles[0]['id'], first['id'], 'Дополню'
+        ).json()
+        user_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{first["id"]}/',
+            data={'score': 8}
+        )
+        with CaptureQueriesContext(connection) as context:
+            stats = user_client.get(self.USERS_ME_URL).json()['stats']
+        assert len(context.captured_queries) <= 2, (
+            'Проверьте, что активность читается из одной строки, без '
+            'агрегации отзывов и комментариев.'
+        )
+        assert stats == {
+            'reviews_count': 2, 'average_score': 9.0, 'comments_count': 1,
+            'last_activity': comment['pub_date']
+        }
+
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        stats = admin_client.get(
+            f'/api/v1/users/{user.username}/'
+        ).json()['stats']
+        assert (stats['reviews_count'], stats['average_score']) == (1, 8.0), (
+            'Проверьте, что каскадное удаление отзывов обновляет активность '
+            'автора.'
+        )
+
+    def test_02_repair(self, admin_client, admin, user_client, user):
+        from reviews.models import UserStats
+
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'Хорошо', 7
+        ).json()
+        create_single_comment(admin_client, titles[0]['id'], review['id'],
+                              'Согласен')
+        UserStats.objects.all().delete()
+        call_command('repair_counters')
+        assert UserStats.objects.get(user=user).reviews_count == 1
+        admin_stats = UserStats.objects.get(user=admin)
+        assert (admin_stats.reviews_count, admin_stats.comments_count) == (
+            0, 1
+        )
+        assert admin_stats.last_activity is not None
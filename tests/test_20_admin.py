@@ -0,0 +1,128 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+
+def create_catalog(titles_count, author, start=0):
+    from reviews.models import Category, Comment, Genre, Review, Title
+
+    categories = [
+        Category.objects.get_or_create(
+            slug=f'cat-{i}', defaults={'name': f'Категория {i}'}
+        )[0]
+        for i in range(3)
+    ]
+    genres = [
+        Genre.objects.get_or_create(
+            slug=f'genre-{i}', defaults={'name': f'Жанр {i}'}
+        )[0]
+        for i in range(3)
+    ]
+    for i in range(start, start + titles_count):
+        title = Title.objects.create(
+            name=f'Произведение {i}', year=2000,
+            category=categories[i % len(categories)]
+        )
+        title.genre.set(genres[:i % len(genres) + 1])
+        review = Review.objects.create(
+            title=title, author=author, text=f'Отзыв {i}', score=5
+        )
+        Comment.objects.create(
+            review=review, author=author, text=f'Комментарий {i}'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Admin:
+    changelists = (
+        '/admin/reviews/title/',
+        '/admin/reviews/review/',
+        '/admin/reviews/comment/',
+        '/admin/reviews/user/',
+    )
+
+    @staticmethod
+    def superuser_client(user_superuser):
+        client = Client()
+        client.force_login(user_superuser)
+        return client
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что страница `{url}` админки открывается.'
+        )
+        return len(context.captured_queries)
+
+    def test_01_changelists_fixed_queries(self, user_superuser,
+                                          django_user_model):
+        client = self.superuser_client(user_superuser)
+        create_catalog(2, user_superuser)
+        small = {url: self.count_queries(client, url)
+                 for url in self.changelists}
+        create_catalog(8, user_superuser, start=2)
+        for i in range(4):
+            django_user_model.objects.create_user(
+                username=f'user-{i}', email=f'user-{i}@yamdb.fake'
+            )
+        large = {url: self.count_queries(client, url)
+                 for url in self.changelists}
+        assert small == large, (
+            'Проверьте, что число запросов списков админки не зависит от '
+            'количества строк на странице.'
+        )
+
+    def test_02_change_forms_do_not_list_all_objects(self, user_superuser,
+                                                     django_user_model):
+        from reviews.models import Comment, Review
+
+        client = self.superuser_client(user_superuser)
+        create_catalog(3, user_superuser)
+        django_user_model.objects.create_user(
+            username='hidden-author', email='hidden@yamdb.fake'
+        )
+        review = Review.objects.order_by('id').last()
+        comment = Comment.objects.order_by('id').last()
+        for url in (f'/admin/reviews/review/{review.id}/change/',
+                    f'/admin/reviews/comment/{comment.id}/change/'):
+            content = client.get(url).content.decode()
+            assert 'hidden-author' not in content, (
+                'Проверьте, что форма отзыва и комментария не загружает '
+                'всех пользователей в список выбора.'
+            )
+        content = client.get(
+            f'/admin/reviews/review/{review.id}/change/'
+        ).content.decode()
+        assert 'Произведение 0' not in content, (
+            'Проверьте, что форма отзыва не загружает все произведения в '
+            'список выбора.'
+        )
+
+    def test_03_estimated_count_paginator(self, user_superuser, monkeypatch):
+        from reviews import paginators
+        from reviews.models import Review
+
+        create_catalog(4, user_superuser)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        monkeypatch.setattr(paginators, 'ESTIMATE_THRESHOLD', 1)
+        paginator = paginators.EstimatedCountPaginator(
+            Review.all_objects.all(), 2
+        )
+        with CaptureQueriesContext(connection) as context:
+            assert paginator.count == 4
+        assert not any(
+            'COUNT(' in query['sql'].upper()
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что для нефильтрованного списка большой таблицы '
+            '`EstimatedCountPaginator` не выполняет `COUNT(*)`.'
+        )
+        filtered = paginators.EstimatedCountPaginator(
+            Review.objects.filter(score=5, text='Отзыв 1'), 2
+        )
+        assert filtered.count == 1, (
+            'Проверьте, что отфильтрованный список считается точно.'
+        )
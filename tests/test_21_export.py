@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Export:
+
+    REVIEWS_CSV_URL = '/api/v1/export/reviews.csv'
+    COMMENTS_NDJSON_URL = '/api/v1/export/comments.ndjson'
+
+    @staticmethod
+    def create_data(admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            admin_client, titles[0]['id'], 'Текст, с "кавычками"\nи строкой',
+            7
+        ).json()
+        create_single_review(user_client, titles[0]['id'], 'Нормально', 5)
+        create_single_review(user_client, titles[1]['id'], 'Скучно', 2)
+        create_single_comment(
+            user_client, titles[0]['id'], review['id'], 'Согласен'
+        )
+        create_single_comment(
+            admin_client, titles[0]['id'], review['id'], 'Спасибо'
+        )
+
+    @staticmethod
+    def snapshot():
+        from reviews.models import Comment, Review
+
+        return (
+            list(Review.objects.order_by('id').values_list(
+                'id', 'title_id', 'text', 'author_id', 'score', 'pub_date'
+            )),
+            list(Comment.objects.order_by('id').values_list(
+                'id', 'review_id', 'text', 'author_id', 'pub_date'
+            )),
+        )
+
+    def test_01_permissions(self, client, user_client, admin_client):
+        assert client.get(self.REVIEWS_CSV_URL).status_code == 401, (
+            'Проверьте, что выгрузка недоступна анонимному пользователю.'
+        )
+        assert user_client.get(self.REVIEWS_CSV_URL).status_code == 403, (
+            'Проверьте, что выгрузка недоступна пользователю без прав '
+            'администратора.'
+        )
+        assert admin_client.get(
+            '/api/v1/export/users.csv'
+        ).status_code == 404
+
+    def test_02_streaming_formats(self, admin_client, user_client):
+        self.create_data(admin_client, user_client)
+        reviews, comments = self.snapshot()
+
+        response = admin_client.get(self.REVIEWS_CSV_URL)
+        assert response.status_code == 200
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся `StreamingHttpResponse`.'
+        )
+        assert 'review.csv' in response['Content-Disposition']
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+        assert rows[0] == [
+            'id', 'title_id', 'text', 'author', 'score', 'pub_date'
+        ], 'Проверьте, что колонки совпадают с `static/data/review.csv`.'
+        assert [row[:5] for row in rows[1:]] == [
+            [str(value) for value in review[:5]] for review in reviews
+        ]
+
+        response = admin_client.get(self.COMMENTS_NDJSON_URL)
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        objects = [json.loads(line) for line in lines]
+        assert [
+            (obj['id'], obj['review_id'], obj['text'], obj['author'])
+            for obj in objects
+        ] == [comment[:4] for comment in comments], (
+            'Проверьте, что NDJSON содержит по одному комментарию в строке.'
+        )
+
+    def test_03_round_trip(self, admin_client, user_client, tmp_path):
+        from reviews.models import Comment, Review
+
+        self.create_data(admin_client, user_client)
+        before = self.snapshot()
+        call_command('export_csv', path=str(tmp_path))
+        assert {path.name for path in tmp_path.iterdir()} == {
+            'review.csv', 'comments.csv'
+        }
+        Comment.objects.all().delete()
+        Review.objects.all().delete()
+
+        call_command('import_csv', path=str(tmp_path))
+        assert self.snapshot() == before, (
+            'Проверьте, что выгрузка `export_csv` загружается обратно '
+            '`import_csv --path` без потерь.'
+        )
+
+    def test_04_import_keeps_historical_activity(self, tmp_path):
+        import shutil
+
+        from django.conf import settings
+        from django.db.models import Max
+
+        from reviews.models import Review, UserStats
+
+        shutil.copytree(settings.BASE_DIR / 'static' / 'data', tmp_path,
+                        dirs_exist_ok=True)
+        call_command('import_csv', path=str(tmp_path), stdout=io.StringIO())
+        author = Review.objects.values('author_id').annotate(
+            last=Max('pub_date')
+        ).order_by('author_id').first()
+        stats = UserStats.objects.get(pk=author['author_id'])
+        assert stats.last_activity >= author['last']
+        assert stats.last_activity.year < 2022, (
+            'Проверьте, что `import_csv` восстанавливает `last_activity` '
+            'авторов по датам из файлов, а не по времени загрузки.'
+        )
@@ -0,0 +1,264 @@
+import io
+from datetime import timedelta
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.test import Client
+from django.utils import timezone
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22Deletion:
+
+    @staticmethod
+    def create_data(admin_client, user_client, moderator_client):
+        """
+        Два произведения: к первому отзывы всех трёх пользователей и
+        комментарии, ко второму — отзыв пользователя с комментарием
+        модератора.
+        """
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        reviews = {}
+        for name, client, score in (('admin', admin_client, 8),
+                                    ('user', user_client, 4),
+                                    ('moderator', moderator_client, 6)):
+            reviews[name] = create_single_review(
+                client, first, f'Отзыв {name}', score
+            ).json()['id']
+        reviews['user_second'] = create_single_review(
+            user_client, second, 'Второе', 10
+        ).json()['id']
+        create_single_comment(admin_client, first, reviews['user'], 'A')
+        create_single_comment(moderator_client, first, reviews['user'], 'M')
+        create_single_comment(user_client, first, reviews['admin'], 'U')
+        create_single_comment(
+            moderator_client, second, reviews['user_second'], 'M2'
+        )
+        return first, second, reviews
+
+    @staticmethod
+    def assert_counters_consistent():
+        from reviews.counters import repair_comments_count, repair_user_stats
+        from reviews.models import Title
+        from reviews.ratings import recalculate_ratings
+
+        before = list(Title.objects.order_by('id').values_list(
+            'score_sum', 'score_count', 'weighted_rating'
+        ))
+        recalculate_ratings()
+        assert before == list(Title.objects.order_by('id').values_list(
+            'score_sum', 'score_count', 'weighted_rating'
+        )), 'Проверьте, что после удаления рейтинги пересчитаны.'
+        assert repair_comments_count() == 0, (
+            'Проверьте, что после удаления счётчики комментариев верны.'
+        )
+        from reviews.models import UserStats
+        stats = list(UserStats.objects.order_by('pk').values())
+        repair_user_stats()
+        assert stats == list(UserStats.objects.order_by('pk').values()), (
+            'Проверьте, что после удаления активность пользователей верна.'
+        )
+
+    def test_01_delete_title(self, admin_client, user_client,
+                             moderator_client, settings):
+        from reviews.models import Comment, Review, Title, UserStats
+
+        settings.DELETION = {'BATCH_SIZE': 1}
+        first, second, _ = self.create_data(
+            admin_client, user_client, moderator_client
+        )
+        response = admin_client.delete(f'/api/v1/titles/{first}/')
+        assert response.status_code == 204
+        assert not Title.objects.filter(id=first).exists()
+        assert not Review.objects.filter(title_id=first).exists()
+        assert Comment.objects.count() == 1
+        assert Review.objects.filter(title_id=second).count() == 1
+        stats = {
+            stats.user.username: stats.reviews_count
+            for stats in UserStats.objects.select_related('user')
+        }
+        assert stats == {'TestAdmin': 0, 'TestUser': 1, 'TestModerator': 0}
+        self.assert_counters_consistent()
+
+    def test_02_delete_user(self, admin_client, user_client,
+                            moderator_client, user, settings):
+        from reviews.models import Comment, Review, Title
+
+        settings.DELETION = {'BATCH_SIZE': 2}
+        first, second, reviews = self.create_data(
+            admin_client, user_client, moderator_client
+        )
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204
+        assert not Review.objects.filter(author_id=user.id).exists()
+        assert not Comment.objects.filter(
+            review_id=reviews['user']
+        ).exists(), (
+            'Проверьте, что комментарии к отзывам пользователя удалены.'
+        )
+        assert Review.objects.get(id=reviews['admin']).comments_count == 0
+        assert Title.objects.get(id=first).score_count == 2
+        assert Title.objects.get(id=second).score_count == 0
+        self.assert_counters_consistent()
+
+    def test_03_deletion_job(self, admin_client, user_client,
+                             moderator_client, user, settings):
+        from reviews.models import DeletionJob, Review, Title, User
+
+        settings.DELETION = {'BACKGROUND_THRESHOLD': 3}
+        first, second, _ = self.create_data(
+            admin_client, user_client, moderator_client
+        )
+        response = admin_client.delete(f'/api/v1/titles/{second}/')
+        assert response.status_code == 204, (
+            'Проверьте, что небольшой каскад удаляется сразу.'
+        )
+        for _ in range(2):
+            response = admin_client.delete(f'/api/v1/titles/{first}/')
+            assert response.status_code == 202, (
+                'Проверьте, что большой каскад ставится заданием с ответом '
+                '202, а повторный DELETE не начинает второго удаления.'
+            )
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 202
+        assert DeletionJob.objects.count() == 2
+        assert Title.objects.filter(id=first).exists(), (
+            'Проверьте, что запрос не удаляет большой каскад сам.'
+        )
+        assert not User.objects.get(id=user.id).is_active, (
+            'Проверьте, что пользователь в очереди на удаление деактивирован.'
+        )
+
+        call_command('process_deletions', stdout=io.StringIO())
+        assert not DeletionJob.objects.exists()
+        assert not Title.objects.exists()
+        assert not Review.objects.exists()
+        assert not User.objects.filter(id=user.id).exists()
+        self.assert_counters_consistent()
+
+    def test_04_failed_and_interrupted_jobs(self, admin_client, user_client,
+                                            moderator_client, settings,
+                                            monkeypatch):
+        from reviews import deletion
+        from reviews.models import DeletionJob, Review, Title
+
+        settings.DELETION = {'BACKGROUND_THRESHOLD': 1, 'BATCH_SIZE': 1}
+        first, _, _ = self.create_data(
+            admin_client, user_client, moderator_client
+        )
+        admin_client.delete(f'/api/v1/titles/{first}/')
+        job = DeletionJob.objects.get()
+
+        def fail(*args):
+            raise RuntimeError('нет связи с базой')
+
+        monkeypatch.setattr(deletion, 'drop_titles', fail)
+        with pytest.raises(CommandError):
+            call_command('process_deletions', stdout=io.StringIO())
+        job.refresh_from_db()
+        assert job.attempts == 1 and 'нет связи с базой' in job.error, (
+            'Проверьте, что ошибка удаления записывается в задание, а '
+            'задание остаётся в очереди.'
+        )
+        assert job.started_at is None
+        assert not Review.objects.filter(title_id=first).exists()
+        assert len(job.affected['users']) == 3, (
+            'Проверьте, что затронутые id сохраняются в задании до удаления.'
+        )
+        monkeypatch.undo()
+
+        # Прерванная попытка: процесс упал, не сняв отметку о начале.
+        DeletionJob.objects.filter(pk=job.pk).update(
+            started_at=timezone.now()
+        )
+        assert deletion.process_jobs() == (0, 0), (
+            'Проверьте, что начатое задание не берёт второй процесс.'
+        )
+        DeletionJob.objects.filter(pk=job.pk).update(
+            started_at=timezone.now() - timedelta(hours=2)
+        )
+        assert deletion.process_jobs() == (1, 0), (
+            'Проверьте, что брошенное задание выполняется снова.'
+        )
+        assert not Title.objects.filter(id=first).exists()
+        self.assert_counters_consistent()
+
+    def test_05_leaderboards_without_gaps(self, admin_client, user_client,
+                                          moderator_client):
+        from reviews.models import Leaderboard
+
+        first, second, _ = self.create_data(
+            admin_client, user_client, moderator_client
+        )
+        call_command('refresh_leaderboards', '--full')
+        assert Leaderboard.objects.filter(title_id=first).exists()
+        admin_client.delete(f'/api/v1/titles/{first}/')
+        for kind, scope in set(
+            Leaderboard.objects.values_list('kind', 'scope')
+        ):
+            ranks = list(Leaderboard.objects.filter(
+                kind=kind, scope=scope
+            ).values_list('rank', 'title_id'))
+            assert ranks == [(1, second)], (
+                'Проверьте, что удалённое произведение убирается из '
+                'рейтингов без пропусков в местах.'
+            )
+
+    def test_06_admin_delete(self, admin_client, user_client,
+                             moderator_client, user_superuser):
+        from reviews.models import Title
+
+        first, _, _ = self.create_data(
+            admin_client, user_client, moderator_client
+        )
+        client = Client()
+        client.force_login(user_superuser)
+        url = f'/admin/reviews/title/{first}/delete/'
+        response = client.get(url)
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert 'Отзыв user' not in content, (
+            'Проверьте, что страница подтверждения не перечисляет отзывы.'
+        )
+        response = client.post(url, {'post': 'yes'})
+        assert response.status_code == 302
+        assert not Title.objects.filter(id=first).exists()
+        self.assert_counters_consistent()
+
+    def test_07_dependents_count(self, admin_client, user_client,
+                                 moderator_client, user, settings):
+        from reviews import deletion, moderation
+        from reviews.models import Comment, DeletionJob, Review, Title, User
+
+        first, second, reviews = self.create_data(
+            admin_client, user_client, moderator_client
+        )
+        for text in ('B', 'C', 'D', 'E'):
+            create_single_comment(
+                admin_client, second, reviews['user_second'], text
+            )
+        moderation.hide(Comment.objects.filter(text='E').get())
+        moderation.hide(Review.objects.get(id=reviews['moderator']))
+        title = Title.objects.get(id=second)
+        assert title.score_count == 1
+        assert deletion.dependents_count(title) == 6, (
+            'Проверьте, что оценка каскада произведения учитывает '
+            'комментарии, в том числе скрытые.'
+        )
+        assert deletion.dependents_count(
+            Title.objects.get(id=first)
+        ) == 6, 'Проверьте, что оценка учитывает скрытые отзывы.'
+        # Два отзыва, 7 комментариев к ним и один свой комментарий.
+        assert deletion.dependents_count(User.objects.get(id=user.id)) == 10
+
+        settings.DELETION = {'BACKGROUND_THRESHOLD': 5}
+        response = admin_client.delete(f'/api/v1/titles/{second}/')
+        assert response.status_code == 202, (
+            'Проверьте, что произведение с одним отзывом, но множеством '
+            'комментариев удаляется заданием.'
+        )
+        assert DeletionJob.objects.filter(object_id=second).exists()
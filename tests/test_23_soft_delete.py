@@ -0,0 +1,221 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23SoftDelete:
+
+    REVIEWS_QUEUE_URL = '/api/v1/moderation/reviews/'
+    COMMENTS_QUEUE_URL = '/api/v1/moderation/comments/'
+
+    @staticmethod
+    def create_data(admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        user_review = create_single_review(
+            user_client, title_id, 'Плохо', 2
+        ).json()['id']
+        admin_review = create_single_review(
+            admin_client, title_id, 'Хорошо', 8
+        ).json()['id']
+        comment = create_single_comment(
+            admin_client, title_id, user_review, 'Не согласен'
+        ).json()['id']
+        return title_id, user_review, admin_review, comment
+
+    @staticmethod
+    def assert_aggregates_consistent():
+        from reviews.counters import repair_comments_count, repair_user_stats
+        from reviews.models import Title, UserStats
+        from reviews.ratings import recalculate_ratings
+
+        fields = ('score_sum', 'score_count', 'weighted_rating')
+        ratings = list(Title.objects.order_by('id').values_list(*fields))
+        recalculate_ratings()
+        assert ratings == list(
+            Title.objects.order_by('id').values_list(*fields)
+        ), 'Проверьте, что рейтинги не учитывают скрытые отзывы.'
+        assert repair_comments_count() == 0, (
+            'Проверьте, что счётчики не учитывают скрытые комментарии.'
+        )
+        stats = list(UserStats.objects.order_by('pk').values())
+        repair_user_stats()
+        assert stats == list(UserStats.objects.order_by('pk').values()), (
+            'Проверьте, что активность не учитывает скрытые строки.'
+        )
+
+    def test_01_delete_hides_review(self, admin_client, user_client, user):
+        from reviews.models import Review
+
+        title_id, user_review, _, _ = self.create_data(
+            admin_client, user_client
+        )
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        response = user_client.delete(f'{url}{user_review}/')
+        assert response.status_code == 204
+        assert Review.all_objects.get(id=user_review).deleted_at, (
+            'Проверьте, что удаление отзыва через API только скрывает его.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(url)
+        assert [review['id'] for review in response.json()['results']] == [
+            review_id for review_id in Review.objects.filter(
+                title_id=title_id
+            ).values_list('id', flat=True)
+        ]
+        assert user_review not in [
+            review['id'] for review in response.json()['results']
+        ], 'Проверьте, что скрытый отзыв не попадает в список.'
+        assert any(
+            '"deleted_at" IS NULL' in query['sql']
+            for query in context.captured_queries
+        )
+        assert admin_client.get(f'{url}{user_review}/').status_code == 404
+        rating = admin_client.get(f'/api/v1/titles/{title_id}/').json()
+        assert rating['rating'] == 8, (
+            'Проверьте, что рейтинг произведения не учитывает скрытый отзыв.'
+        )
+        assert user.stats.reviews_count == 0
+        self.assert_aggregates_consistent()
+
+        response = create_single_review(user_client, title_id, 'Снова', 6)
+        assert response.status_code == 201, (
+            'Проверьте, что после скрытия отзыва автор может оставить новый.'
+        )
+        response = admin_client.post(
+            f'{self.REVIEWS_QUEUE_URL}{user_review}/restore/'
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что отзыв не восстанавливается, если у автора уже '
+            'есть видимый отзыв на произведение.'
+        )
+
+    def test_02_moderation_queue(self, admin_client, user_client,
+                                 moderator_client):
+        from reviews.models import Review
+
+        title_id, user_review, _, comment = self.create_data(
+            admin_client, user_client
+        )
+        comments_url = (
+            f'/api/v1/titles/{title_id}/reviews/{user_review}/comments/'
+        )
+        response = moderator_client.delete(f'{comments_url}{comment}/')
+        assert response.status_code == 204
+        assert Review.objects.get(id=user_review).comments_count == 0
+        self.assert_aggregates_consistent()
+
+        assert user_client.get(
+            self.COMMENTS_QUEUE_URL
+        ).status_code == 403, (
+            'Проверьте, что очередь модерации недоступна пользователю.'
+        )
+        response = moderator_client.get(self.COMMENTS_QUEUE_URL)
+        assert response.status_code == 200
+        hidden = response.json()['results']
+        assert [item['id'] for item in hidden] == [comment]
+        assert hidden[0]['review'] == user_review
+        assert hidden[0]['deleted_at']
+
+        response = moderator_client.post(
+            f'{self.COMMENTS_QUEUE_URL}{comment}/restore/'
+        )
+        assert response.status_code == 200
+        assert response.json()['deleted_at'] is None
+        assert moderator_client.get(
+            self.COMMENTS_QUEUE_URL
+        ).json()['count'] == 0
+        assert Review.objects.get(id=user_review).comments_count == 1, (
+            'Проверьте, что восстановленный комментарий снова учитывается.'
+        )
+        assert user_client.get(comments_url).json()['count'] == 1
+        self.assert_aggregates_consistent()
+
+        moderator_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{user_review}/'
+        )
+        response = moderator_client.get(self.REVIEWS_QUEUE_URL)
+        assert [item['id'] for item in response.json()['results']] == [
+            user_review
+        ]
+        moderator_client.post(
+            f'{self.REVIEWS_QUEUE_URL}{user_review}/restore/'
+        )
+        assert admin_client.get(
+            f'/api/v1/titles/{title_id}/'
+        ).json()['rating'] == 5
+        self.assert_aggregates_consistent()
+
+    def test_03_purge(self, admin_client, user_client):
+        from reviews.models import Comment, Review
+
+        title_id, user_review, admin_review, comment = self.create_data(
+            admin_client, user_client
+        )
+        user_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{user_review}/'
+        )
+        admin_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{admin_review}/'
+        )
+        Review.all_objects.filter(id=user_review).update(
+            deleted_at=timezone.now() - timedelta(days=40)
+        )
+        call_command('purge_deleted')
+        assert not Review.all_objects.filter(id=user_review).exists(), (
+            'Проверьте, что `purge_deleted` удаляет давно скрытые отзывы.'
+        )
+        assert not Comment.all_objects.filter(id=comment).exists(), (
+            'Проверьте, что `purge_deleted` удаляет комментарии к '
+            'удаляемым отзывам.'
+        )
+        assert Review.all_objects.filter(id=admin_review).exists(), (
+            'Проверьте, что недавно скрытые отзывы не удаляются.'
+        )
+        self.assert_aggregates_consistent()
+        call_command('purge_deleted', days=0)
+        assert not Review.all_objects.exists()
+        self.assert_aggregates_consistent()
+
+    def test_04_comments_on_hidden_review(self, admin_client, user_client,
+                                          admin):
+        from reviews.exports import rows
+        from reviews.models import UserStats
+
+        title_id, user_review, _, comment = self.create_data(
+            admin_client, user_client
+        )
+        user_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{user_review}/'
+        )
+        assert UserStats.objects.get(user=admin).comments_count == 0, (
+            'Проверьте, что комментарии к скрытому отзыву не учитываются '
+            'в активности их авторов.'
+        )
+        assert not [row for row in rows('comments') if row[0] == comment], (
+            'Проверьте, что комментарии к скрытым отзывам не выгружаются.'
+        )
+        self.assert_aggregates_consistent()
+
+        admin_client.post(f'{self.REVIEWS_QUEUE_URL}{user_review}/restore/')
+        assert UserStats.objects.get(user=admin).comments_count == 1, (
+            'Проверьте, что после восстановления отзыва комментарии к нему '
+            'снова учитываются.'
+        )
+        assert [row[0] for row in rows('comments')] == [comment]
+        self.assert_aggregates_consistent()
+
+        user_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{user_review}/'
+        )
+        call_command('purge_deleted', days=0)
+        assert UserStats.objects.get(user=admin).comments_count == 0
+        self.assert_aggregates_consistent()
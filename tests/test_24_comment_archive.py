@@ -0,0 +1,207 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24CommentArchive:
+
+    @staticmethod
+    def create_data(admin_client, user_client):
+        """Отзыв с пятью комментариями, три старейших — старше года."""
+        from reviews.models import Comment
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_id = create_single_review(
+            admin_client, title_id, 'Отзыв', 7
+        ).json()['id']
+        comment_ids = []
+        for i in range(5):
+            client = user_client if i % 2 else admin_client
+            comment_ids.append(create_single_comment(
+                client, title_id, review_id, f'Комментарий {i}'
+            ).json()['id'])
+        old = timezone.now() - timedelta(days=400)
+        for i, comment_id in enumerate(comment_ids[:3]):
+            Comment.objects.filter(id=comment_id).update(
+                pub_date=old + timedelta(minutes=i)
+            )
+        return title_id, review_id, comment_ids
+
+    @staticmethod
+    def assert_counters_consistent():
+        from reviews.counters import repair_comments_count, repair_user_stats
+        from reviews.models import UserStats
+
+        assert repair_comments_count() == 0, (
+            'Проверьте, что счётчики комментариев учитывают архив.'
+        )
+        stats = list(UserStats.objects.order_by('pk').values())
+        repair_user_stats()
+        assert stats == list(UserStats.objects.order_by('pk').values()), (
+            'Проверьте, что активность пользователей учитывает архив.'
+        )
+
+    def test_01_archive_command(self, admin_client, user_client):
+        from reviews.models import ArchivedComment, Comment, Review
+
+        _, review_id, comment_ids = self.create_data(
+            admin_client, user_client
+        )
+        call_command('archive_comments', batch_size=2)
+        assert sorted(
+            ArchivedComment.objects.values_list('id', flat=True)
+        ) == comment_ids[:3], (
+            'Проверьте, что `archive_comments` переносит старые комментарии '
+            'в архив с теми же id.'
+        )
+        assert sorted(
+            Comment.objects.values_list('id', flat=True)
+        ) == comment_ids[3:]
+        review = Review.objects.get(id=review_id)
+        assert review.comments_count == 5, (
+            'Проверьте, что `comments_count` учитывает архивные комментарии.'
+        )
+        assert review.archived_comments_count == 3
+        self.assert_counters_consistent()
+
+    def test_02_read_through(self, admin_client, user_client, monkeypatch):
+        from api.views import CommentViewSet
+
+        title_id, review_id, comment_ids = self.create_data(
+            admin_client, user_client
+        )
+        call_command('archive_comments')
+        monkeypatch.setattr(
+            CommentViewSet.pagination_class, 'page_size', 2
+        )
+        url = f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        seen = []
+        page_url = url
+        while page_url:
+            data = user_client.get(page_url).json()
+            assert data['count'] == 5
+            seen.extend(comment['id'] for comment in data['results'])
+            page_url = data['next']
+        assert seen == comment_ids, (
+            'Проверьте, что список комментариев отзыва выдаёт сначала '
+            'архивные, затем остальные, без пропусков и повторов.'
+        )
+        response = user_client.get(f'{url}{comment_ids[0]}/')
+        assert response.status_code == 200, (
+            'Проверьте, что архивный комментарий доступен по id.'
+        )
+        assert response.json()['text'] == 'Комментарий 0'
+
+        data = user_client.get(
+            f'/api/v1/titles/{title_id}/page/?comments=4'
+        ).json()
+        comments = data['reviews']['results'][0]['comments']
+        assert comments['count'] == 5
+        assert [comment['id'] for comment in comments['results']] == (
+            comment_ids[:4]
+        ), (
+            'Проверьте, что страница произведения дочитывает старые '
+            'комментарии из архива.'
+        )
+
+    def test_03_no_archive_reads(self, admin_client, user_client):
+        title_id, review_id, _ = self.create_data(admin_client, user_client)
+        url = f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        with CaptureQueriesContext(connection) as context:
+            assert user_client.get(url).json()['count'] == 5
+        assert not any(
+            'archivedcomment' in query['sql']
+            for query in context.captured_queries
+        ), 'Проверьте, что архив не читается для отзывов без архива.'
+
+    def test_04_deletion_and_export(self, admin_client, user_client,
+                                    user, tmp_path):
+        from reviews.models import ArchivedComment
+
+        title_id, review_id, comment_ids = self.create_data(
+            admin_client, user_client
+        )
+        call_command('archive_comments')
+        call_command('export_csv', path=str(tmp_path), only=['comments'])
+        exported = (tmp_path / 'comments.csv').read_text(encoding='utf-8')
+        assert exported.count('Комментарий') == 5, (
+            'Проверьте, что выгрузка комментариев включает архив.'
+        )
+
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert not ArchivedComment.objects.filter(author=user).exists()
+        self.assert_counters_consistent()
+        admin_client.delete(f'/api/v1/titles/{title_id}/')
+        assert not ArchivedComment.objects.exists(), (
+            'Проверьте, что удаление произведения удаляет архивные '
+            'комментарии его отзывов.'
+        )
+        self.assert_counters_consistent()
+
+    def test_05_write_archived(self, admin_client, user_client,
+                               moderator_client):
+        from reviews.models import ArchivedComment, Comment, Review
+
+        title_id, review_id, comment_ids = self.create_data(
+            admin_client, user_client
+        )
+        call_command('archive_comments')
+        url = f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+
+        response = user_client.patch(
+            f'{url}{comment_ids[0]}/', data={'text': 'Чужой'}
+        )
+        assert response.status_code == 403, (
+            'Проверьте, что чужой архивный комментарий нельзя изменить.'
+        )
+        assert ArchivedComment.objects.filter(id=comment_ids[0]).exists()
+
+        response = user_client.patch(
+            f'{url}{comment_ids[1]}/', data={'text': 'Исправлено'}
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что автор может изменить архивный комментарий.'
+        )
+        assert response.json()['text'] == 'Исправлено'
+        comment = Comment.objects.get(id=comment_ids[1])
+        assert comment.text == 'Исправлено'
+        assert comment.pub_date < timezone.now() - timedelta(days=365), (
+            'Проверьте, что возвращённый из архива комментарий сохраняет '
+            'дату публикации.'
+        )
+        assert not ArchivedComment.objects.filter(
+            id=comment_ids[1]
+        ).exists()
+        assert Review.objects.get(id=review_id).archived_comments_count == 2
+
+        response = moderator_client.delete(f'{url}{comment_ids[2]}/')
+        assert response.status_code == 204, (
+            'Проверьте, что архивный комментарий можно скрыть.'
+        )
+        queue = moderator_client.get('/api/v1/moderation/comments/').json()
+        assert [item['id'] for item in queue['results']] == [
+            comment_ids[2]
+        ], 'Проверьте, что скрытый архивный комментарий виден модераторам.'
+        data = user_client.get(url).json()
+        assert data['count'] == 4
+        assert [item['id'] for item in data['results']] == [
+            comment_ids[0], comment_ids[1], comment_ids[3], comment_ids[4]
+        ]
+        self.assert_counters_consistent()
+
+        moderator_client.post(
+            f'/api/v1/moderation/comments/{comment_ids[2]}/restore/'
+        )
+        assert [
+            item['id'] for item in user_client.get(url).json()['results']
+        ] == comment_ids
+        self.assert_counters_consistent()
@@ -0,0 +1,126 @@
+import io
+import shutil
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from tests.utils import rewrite_csv
+
+STATIC_DATA = settings.BASE_DIR / 'static' / 'data'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25ImportUpsert:
+
+    @staticmethod
+    def run_import(path):
+        out = io.StringIO()
+        call_command('import_csv', path=str(path), upsert=True,
+                     batch_size=10, stdout=out)
+        return out.getvalue()
+
+    @staticmethod
+    def assert_aggregates_consistent():
+        from reviews.counters import repair_comments_count, repair_user_stats
+        from reviews.models import Title, UserStats
+        from reviews.ratings import recalculate_ratings
+
+        fields = ('score_sum', 'score_count', 'weighted_rating')
+        ratings = list(Title.objects.order_by('id').values_list(*fields))
+        recalculate_ratings()
+        assert ratings == list(
+            Title.objects.order_by('id').values_list(*fields)
+        ), 'Проверьте, что после загрузки рейтинги пересчитаны.'
+        assert repair_comments_count() == 0
+        stats = list(UserStats.objects.order_by('pk').values())
+        repair_user_stats()
+        assert stats == list(UserStats.objects.order_by('pk').values())
+
+    def test_01_rerun_is_idempotent(self, tmp_path):
+        from reviews.models import Review, Title, User
+
+        shutil.copytree(STATIC_DATA, tmp_path, dirs_exist_ok=True)
+        output = self.run_import(tmp_path)
+        assert 'review.csv: вставлено 72, обновлено 0, без изменений 0' in (
+            output
+        )
+        assert Review.objects.count() == 72
+        assert Title.objects.filter(genre__isnull=False).exists()
+        assert not User.objects.filter(confirmation_code=None).exists()
+        self.assert_aggregates_consistent()
+
+        output = self.run_import(tmp_path)
+        assert 'review.csv: вставлено 0, обновлено 0, без изменений 72' in (
+            output
+        ), 'Проверьте, что повторная загрузка не переписывает строки.'
+        assert 'users.csv: вставлено 0, обновлено 0' in output
+
+    def test_02_changed_rows(self, tmp_path):
+        from reviews.models import Category, Review, Title
+
+        shutil.copytree(STATIC_DATA, tmp_path, dirs_exist_ok=True)
+        self.run_import(tmp_path)
+        hidden = Review.objects.order_by('id').last()
+        Review.all_objects.filter(id=hidden.id).update(
+            deleted_at=hidden.pub_date
+        )
+
+        def change_reviews(rows):
+            rows[0]['score'] = '1'
+            rows[1]['text'] = 'Новый текст'
+            rows[-1]['text'] = 'Скрытый отзыв изменён'
+            rows.append({**rows[2], 'id': '1000', 'author': '200'})
+
+        rewrite_csv(tmp_path / 'users.csv', lambda rows: rows.append({
+            **rows[0], 'id': '200', 'username': 'partner',
+            'email': 'partner@yamdb.fake'
+        }))
+        rewrite_csv(tmp_path / 'review.csv', change_reviews)
+        rewrite_csv(
+            tmp_path / 'category.csv',
+            lambda rows: rows[0].update(name='Кино и сериалы')
+        )
+        output = self.run_import(tmp_path)
+        assert 'review.csv: вставлено 1, обновлено 3, без изменений 69' in (
+            output
+        ), 'Проверьте подсчёт вставленных, обновлённых и неизменных строк.'
+        assert 'category.csv: вставлено 0, обновлено 1' in output
+        assert Category.objects.filter(name='Кино и сериалы').exists()
+        assert Review.objects.get(id=1000).title_id == Review.objects.get(
+            id=3
+        ).title_id
+        hidden = Review.all_objects.get(id=hidden.id)
+        assert hidden.text == 'Скрытый отзыв изменён'
+        assert hidden.deleted_at is not None, (
+            'Проверьте, что загрузка не меняет колонки, которых нет в файле.'
+        )
+        first = Review.objects.get(id=1)
+        assert first.score == 1
+        assert Title.objects.get(id=first.title_id).score_sum == sum(
+            Review.objects.filter(
+                title_id=first.title_id
+            ).values_list('score', flat=True)
+        )
+        self.assert_aggregates_consistent()
+
+    def test_03_facets_cache_invalidated(self, client, tmp_path):
+        shutil.copytree(STATIC_DATA, tmp_path, dirs_exist_ok=True)
+        self.run_import(tmp_path)
+        params = {'facets': 'category'}
+
+        def category_names():
+            return {
+                entry['slug']: entry['name'] for entry in
+                client.get('/api/v1/titles/', params).json()[
+                    'facets'
+                ]['category']
+            }
+
+        assert category_names()['movie'] == 'Фильм'
+        rewrite_csv(tmp_path / 'category.csv',
+                    lambda rows: rows[0].update(name='Кино'))
+        self.run_import(tmp_path)
+        assert category_names()['movie'] == 'Кино', (
+            'Проверьте, что загрузка `--upsert` сбрасывает кэш фасетов.'
+        )
@@ -0,0 +1,189 @@
+import csv
+import io
+import shutil
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from tests.utils import rewrite_csv
+
+STATIC_DATA = settings.BASE_DIR / 'static' / 'data'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26ImportValidation:
+
+    @staticmethod
+    def break_data(path):
+        def break_reviews(rows):
+            rows[0]['score'] = '11'
+            rows[1]['title_id'] = '999'
+            rows[2]['pub_date'] = 'вчера'
+            rows.append(dict(rows[3]))
+
+        rewrite_csv(path / 'review.csv', break_reviews)
+        rewrite_csv(
+            path / 'titles.csv', lambda rows: rows[-1].update(year='2999')
+        )
+
+    @staticmethod
+    def read_rejects(path):
+        with open(path, encoding='utf-8', newline='') as file:
+            return list(csv.DictReader(file))
+
+    def test_01_validate_only(self, tmp_path):
+        from reviews.models import Review, Title
+
+        data, rejects = tmp_path / 'data', tmp_path / 'rejects'
+        shutil.copytree(STATIC_DATA, data)
+        self.break_data(data)
+        out = io.StringIO()
+        call_command('import_csv', path=str(data), rejects=str(rejects),
+                     validate_only=True, stdout=out)
+        assert not Title.objects.exists() and not Review.objects.exists(), (
+            'Проверьте, что `--validate-only` ничего не загружает.'
+        )
+        assert 'review.csv: строк 73, отклонено 5' in out.getvalue(), (
+            'Проверьте, что проверка выводит число строк и отказов.'
+        )
+        assert sorted(path.name for path in rejects.iterdir()) == [
+            'genre_title.csv', 'review.csv', 'titles.csv'
+        ], 'Проверьте, что файлы отказов пишутся только для файлов с ошибками.'
+
+        errors = {
+            row['id']: row['errors']
+            for row in self.read_rejects(rejects / 'review.csv')
+        }
+        assert set(errors) == {'1', '2', '3', '4', '75'}
+        assert errors['1'].startswith('score:')
+        assert errors['2'] == 'title_id: нет объекта с id 999'
+        assert errors['3'].startswith('pub_date:')
+        assert errors['4'] == 'id: повторяющийся id'
+        assert errors['75'] == 'title_id: нет объекта с id 32', (
+            'Проверьте, что строки, ссылающиеся на отклонённые строки '
+            'других файлов, тоже отклоняются.'
+        )
+        titles = self.read_rejects(rejects / 'titles.csv')
+        assert [row['year'] for row in titles] == ['2999'], (
+            'Проверьте, что год произведения не может быть больше текущего.'
+        )
+
+    def test_02_load_clean_rows(self, tmp_path):
+        from reviews.counters import repair_comments_count
+        from reviews.models import Review, Title
+        from reviews.ratings import recalculate_ratings
+
+        data, rejects = tmp_path / 'data', tmp_path / 'rejects'
+        shutil.copytree(STATIC_DATA, data)
+        self.break_data(data)
+        rejected_title = self.read_rejects(data / 'titles.csv')[-1]['id']
+        call_command('import_csv', path=str(data), rejects=str(rejects),
+                     upsert=True, stdout=io.StringIO())
+        assert not Title.objects.filter(id=rejected_title).exists()
+        reviews_of_rejected = [
+            row['id'] for row in self.read_rejects(data / 'review.csv')
+            if row['title_id'] == rejected_title
+        ]
+        assert reviews_of_rejected, 'Данные теста должны ссылаться на него.'
+        rejected = {
+            row['id'] for row in self.read_rejects(rejects / 'review.csv')
+        }
+        assert set(reviews_of_rejected) <= rejected, (
+            'Проверьте, что строки, ссылающиеся на отклонённые строки других '
+            'файлов, тоже отклоняются.'
+        )
+        assert Review.objects.count() == 72 - len(rejected - {'4'}), (
+            'Проверьте, что загружаются только строки, прошедшие проверку.'
+        )
+        assert Review.objects.get(id=4).score == int(
+            self.read_rejects(data / 'review.csv')[3]['score']
+        )
+        assert repair_comments_count() == 0
+        ratings = list(Title.objects.order_by('id').values_list(
+            'score_sum', 'score_count'
+        ))
+        recalculate_ratings()
+        assert ratings == list(Title.objects.order_by('id').values_list(
+            'score_sum', 'score_count'
+        ))
+
+    def test_03_unique_keys_in_file(self, tmp_path):
+        data, rejects = tmp_path / 'data', tmp_path / 'rejects'
+        shutil.copytree(STATIC_DATA, data)
+
+        def duplicate(filename, **changes):
+            def change(rows):
+                rows.append({**rows[0], **changes})
+            rewrite_csv(data / filename, change)
+
+        duplicate('users.csv', id='900', email='new@yamdb.fake')
+        duplicate('users.csv', id='901', username='new_user')
+        duplicate('category.csv', id='90', name='Дубль')
+        duplicate('genre.csv', id='90', name='Дубль')
+        duplicate('genre_title.csv', id='900')
+        duplicate('review.csv', id='900')
+        call_command('import_csv', path=str(data), rejects=str(rejects),
+                     validate_only=True, stdout=io.StringIO())
+        expected = {
+            'users.csv': {'900': 'username', '901': 'email'},
+            'category.csv': {'90': 'slug'},
+            'genre.csv': {'90': 'slug'},
+            'genre_title.csv': {'900': 'title_id, genre_id'},
+            'review.csv': {'900': 'title_id, author'},
+        }
+        assert sorted(path.name for path in rejects.iterdir()) == sorted(
+            expected
+        )
+        for filename, columns in expected.items():
+            errors = {
+                row['id']: row['errors']
+                for row in self.read_rejects(rejects / filename)
+            }
+            assert errors == {
+                pk: f'{column}: значение уже занято другой строкой'
+                for pk, column in columns.items()
+            }, (
+                f'Проверьте, что в {filename} строки, нарушающие условие '
+                'уникальности, попадают в файл отказов.'
+            )
+
+    def test_04_unique_keys_in_database(self, tmp_path):
+        from reviews.models import Category, Review, User
+
+        call_command('import_csv', path=str(STATIC_DATA), upsert=True,
+                     stdout=io.StringIO())
+        data, rejects = tmp_path / 'data', tmp_path / 'rejects'
+        data.mkdir()
+        with open(data / 'category.csv', 'w', encoding='utf-8') as file:
+            file.write('id,name,slug\n1,Фильм,film\n90,Кино,movie\n'
+                       '91,Книги,book\n')
+        user = User.objects.get(id=100)
+        with open(data / 'users.csv', 'w', encoding='utf-8') as file:
+            file.write('id,username,email,role,bio,first_name,last_name\n'
+                       f'900,other,{user.email},user,,,\n')
+        review = Review.objects.get(id=1)
+        Review.objects.filter(id=1).update(deleted_at=review.pub_date)
+        with open(data / 'review.csv', 'w', encoding='utf-8') as file:
+            file.write('id,title_id,text,author,score,pub_date\n'
+                       f'900,{review.title_id},Снова,{review.author_id},5,'
+                       '2020-01-01T00:00:00.000Z\n')
+        call_command('import_csv', path=str(data), rejects=str(rejects),
+                     upsert=True, stdout=io.StringIO())
+
+        assert dict(Category.objects.filter(
+            id__in=[1, 90]
+        ).values_list('id', 'slug')) == {1: 'film', 90: 'movie'}, (
+            'Проверьте, что ключ, освобождённый обновлением строки, можно '
+            'занять другой строкой того же файла.'
+        )
+        assert [row['id'] for row in self.read_rejects(
+            rejects / 'category.csv'
+        )] == ['91'], (
+            'Проверьте, что ключ, занятый строкой базы, не загружается.'
+        )
+        assert not User.objects.filter(id=900).exists()
+        assert Review.objects.filter(id=900).exists(), (
+            'Проверьте, что скрытый отзыв не мешает новому отзыву того же '
+            'автора (`unique_title_author` — только для видимых).'
+        )
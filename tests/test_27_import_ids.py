@@ -0,0 +1,118 @@
+import io
+import shutil
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+from tests.utils import rewrite_csv
+
+STATIC_DATA = settings.BASE_DIR / 'static' / 'data'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27ImportIds:
+
+    @staticmethod
+    def sequence(model):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT seq FROM sqlite_sequence WHERE name = %s',
+                [model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def set_sequence(model, value):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE sqlite_sequence SET seq = %s WHERE name = %s',
+                [value, model._meta.db_table]
+            )
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite',
+                        reason='Проверяется sqlite_sequence.')
+    def test_01_reset_sequences(self, tmp_path, admin_client):
+        from reviews.imports import reset_sequences
+        from reviews.models import ArchivedComment, Comment, Review, Title
+
+        shutil.copytree(STATIC_DATA, tmp_path, dirs_exist_ok=True)
+        # Отставший счётчик: как после загрузки в обход автоинкремента.
+        self.set_sequence(Title, 1)
+        call_command('import_csv', path=str(tmp_path), upsert=True,
+                     stdout=io.StringIO())
+        last_title = Title.objects.latest('id').id
+        assert self.sequence(Title) == last_title, (
+            'Проверьте, что после загрузки счётчик id сдвигается за '
+            'загруженные строки.'
+        )
+        assert self.sequence(Review) >= Review.objects.latest('id').id
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Новое', 'year': 2000, 'genre': ['rock'],
+            'category': 'music'
+        })
+        assert response.status_code == 201
+        assert response.json()['id'] == last_title + 1
+
+        comment = Comment.objects.latest('id')
+        ArchivedComment.objects.create(
+            id=500, review_id=comment.review_id, text='Архив',
+            author_id=comment.author_id, pub_date=comment.pub_date
+        )
+        self.set_sequence(Comment, comment.id)
+        reset_sequences([Comment, ArchivedComment])
+        assert self.sequence(Comment) == 500, (
+            'Проверьте, что счётчик id комментариев учитывает архив.'
+        )
+
+    def test_02_remap_ids(self, tmp_path):
+        from reviews.models import Comment, Review, Title, User
+
+        first, second = tmp_path / 'first', tmp_path / 'second'
+        shutil.copytree(STATIC_DATA, first)
+        shutil.copytree(STATIC_DATA, second)
+        call_command('import_csv', path=str(first), upsert=True,
+                     stdout=io.StringIO())
+
+        def rename(*fields):
+            def change(rows):
+                for row in rows:
+                    for field in fields:
+                        row[field] = f'partner-{row[field]}'
+            return change
+
+        rewrite_csv(second / 'users.csv', rename('username', 'email'))
+        rewrite_csv(second / 'category.csv', rename('slug'))
+        rewrite_csv(second / 'genre.csv', rename('slug'))
+        rewrite_csv(second / 'titles.csv', rename('name'))
+        with pytest.raises(CommandError):
+            call_command('import_csv', path=str(second), remap_ids=True,
+                         stdout=io.StringIO())
+        out = io.StringIO()
+        call_command('import_csv', path=str(second), upsert=True,
+                     remap_ids=True, stdout=out)
+        assert 'review.csv: вставлено 72, обновлено 0' in out.getvalue(), (
+            'Проверьте, что с `--remap-ids` строки второго набора '
+            'вставляются с новыми id.'
+        )
+        assert Title.objects.count() == 64
+        assert Review.objects.count() == 144
+        assert Comment.objects.count() == 6
+        for review in Review.objects.filter(id__gt=75).select_related(
+            'title', 'author'
+        ):
+            assert review.title.name.startswith('partner-'), (
+                'Проверьте, что внешние ключи переводятся по таблицам '
+                'соответствия.'
+            )
+            assert review.author.username.startswith('partner-')
+        assert not Review.objects.filter(
+            id__gt=75, title__name__startswith='partner-'
+        ).exclude(title__genre__slug__startswith='partner-').exists()
+        assert User.objects.get(
+            username='partner-bingobongo'
+        ).stats.reviews_count == User.objects.get(
+            username='bingobongo'
+        ).stats.reviews_count
@@ -0,0 +1,140 @@
+import gzip
+import io
+import shutil
+import sys
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+
+STATIC_DATA = settings.BASE_DIR / 'static' / 'data'
+
+
+class Test28Readers:
+
+    def test_01_formats_and_compression(self, tmp_path):
+        from reviews.readers import find_input, read_rows
+
+        csv_path = tmp_path / 'genre.csv.gz'
+        with gzip.open(csv_path, 'wb') as file:
+            file.write((STATIC_DATA / 'genre.csv').read_bytes())
+        rows = list(read_rows(str(csv_path)))
+        assert len(rows) == 15 and rows[0]['slug'] == 'drama', (
+            'Проверьте, что .csv.gz читается без распаковки на диск.'
+        )
+        ndjson_path = tmp_path / 'titles.ndjson'
+        ndjson_path.write_text(
+            '{"id": 1, "name": "Фильм", "year": 2000, "category": null}\n'
+            '\n'
+            '{"id": 2,\n',
+            encoding='utf-8'
+        )
+        assert list(read_rows(str(ndjson_path))) == [
+            {'id': 1, 'name': 'Фильм', 'year': 2000, 'category': ''},
+            {},
+        ], (
+            'Проверьте чтение NDJSON: null — пустое значение, битая '
+            'строка — пустой словарь.'
+        )
+        assert find_input(str(tmp_path), 'genre.csv') == str(csv_path)
+        assert find_input(str(tmp_path), 'titles.csv') == str(ndjson_path)
+        assert find_input(str(tmp_path), 'review.csv') is None
+        with pytest.raises(ValueError):
+            list(read_rows(str(tmp_path / 'genre.xml')))
+
+    def test_02_stdin(self, monkeypatch):
+        from reviews.readers import STDIN, read_rows
+
+        data = gzip.compress(
+            b'{"id": 1, "name": "Drama", "slug": "drama"}\n'
+        )
+        monkeypatch.setattr(
+            sys, 'stdin', io.TextIOWrapper(io.BytesIO(data))
+        )
+        assert list(read_rows(STDIN, 'ndjson')) == [
+            {'id': 1, 'name': 'Drama', 'slug': 'drama'}
+        ], 'Проверьте, что сжатие стандартного ввода определяется само.'
+
+    def test_03_zstd_requires_package(self, tmp_path):
+        from django.core.exceptions import ImproperlyConfigured
+
+        from reviews import readers
+
+        if readers.zstandard is not None:
+            pytest.skip('Пакет zstandard установлен.')
+        path = tmp_path / 'genre.csv.zst'
+        path.write_bytes(b'\x28\xb5\x2f\xfd' + b'\0' * 8)
+        with pytest.raises(ImproperlyConfigured):
+            list(readers.read_rows(str(path)))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_import_compressed_export(self, admin_client, user_client,
+                                         tmp_path, monkeypatch):
+        from reviews.models import Comment, Review
+        from tests.test_21_export import Test21Export
+
+        Test21Export.create_data(admin_client, user_client)
+        before = Test21Export.snapshot()
+        call_command('export_csv', path=str(tmp_path), format='ndjson',
+                     stdout=io.StringIO())
+        with open(tmp_path / 'review.ndjson', 'rb') as source, gzip.open(
+            tmp_path / 'review.ndjson.gz', 'wb'
+        ) as target:
+            shutil.copyfileobj(source, target)
+        (tmp_path / 'review.ndjson').unlink()
+        comments = (tmp_path / 'comments.ndjson').read_bytes()
+        (tmp_path / 'comments.ndjson').unlink()
+        Comment.objects.all().delete()
+        Review.objects.all().delete()
+
+        call_command('import_csv', path=str(tmp_path), upsert=True,
+                     stdout=io.StringIO())
+        assert not (tmp_path / 'rejects').exists(), (
+            'Проверьте, что пустой каталог отказов не остаётся.'
+        )
+        monkeypatch.setattr(
+            sys, 'stdin', io.TextIOWrapper(io.BytesIO(comments))
+        )
+        call_command('import_csv', upsert=True, stdin='comments',
+                     format='ndjson', rejects=str(tmp_path / 'rejects'),
+                     stdout=io.StringIO())
+        assert Test21Export.snapshot() == before, (
+            'Проверьте, что выгрузка NDJSON, сжатая gzip, и стандартный '
+            'ввод загружаются `import_csv --upsert` без потерь.'
+        )
+        with pytest.raises(CommandError):
+            call_command('import_csv', stdin='comments')
+
+    @pytest.mark.parametrize('corrupt', (
+        lambda data: data[:len(data) // 2],
+        lambda data: data[:2] + b'\x09' + data[3:],
+    ), ids=('truncated', 'bad_header'))
+    @pytest.mark.django_db(transaction=True)
+    def test_05_corrupt_compressed_file(self, tmp_path, corrupt):
+        from reviews.models import Title
+        from reviews.ratings import recalculate_ratings
+
+        shutil.copytree(STATIC_DATA, tmp_path / 'data')
+        path = tmp_path / 'data' / 'comments.csv'
+        (tmp_path / 'data' / 'comments.csv.gz').write_bytes(
+            corrupt(gzip.compress(path.read_bytes()))
+        )
+        path.unlink()
+        with pytest.raises(CommandError) as error:
+            call_command('import_csv', path=str(tmp_path / 'data'),
+                         upsert=True, stdout=io.StringIO())
+        assert 'comments.csv.gz' in str(error.value), (
+            'Проверьте, что повреждённый сжатый файл даёт ошибку команды с '
+            'именем файла, а не трассировку.'
+        )
+        ratings = list(Title.objects.order_by('id').values_list(
+            'score_sum', 'score_count'
+        ))
+        assert any(score_count for _, score_count in ratings)
+        recalculate_ratings()
+        assert ratings == list(Title.objects.order_by('id').values_list(
+            'score_sum', 'score_count'
+        )), (
+            'Проверьте, что данные уже загруженных файлов пересчитываются '
+            'и при ошибке чтения следующего.'
+        )
@@ -0,0 +1,80 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+SIZES = {
+    'categories': 3, 'genres': 6, 'users': 8, 'titles': 12,
+    'reviews': 60, 'comments': 40,
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29GenerateData:
+
+    @staticmethod
+    def assert_invariants():
+        from django.db.models import Count
+
+        from reviews.counters import repair_comments_count, repair_user_stats
+        from reviews.models import Comment, Review, Title, UserStats
+        from reviews.ratings import recalculate_ratings
+
+        assert Review.objects.count() == SIZES['reviews']
+        assert Comment.objects.count() == SIZES['comments']
+        assert not Review.objects.values('title', 'author').annotate(
+            count=Count('id')
+        ).filter(count__gt=1).exists(), (
+            'Проверьте, что у произведения не больше одного отзыва '
+            'каждого автора (unique_title_author).'
+        )
+        fields = ('score_sum', 'score_count', 'weighted_rating')
+        ratings = list(Title.objects.order_by('id').values_list(*fields))
+        recalculate_ratings()
+        assert ratings == list(
+            Title.objects.order_by('id').values_list(*fields)
+        ), 'Проверьте, что рейтинги произведений пересчитаны.'
+        assert repair_comments_count() == 0, (
+            'Проверьте, что счётчики комментариев отзывов пересчитаны.'
+        )
+        stats = list(UserStats.objects.order_by('pk').values())
+        repair_user_stats()
+        assert stats == list(UserStats.objects.order_by('pk').values())
+
+    def test_01_database_writer(self):
+        from reviews.models import Title
+
+        call_command('generate_data', stdout=io.StringIO(), seed=1,
+                     batch_size=7, **SIZES)
+        self.assert_invariants()
+        assert Title.objects.filter(genre__isnull=False).exists()
+
+        call_command('generate_data', stdout=io.StringIO(), seed=2,
+                     **{**SIZES, 'reviews': 0, 'comments': 0})
+        assert Title.objects.count() == 2 * SIZES['titles'], (
+            'Проверьте, что повторная генерация продолжает id после '
+            'существующих строк.'
+        )
+
+    def test_02_csv_matches_import_csv(self, tmp_path):
+        call_command('generate_data', stdout=io.StringIO(), seed=1,
+                     csv_dir=str(tmp_path), **SIZES)
+        out = io.StringIO()
+        call_command('import_csv', path=str(tmp_path), upsert=True,
+                     stdout=out)
+        assert 'отклонено' not in out.getvalue(), (
+            'Проверьте, что CSV `generate_data` проходят проверку '
+            '`import_csv` без отказов.'
+        )
+        self.assert_invariants()
+
+    def test_03_review_count_is_explicit(self):
+        from reviews.generators import DataGenerator
+
+        sizes = {**SIZES, 'users': 2, 'titles': 3}
+        generator = DataGenerator(sizes)
+        assert len(list(generator.reviews())) == generator.review_count() == 6
+        comments = list(DataGenerator(sizes).comments(6))
+        assert {row[1] for row in comments} <= set(range(1, 7)), (
+            'Проверьте, что комментарии ссылаются только на выданные отзывы.'
+        )
@@ -1,3 +1,4 @@
+import csv
 from http import HTTPStatus
 
 
@@ -308,3 +309,15 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def rewrite_csv(path, change):
+    """Переписывает CSV, применяя ``change`` к списку строк-словарей."""
+    with open(path, encoding='utf-8', newline='') as file:
+        reader = csv.DictReader(file)
+        header, rows = reader.fieldnames, list(reader)
+    change(rows)
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, header)
+        writer.writeheader()
+        writer.writerows(rows)